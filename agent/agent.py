@@ -1,35 +1,211 @@
 import os
+import json
+import time
+import asyncio
 import logging
-from dotenv import load_dotenv
+import importlib
+import threading
+from typing import Any, Dict, Optional
 
 from livekit import agents
-from livekit.agents import Agent, AgentSession, RoomOutputOptions
-from livekit.plugins import openai, deepgram, elevenlabs, silero, tavus
+from livekit.agents import Agent, AgentSession, RoomOutputOptions, llm
 
 # Importar el system prompt
 from prompts.sofia_prompt import SOFIA_SYSTEM_PROMPT
 
 # Importar las tools
-from tools.get_evaluation_criteria import get_evaluation_criteria
-from tools.evaluation_question import evaluation_question
+from tools.complete_evaluation import complete_evaluation
+from tools.get_evaluation_criteria import load_evaluation_criteria
+from tools.interview_flow import next_question, record_answer
+from tools.search_knowledge import get_knowledge_searcher, search_knowledge
+from tools.evaluation_queue import EVALUATION_MODE, get_evaluation_queue
+from tools.http_client import get_http_client
+from tools.update_candidate_status import update_candidate_status
+from tools.write_behind import get_write_behind
 
-load_dotenv()
+from agent.context_policy import CONTEXT_TOKEN_MODEL, ContextPolicy
+from agent.endpointing import (
+    TURN_DETECTOR_PLUGIN,
+    session_turn_handling,
+    vad_silence,
+    watch_endpointing,
+)
+from agent.interview_state import InterviewState
+from agent.llm_replay import replay_llm
+from agent.transcript import TRANSCRIPTS_DIR, record_transcript
+from agent.tts_cache import cached_tts, presynthesize_utterances
+from agent.worker import close_job_resources, watch_loop_lag
+from agent.metrics import (
+    SessionMetrics,
+    StartupTimer,
+    build_exporters,
+    watch_first_greeting,
+    watch_turn_latency,
+)
+from helpers.tokens import count_tokens
 
 # Configure logging
 logger = logging.getLogger("sofia-agent")
 logger.setLevel(logging.INFO)
 
+# Espera máxima por el banco de preguntas precargado antes de iniciar la sesión
+QUESTION_PREFETCH_TIMEOUT = float(os.getenv("QUESTION_PREFETCH_TIMEOUT", "2"))
+
+# Voz de ElevenLabs (Rachel, admite español); forma parte de la clave de la caché de audio
+VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+# Plugins de LiveKit: no se importan con este módulo, así el proceso
+# principal del worker se registra sin cargarlos (ver load_plugins)
+PLUGIN_MODULES = [
+    "livekit.plugins.openai",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.elevenlabs",
+    "livekit.plugins.silero",
+    "livekit.plugins.tavus",
+]
+# Módulos que el forkserver importa una sola vez y heredan los procesos de job
+# (el turn detector es opcional: el forkserver ignora los módulos que no existen)
+PRELOAD_MODULES = PLUGIN_MODULES + [TURN_DETECTOR_PLUGIN, "openai", "qdrant_client", "tiktoken", "agent.agent"]
+
+
+def load_plugins() -> None:
+    """
+    Importa (y registra) los plugins de LiveKit. Los plugins se registran
+    en el hilo principal: llamarlo antes de arrancar el worker cuando los
+    jobs corren en hilos (consola, Windows) o para download-files.
+    """
+    for module in PLUGIN_MODULES:
+        importlib.import_module(module)
+
+
+def load_vad():
+    """
+    Carga Silero VAD configurado para detección de habla en español. Con
+    endpointing adaptativo el silencio mínimo es bajo y la espera por turno
+    la decide ``agent.endpointing``.
+    """
+    from livekit.plugins import silero
+
+    return silero.VAD.load(
+        min_speech_duration=0.2,            # Menor valor = más sensible
+        min_silence_duration=vad_silence(), # Menor valor = responde más rápido
+        padding_duration=0.2                # Tiempo de relleno alrededor del habla
+    )
+
+
+_vad = None
+_vad_lock = threading.Lock()
+
+
+def shared_vad():
+    """
+    Modelo VAD del proceso. Con jobs en hilos cada job corre su prewarm,
+    pero todos comparten el mismo modelo (cada sesión abre su propio stream).
+    """
+    global _vad
+    with _vad_lock:
+        if _vad is None:
+            _vad = load_vad()
+    return _vad
+
+
+def prewarm(proc: agents.JobProcess):
+    """
+    Prewarm del proceso worker: se ejecuta una vez por proceso, antes de
+    recibir jobs, para que cada entrevista reutilice los recursos costosos.
+
+    - Importa los plugins de LiveKit (ya cargados si vienen del forkserver)
+    - Carga el modelo Silero VAD (uno por proceso, ver shared_vad)
+    - Crea el cliente OpenAI (pool httpx) que usará el LLM
+    - Carga el tokenizer de ContextPolicy
+    - Crea el cliente HTTP compartido de las tools (webhook de evaluación)
+    - Crea los clientes de búsqueda en la documentación (Qdrant + embeddings)
+    """
+    start = time.perf_counter()
+
+    load_plugins()
+    from openai import AsyncOpenAI
+
+    proc.userdata["vad"] = shared_vad()
+    proc.userdata["openai_client"] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    count_tokens("", CONTEXT_TOKEN_MODEL)
+    get_http_client()
+
+    try:
+        get_knowledge_searcher()
+    except Exception as e:
+        logger.warning(f"⚠️ search_knowledge no disponible: {e}")
+
+    proc.userdata["prewarm_ms"] = (time.perf_counter() - start) * 1000
+    logger.info(f"🔥 Worker prewarmed in {proc.userdata['prewarm_ms']:.0f} ms")
+
+
+def preloaded_question_ctx(state: InterviewState) -> llm.ChatContext:
+    """
+    Contexto inicial con la primera pregunta ya servida por ``next_question``,
+    como si la tool ya se hubiera llamado: el LLM puede hacer la primera
+    pregunta sin otra vuelta de tool call.
+    """
+    chat_ctx = llm.ChatContext.empty()
+    call_id = "prefetch_next_question"
+    first = {"success": True, **state.question_payload(state.advance())}
+
+    chat_ctx.insert(llm.FunctionCall(call_id=call_id, name="next_question", arguments="{}"))
+    chat_ctx.insert(llm.FunctionCallOutput(
+        call_id=call_id,
+        name="next_question",
+        output=json.dumps(first, ensure_ascii=False),
+        is_error=False,
+    ))
+    return chat_ctx
+
+
+async def wait_for_prefetch(task: "asyncio.Task", timeout: float = QUESTION_PREFETCH_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Resultado de la precarga si llega a tiempo y es válido; si no, None."""
+    try:
+        criteria = await asyncio.wait_for(asyncio.shield(task), timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Question bank prefetch not ready: {e!r}")
+        return None
+
+    return criteria if criteria.get("success") else None
+
 
 class Assistant(Agent):
-    def __init__(self):
+    def __init__(self, state: InterviewState):
         super().__init__(
             instructions=SOFIA_SYSTEM_PROMPT,
+            chat_ctx=preloaded_question_ctx(state) if state.loaded else None,
             tools=[
                 # register_candidate, deprecated
-                get_evaluation_criteria,
-                evaluation_question,
+                next_question,
+                record_answer,
+                search_knowledge,
+                complete_evaluation,
+                update_candidate_status,
             ]
         )
+        self.state = state
+        self.context_policy = ContextPolicy()
+
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        """
+        Mantiene el contexto del LLM dentro del presupuesto de tokens
+        (``ContextPolicy``): los topics terminados pasan a un resumen, los
+        resultados de tools antiguos se reducen y la pregunta en curso queda
+        literal. Cada turno recibe además un resumen del estado actual.
+        """
+        chat_ctx = self.chat_ctx.copy()
+        stats = self.context_policy.apply(chat_ctx)
+        if stats.changed:
+            await self.update_chat_ctx(chat_ctx)
+            logger.info(
+                f"🗜️ Chat context compacted: {stats.tokens_before} -> {stats.tokens_after} tokens "
+                f"({stats.summarized} summarized, {stats.compacted_tools} tool items compacted, {stats.dropped} dropped)"
+            )
+
+        turn_ctx.items[:] = chat_ctx.items
+        turn_ctx.add_message(role="system", content=self.state.progress())
 
 
 async def entrypoint(ctx: agents.JobContext):
@@ -46,20 +222,42 @@ async def entrypoint(ctx: agents.JobContext):
     The agent worker connects but the avatar publishes on its behalf,
     so only the avatar appears as the visible participant.
     """
-    
+    from livekit.plugins import deepgram, elevenlabs, openai, tavus
+
+    timer = StartupTimer(prewarmed="vad" in ctx.proc.userdata)
+    # Lag del event loop del job para la carga del worker (agent/worker.py)
+    watch_loop_lag(ctx)
+
+    # Precarga especulativa del banco de preguntas, en paralelo con la
+    # conexión a la sala y el arranque del avatar
+    criteria_task = asyncio.create_task(load_evaluation_criteria())
+
+    # Estado de la entrevista en el servidor (userdata de la sesión)
+    state = InterviewState(session_id=ctx.job.id)
+
+    # Evaluación en segundo plano: reencolar lo que quedó pendiente en el spool
+    # (fallos anteriores o procesos caídos) y esperar las de esta sesión al cerrar
+    if EVALUATION_MODE == "background":
+        evaluation_queue = get_evaluation_queue()
+        evaluation_queue.start_recovery()
+
+        async def _drain_evaluations():
+            if not await evaluation_queue.drain(state.session_id):
+                logger.warning(
+                    f"⚠️ {evaluation_queue.pending(state.session_id)} evaluations still running at shutdown; "
+                    f"they stay in the spool"
+                )
+
+        ctx.add_shutdown_callback(_drain_evaluations)
+
     # Connect to the room first (required for ctx.room to be available)
     await ctx.connect()
+    timer.mark("connect")
     logger.info("🚀 Starting Tavus avatar agent...")
     
-    # Create the assistant agent
-    assistant = Assistant()
-    
-    # Configure VAD for Spanish speech detection
-    vad = silero.VAD.load(
-        min_speech_duration=0.2,    # Menor valor = más sensible
-        min_silence_duration=0.6,   # Menor valor = responde más rápido
-        padding_duration=0.2        # Tiempo de relleno alrededor del habla
-    )
+    # VAD y cliente OpenAI cargados en el prewarm del proceso (ver prewarm)
+    vad = ctx.proc.userdata.get("vad") or shared_vad()
+    openai_client = ctx.proc.userdata.get("openai_client")
 
     # Step 1: Create session WITH TTS (required for Tavus avatar)
     # The TTS generates audio that Tavus will lip-sync to
@@ -71,23 +269,59 @@ async def entrypoint(ctx: agents.JobContext):
         ),
         
         # LLM: GPT-4o mini - muy bueno en español
-        llm=openai.LLM(
+        # Con LLM_REPLAY_MODE graba o reproduce sus respuestas (agent/llm_replay.py)
+        llm=replay_llm(openai.LLM(
             model="gpt-4o-mini",
             temperature=0.8,
-        ),
+            client=openai_client,
+        )),
         
         # TTS: ElevenLabs with Spanish voice
         # The avatar will lip-sync to this audio output
-        tts=elevenlabs.TTS(
-            voice_id="21m00Tcm4TlvDq8ikWAM",  # Rachel voice (supports Spanish)
-            model="eleven_turbo_v2_5",
-            language="es",
-            api_key=os.getenv("ELEVENLABS_API_KEY"),  # Read from ELEVENLABS_API_KEY env var
+        # Síntesis por frases con caché en disco (saludo, transiciones, preguntas)
+        tts=cached_tts(
+            elevenlabs.TTS(
+                voice_id=VOICE_ID,
+                model="eleven_turbo_v2_5",
+                language="es",
+                api_key=os.getenv("ELEVENLABS_API_KEY"),  # Read from ELEVENLABS_API_KEY env var
+            ),
+            voice_id=VOICE_ID,
         ),
         
         vad=vad,
-        allow_interruptions=True,
+        userdata=state,
+        # Interrupciones activas; endpointing adaptativo por tipo de pregunta y ritmo del candidato
+        turn_handling=session_turn_handling(),
     )
+    watch_first_greeting(session, timer)
+    watch_endpointing(session, state)
+
+    # Spans de latencia por turno (EOU, STT, LLM, tools, TTS, avatar)
+    session_metrics = SessionMetrics(ctx.job.id, build_exporters())
+    watch_turn_latency(session, session_metrics)
+
+    async def _close_metrics():
+        session_metrics.close()
+
+    ctx.add_shutdown_callback(_close_metrics)
+
+    # Escrituras en Supabase pendientes (write-behind) al terminar la sesión
+    async def _flush_persistence():
+        if not await get_write_behind().drain():
+            logger.warning(f"⚠️ Write-behind still pending at shutdown: {get_write_behind().stats()}")
+
+    ctx.add_shutdown_callback(_flush_persistence)
+
+    # Transcripción para reproducir la entrevista en los benchmarks de contexto
+    if TRANSCRIPTS_DIR:
+        transcript = record_transcript(session, os.path.join(TRANSCRIPTS_DIR, f"{ctx.job.id}.jsonl"))
+
+        async def _close_transcript():
+            transcript.close()
+
+        ctx.add_shutdown_callback(_close_transcript)
+    timer.mark("session_created")
     logger.info("✅ Session created with TTS")
 
     # Step 2: Create Tavus avatar session
@@ -104,8 +338,27 @@ async def entrypoint(ctx: agents.JobContext):
     # This connects the AVATAR as a participant (not the agent worker)
     # The avatar will be the only visible participant in the room
     await avatar.start(session, room=ctx.room)
+    timer.mark("avatar_started")
     logger.info("✅ Avatar started and connected to room as 'Sofia-Avatar'")
 
+    # Create the assistant agent with the prefetched question bank (if ready);
+    # otherwise next_question loads it on the first call
+    criteria = await wait_for_prefetch(criteria_task)
+    timer.mark("question_bank_ready")
+    if criteria:
+        state.load(criteria)
+        logger.info(f"✅ Question bank preloaded: {state.total_questions} questions")
+        presynth_task = asyncio.create_task(presynthesize_utterances(session.tts, state))
+
+        async def _cancel_presynthesis():
+            presynth_task.cancel()
+
+        ctx.add_shutdown_callback(_cancel_presynthesis)
+    assistant = Assistant(state)
+
+    # Último callback: cierra los clientes del job cuando ya se vació todo lo pendiente
+    ctx.add_shutdown_callback(close_job_resources)
+
     try:
         # Step 4: Start the agent session
         # The agent worker runs in the background, not visible in the room
@@ -117,6 +370,7 @@ async def entrypoint(ctx: agents.JobContext):
                 audio_enabled=True  # Critical: enables audio routing to avatar
             )
         )
+        timer.mark("session_started")
         logger.info("✅ Session started with agent - Sofia is ready!")
         # El saludo inicial lo hará Sofía según su prompt
 
@@ -0,0 +1,276 @@
+# agent/context_policy.py
+"""
+Política de contexto del LLM para entrevistas largas.
+
+En cada turno, antes de llamar al LLM:
+
+1. Los bloques de topics ya terminados se sustituyen por un resumen
+   compacto (pregunta, puntaje) en un único mensaje de sistema.
+2. Las llamadas a tools antiguas se reducen: argumentos recortados y del
+   resultado solo su mensaje; la pregunta en curso se conserva literal.
+3. Si el historial sigue por encima de ``token_budget`` tokens, se
+   descartan los mensajes más antiguos (llamada y resultado de tool
+   siempre juntos), conservando los ``keep_recent`` más recientes.
+
+Las instrucciones (system prompt) no cuentan para el presupuesto y nunca
+se tocan.
+"""
+import ast
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit.agents import llm
+
+from helpers.tokens import count_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "4"))
+CONTEXT_TOKEN_MODEL = "gpt-4o-mini"
+
+# Tools cuyo resultado trae una pregunta (en la raíz o en "next")
+QUESTION_TOOLS = ("next_question", "record_answer")
+
+SUMMARY_ID = "context_summary"
+
+# Caracteres que se conservan del mensaje de un resultado de tool antiguo
+STALE_OUTPUT_CHARS = 120
+# Y de cada argumento de texto de una llamada antigua (p. ej. la respuesta del candidato)
+STALE_ARGUMENT_CHARS = 40
+
+
+def _is_instruction(item: Any) -> bool:
+    return item.type == "message" and item.role in ("system", "developer") and item.id != SUMMARY_ID
+
+
+def _load_output(item: Any) -> Dict[str, Any]:
+    """
+    Resultado de una tool como dict. LiveKit guarda el dict devuelto por la
+    tool con ``str()`` (repr de Python); los resultados que arma el propio
+    agente (precarga, compactados) van en JSON.
+    """
+    try:
+        data = json.loads(item.output)
+    except (TypeError, ValueError):
+        try:
+            data = ast.literal_eval(item.output)
+        except (TypeError, ValueError, SyntaxError, MemoryError, RecursionError):
+            return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _compact_arguments(arguments: str) -> str:
+    """Argumentos de una llamada antigua con los textos largos recortados."""
+    try:
+        data = json.loads(arguments)
+    except (TypeError, ValueError):
+        return arguments
+    if not isinstance(data, dict):
+        return arguments
+    compact = {
+        key: value[:STALE_ARGUMENT_CHARS] + "…" if isinstance(value, str) and len(value) > STALE_ARGUMENT_CHARS else value
+        for key, value in data.items()
+    }
+    return json.dumps(compact, ensure_ascii=False)
+
+
+def _question_of(item: Any) -> Optional[Dict[str, Any]]:
+    """Pregunta servida en un resultado de next_question / record_answer."""
+    if item.type != "function_call_output" or item.name not in QUESTION_TOOLS:
+        return None
+    data = _load_output(item)
+    question = data.get("next", data) if item.name == "record_answer" else data
+    if isinstance(question, dict) and question.get("question"):
+        return question
+    return None
+
+
+@dataclass
+class CompactionStats:
+    tokens_before: int = 0
+    tokens_after: int = 0
+    summarized: int = 0  # items sustituidos por el resumen
+    compacted_tools: int = 0
+    dropped: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.summarized or self.compacted_tools or self.dropped)
+
+
+@dataclass
+class ContextPolicy:
+    """
+    Una instancia por sesión: acumula los registros de los topics ya
+    resumidos para reconstruir el mensaje de resumen en cada compactación.
+    """
+
+    token_budget: int = CONTEXT_TOKEN_BUDGET
+    keep_recent: int = CONTEXT_KEEP_RECENT
+    model: str = CONTEXT_TOKEN_MODEL
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    _pending: Dict[str, Dict[str, Any]] = field(default_factory=dict, repr=False)
+    _seen: set = field(default_factory=set, repr=False)
+    _topic_openers: set = field(default_factory=set, repr=False)
+    _current: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    _token_cache: Dict[Tuple[str, int], int] = field(default_factory=dict, repr=False)
+
+    # ==========================
+    # TOKENS
+    # ==========================
+
+    def item_tokens(self, item: Any) -> int:
+        if item.type == "message":
+            text = f"{item.role}: {item.text_content or ''}"
+        elif item.type == "function_call":
+            text = f"{item.name}({item.arguments})"
+        elif item.type == "function_call_output":
+            text = item.output
+        else:
+            return 0
+
+        key = (item.id, len(text))
+        if key not in self._token_cache:
+            self._token_cache[key] = count_tokens(text, self.model) + 4  # + formato del mensaje
+        return self._token_cache[key]
+
+    def history_tokens(self, chat_ctx: llm.ChatContext) -> int:
+        return sum(self.item_tokens(item) for item in chat_ctx.items if not _is_instruction(item))
+
+    # ==========================
+    # RESUMEN
+    # ==========================
+
+    def _observe(self, history: List[Any]) -> None:
+        """
+        Registra cada resultado de tool nuevo (en orden) mientras aún está
+        literal: el puntaje de record_answer con la pregunta a la que
+        responde, y qué resultados abren un topic nuevo.
+        """
+        for item in history:
+            if item.type != "function_call_output" or item.call_id in self._seen:
+                continue
+            self._seen.add(item.call_id)
+
+            if item.name == "record_answer" and self._current is not None:
+                self._pending[item.call_id] = {
+                    "topic": self._current.get("topic"),
+                    "question_id": self._current.get("question_id"),
+                    "score": _load_output(item).get("score"),
+                }
+            question = _question_of(item)
+            if question is not None:
+                self._current = question
+                if question.get("new_topic"):
+                    self._topic_openers.add(item.call_id)
+
+    def _summarize(self, items: List[Any]) -> None:
+        """Pasa al resumen las respuestas de los items que salen del contexto."""
+        for item in items:
+            if item.type == "function_call_output" and item.call_id in self._pending:
+                self.records.append(self._pending.pop(item.call_id))
+
+    def summary_text(self) -> str:
+        by_topic: Dict[str, List[Dict[str, Any]]] = {}
+        for record in self.records:
+            by_topic.setdefault(record["topic"] or "?", []).append(record)
+
+        lines = ["Resumen de bloques terminados (preguntas ya hechas; no las repitas):"]
+        for topic, records in by_topic.items():
+            scores = [r["score"] for r in records if isinstance(r["score"], (int, float))]
+            average = f", media {sum(scores) / len(scores):.0f}" if scores else ""
+            answers = ", ".join(
+                f"#{r['question_id']}={r['score'] if r['score'] is not None else 's/p'}" for r in records
+            )
+            lines.append(f"- {topic}: {len(records)} respuestas{average} ({answers})")
+        return "\n".join(lines)
+
+    # ==========================
+    # POLÍTICA
+    # ==========================
+
+    def apply(self, chat_ctx: llm.ChatContext) -> CompactionStats:
+        """Compacta ``chat_ctx`` en el sitio y devuelve qué se hizo."""
+        stats = CompactionStats(tokens_before=self.history_tokens(chat_ctx))
+        items = list(chat_ctx.items)
+
+        instructions = [item for item in items if _is_instruction(item)]
+        history = [item for item in items if not _is_instruction(item) and item.id != SUMMARY_ID]
+
+        self._observe(history)
+
+        # Pregunta en curso: el último resultado de tool que trae una pregunta
+        question_idx = max((i for i, item in enumerate(history) if _question_of(item)), default=None)
+
+        # 1) Topics terminados: todo lo anterior al resultado que abrió el topic actual
+        opener = None
+        if question_idx is not None:
+            opener = max(
+                (i for i, item in enumerate(history[:question_idx + 1])
+                 if item.type == "function_call_output" and item.call_id in self._topic_openers),
+                default=None,
+            )
+
+        if opener:
+            # La llamada de tool que abre el topic se queda con su resultado
+            start = opener - 1 if history[opener - 1].type == "function_call" else opener
+            finished, history = history[:start], history[start:]
+            # El resultado que abre el topic trae el puntaje de la última respuesta del anterior
+            self._summarize(finished + [history[opener - start]])
+            question_idx -= start
+            stats.summarized = len(finished)
+
+        # 2) Tools antiguos: argumentos recortados y del resultado solo su mensaje
+        for i, item in enumerate(history):
+            if i == question_idx or i >= len(history) - self.keep_recent:
+                continue
+            if item.type == "function_call":
+                compact = _compact_arguments(item.arguments)
+                if item.arguments != compact:
+                    history[i] = item.model_copy(update={"arguments": compact})
+                    stats.compacted_tools += 1
+            elif item.type == "function_call_output":
+                data = _load_output(item)
+                message = str(data.get("feedback") or data.get("message") or "")[:STALE_OUTPUT_CHARS]
+                compact = json.dumps({"message": message}, ensure_ascii=False) if message else "{}"
+                if item.output != compact:
+                    history[i] = item.model_copy(update={"output": compact})
+                    stats.compacted_tools += 1
+
+        # 3) Presupuesto: descartar lo más antiguo, sin separar llamada y resultado
+        def budget_used() -> int:
+            summary = count_tokens(self.summary_text(), self.model) if self.records else 0
+            return summary + sum(self.item_tokens(item) for item in history)
+
+        protected_ids = set()
+        if question_idx is not None:
+            protected_ids.add(history[question_idx].call_id)
+
+        while budget_used() > self.token_budget and len(history) > self.keep_recent:
+            item = history[0]
+            if item.type in ("function_call", "function_call_output") and item.call_id in protected_ids:
+                break
+            group = [item]
+            if item.type == "function_call":
+                group += [other for other in history[1:] if other.type == "function_call_output" and other.call_id == item.call_id]
+            self._summarize(group)
+            dropped_ids = {other.id for other in group}
+            history = [other for other in history if other.id not in dropped_ids]
+            stats.dropped += len(group)
+
+        # Evitar que el historial empiece por un resultado de tool huérfano
+        while history and history[0].type == "function_call_output" and not any(
+            other.type == "function_call" and other.call_id == history[0].call_id for other in history
+        ):
+            self._summarize([history.pop(0)])
+            stats.dropped += 1
+
+        new_items = list(instructions)
+        if self.records:
+            new_items.append(llm.ChatMessage(id=SUMMARY_ID, role="system", content=[self.summary_text()]))
+        new_items.extend(history)
+
+        chat_ctx.items[:] = new_items
+        stats.tokens_after = self.history_tokens(chat_ctx)
+        return stats
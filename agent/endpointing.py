@@ -0,0 +1,275 @@
+# agent/endpointing.py
+"""
+Endpointing adaptativo: cuánto silencio espera Sofía antes de dar por
+terminado el turno del candidato.
+
+Un umbral fijo corta a quien se queda pensando a mitad de una respuesta
+técnica y hace esperar de más un "sí" a "¿Estás listo?". Aquí el retardo
+se decide por turno:
+
+- Respuesta esperada: corta (confirmaciones, datos, despedida) o técnica,
+  con más margen cuanto mayor es la dificultad de la pregunta
+- Ritmo del candidato: las pausas que hace dentro de sus respuestas (media
+  móvil), su velocidad de habla y los cortes prematuros (retoma la palabra
+  justo después de que se cerró su turno)
+- Turn detector (``livekit-plugins-turn-detector``, si está instalado):
+  con probabilidad baja de fin de turno se espera ``max_delay``
+
+El VAD (Silero) es compartido por todas las sesiones del proceso, así que
+su silencio mínimo queda fijo y bajo; lo que se ajusta por sesión es el
+retardo de endpointing de la ``AgentSession``.
+"""
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from agent.interview_state import InterviewState, difficulty_weight
+
+logger = logging.getLogger("sofia-agent")
+
+# "adaptive" (por defecto) o "fixed" (umbral fijo del VAD, como antes)
+ENDPOINTING_MODE = os.getenv("ENDPOINTING_MODE", "adaptive")
+# Silencio mínimo del VAD en modo adaptativo (s); el resto lo decide el endpointing
+ENDPOINTING_VAD_SILENCE = float(os.getenv("ENDPOINTING_VAD_SILENCE", "0.3"))
+# Silencio mínimo del VAD en modo fijo (s)
+FIXED_VAD_SILENCE = 0.6
+# Retardo para respuestas cortas y para respuestas técnicas de dificultad 1 (s)
+ENDPOINTING_SHORT_DELAY = float(os.getenv("ENDPOINTING_SHORT_DELAY", "0.35"))
+ENDPOINTING_ANSWER_DELAY = float(os.getenv("ENDPOINTING_ANSWER_DELAY", "0.9"))
+# Retardo extra por cada nivel de dificultad por encima de 1 (s)
+ENDPOINTING_DIFFICULTY_STEP = float(os.getenv("ENDPOINTING_DIFFICULTY_STEP", "0.25"))
+# Tope del retardo mínimo (s)
+ENDPOINTING_MAX_DELAY = float(os.getenv("ENDPOINTING_MAX_DELAY", "2.5"))
+# Usar el turn detector como segunda señal si está instalado
+ENDPOINTING_TURN_DETECTOR = os.getenv("ENDPOINTING_TURN_DETECTOR", "1") == "1"
+
+TURN_DETECTOR_PLUGIN = "livekit.plugins.turn_detector"
+
+# Margen sobre la pausa típica del candidato dentro de una respuesta
+PAUSE_MARGIN = 1.25
+# Peso de cada pausa nueva en la media móvil
+PAUSE_ALPHA = 0.3
+# Retardo extra por cada corte prematuro, y tope acumulado (s)
+CUTOFF_STEP = 0.3
+CUTOFF_MAX_BONUS = 1.2
+# Si el candidato vuelve a hablar antes de esto tras cerrarse su turno, fue un corte (s)
+RESUME_WINDOW = 1.5
+# Velocidad de habla de referencia (palabras/s) y palabras mínimas para usar la del candidato
+PACE_REFERENCE_WPS = 2.5
+PACE_MIN_WORDS = 15
+# Espera adicional sobre min_delay cuando el turn detector ve poco probable el fin de turno (s)
+UNLIKELY_END_EXTRA = 1.5
+
+
+@dataclass
+class TurnExpectation:
+    kind: str = "short"  # "short" o "answer"
+    difficulty: float = 1.0
+
+
+def expectation_for(state: InterviewState) -> TurnExpectation:
+    """Qué tipo de respuesta se espera del candidato en el estado actual."""
+    question = state.awaiting_answer()
+    if question is None:
+        return TurnExpectation("short")
+    return TurnExpectation("answer", difficulty_weight(question.get("difficulty")))
+
+
+class EndpointingPolicy:
+    """
+    Retardo de fin de turno (``min_delay``, ``max_delay``) según la
+    respuesta esperada y el ritmo observado del candidato. No depende de
+    LiveKit: el evaluador offline la reproduce sobre audio grabado.
+    """
+
+    def __init__(
+        self,
+        short_delay: float = ENDPOINTING_SHORT_DELAY,
+        answer_delay: float = ENDPOINTING_ANSWER_DELAY,
+        difficulty_step: float = ENDPOINTING_DIFFICULTY_STEP,
+        max_delay: float = ENDPOINTING_MAX_DELAY,
+    ):
+        self.short_delay = short_delay
+        self.answer_delay = answer_delay
+        self.difficulty_step = difficulty_step
+        self.max_delay = max_delay
+
+        self.expectation = TurnExpectation()
+        self.pause_ema: Optional[float] = None
+        self.cutoff_bonus: Dict[str, float] = {"short": 0.0, "answer": 0.0}
+        self.cutoffs = 0
+        self.words = 0
+        self.speech_seconds = 0.0
+
+    def expect(self, expectation: TurnExpectation) -> None:
+        self.expectation = expectation
+
+    def observe_pause(self, seconds: float) -> None:
+        """Pausa dentro de una respuesta técnica que no cerró el turno."""
+        if self.expectation.kind != "answer":
+            return
+        if self.pause_ema is None:
+            self.pause_ema = seconds
+        else:
+            self.pause_ema = PAUSE_ALPHA * seconds + (1 - PAUSE_ALPHA) * self.pause_ema
+
+    def observe_cutoff(self) -> None:
+        """El turno se cerró y el candidato siguió hablando: esperar más en este tipo de respuesta."""
+        kind = self.expectation.kind
+        self.cutoffs += 1
+        self.cutoff_bonus[kind] = min(CUTOFF_MAX_BONUS, self.cutoff_bonus[kind] + CUTOFF_STEP)
+
+    def observe_speech(self, words: int = 0, seconds: float = 0.0) -> None:
+        self.words += words
+        self.speech_seconds += seconds
+
+    @property
+    def pace(self) -> Optional[float]:
+        """Palabras por segundo de habla del candidato (None con pocas palabras)."""
+        if self.words < PACE_MIN_WORDS or self.speech_seconds <= 0:
+            return None
+        return self.words / self.speech_seconds
+
+    def delays(self) -> Tuple[float, float]:
+        expectation = self.expectation
+        if expectation.kind == "answer":
+            delay = self.answer_delay + self.difficulty_step * (max(1.0, expectation.difficulty) - 1)
+            if self.pause_ema is not None:
+                delay = max(delay, self.pause_ema * PAUSE_MARGIN)
+            if self.pace is not None:
+                # Quien habla despacio también hace pausas más largas
+                delay *= min(1.3, max(0.85, PACE_REFERENCE_WPS / self.pace))
+        else:
+            delay = self.short_delay
+
+        delay = min(self.max_delay, delay + self.cutoff_bonus[expectation.kind])
+        return round(delay, 2), round(delay + UNLIKELY_END_EXTRA, 2)
+
+
+class AdaptiveEndpointing:
+    """
+    Conecta una ``EndpointingPolicy`` a los eventos de una ``AgentSession``
+    y actualiza su endpointing cuando cambia el retardo.
+    """
+
+    def __init__(self, session, state: InterviewState, policy: Optional[EndpointingPolicy] = None,
+                 vad_silence: float = ENDPOINTING_VAD_SILENCE):
+        self.session = session
+        self.state = state
+        self.policy = policy or EndpointingPolicy()
+        self.vad_silence = vad_silence
+        self.applied: Optional[Tuple[float, float]] = None
+
+        self._speech_started_at: Optional[float] = None
+        self._user_stopped_at: Optional[float] = None
+        self._committed_at: Optional[float] = None
+
+    def apply(self) -> None:
+        delays = self.policy.delays()
+        if delays == self.applied:
+            return
+        self.applied = delays
+        self.session.update_options(endpointing_opts={"min_delay": delays[0], "max_delay": delays[1]})
+        logger.debug(f"🎙️ Endpointing {self.policy.expectation.kind}: min={delays[0]}s max={delays[1]}s")
+
+    def on_user_state(self, new_state: str) -> None:
+        now = time.time()
+        if new_state == "speaking":
+            if self._user_stopped_at is not None:
+                gap = now - self._user_stopped_at + self.vad_silence
+                if self._committed_at is None:
+                    self.policy.observe_pause(gap)
+                    self.apply()
+                elif now - self._committed_at <= RESUME_WINDOW:
+                    self.policy.observe_cutoff()
+                    logger.info(f"✂️ Candidate resumed {now - self._committed_at:.1f}s after end of turn "
+                                f"({self.policy.cutoffs} cutoffs); endpointing delay raised")
+                    self.apply()
+            self._speech_started_at = now
+            self._user_stopped_at = None
+        elif new_state == "listening" and self._speech_started_at is not None:
+            self.policy.observe_speech(seconds=max(0.0, now - self._speech_started_at - self.vad_silence))
+            self._speech_started_at = None
+            self._user_stopped_at = now
+
+    def on_agent_state(self, new_state: str) -> None:
+        if new_state == "thinking" and self._committed_at is None:
+            self._committed_at = time.time()
+        elif new_state == "speaking":
+            # La tool ya avanzó el estado: la respuesta que sigue es a lo que Sofía está diciendo
+            self.policy.expect(expectation_for(self.state))
+            self.apply()
+        elif new_state == "listening":
+            # Sofía terminó de hablar: lo siguiente es un turno nuevo, no una pausa
+            self._committed_at = None
+            self._user_stopped_at = None
+
+    def on_transcript(self, transcript: str, is_final: bool) -> None:
+        if is_final:
+            self.policy.observe_speech(words=len(transcript.split()))
+
+
+def vad_silence() -> float:
+    """Silencio mínimo del VAD compartido del proceso según el modo."""
+    return ENDPOINTING_VAD_SILENCE if ENDPOINTING_MODE == "adaptive" else FIXED_VAD_SILENCE
+
+
+def register_turn_detector() -> bool:
+    """
+    Importa el plugin del turn detector en el hilo principal. Tiene que
+    hacerse en el proceso principal antes de arrancar el worker: el modelo
+    corre en el proceso de inferencia que el worker crea al iniciar.
+    """
+    if ENDPOINTING_MODE != "adaptive" or not ENDPOINTING_TURN_DETECTOR:
+        return False
+    try:
+        importlib.import_module(TURN_DETECTOR_PLUGIN)
+        return True
+    except ImportError:
+        return False
+
+
+def load_turn_detector() -> Optional[Any]:
+    """Modelo multilingüe del turn detector, o None si no está disponible."""
+    if ENDPOINTING_MODE != "adaptive" or not ENDPOINTING_TURN_DETECTOR:
+        return None
+    try:
+        from livekit.plugins.turn_detector.multilingual import MultilingualModel
+        return MultilingualModel()
+    except Exception as e:
+        logger.warning(f"⚠️ Turn detector not available, endpointing uses silence only: {e}")
+        return None
+
+
+def session_turn_handling() -> Dict[str, Any]:
+    """
+    ``turn_handling`` para crear la ``AgentSession``: la misma estructura
+    ``endpointing`` (``min_delay``/``max_delay``) que después ajusta
+    ``AdaptiveEndpointing.apply`` con ``update_options(endpointing_opts=...)``.
+    En modo fijo, los valores por defecto de LiveKit.
+    """
+    turn_handling: Dict[str, Any] = {"interruption": {"enabled": True}}
+    if ENDPOINTING_MODE != "adaptive":
+        return turn_handling
+
+    min_delay, max_delay = EndpointingPolicy().delays()
+    turn_handling["endpointing"] = {"min_delay": min_delay, "max_delay": max_delay}
+    turn_detector = load_turn_detector()
+    if turn_detector is not None:
+        turn_handling["turn_detection"] = turn_detector
+    return turn_handling
+
+
+def watch_endpointing(session, state: InterviewState) -> Optional[AdaptiveEndpointing]:
+    """Suscribe el endpointing adaptativo a los eventos de la sesión de livekit."""
+    if ENDPOINTING_MODE != "adaptive":
+        return None
+
+    endpointing = AdaptiveEndpointing(session, state)
+    session.on("user_state_changed", lambda ev: endpointing.on_user_state(ev.new_state))
+    session.on("agent_state_changed", lambda ev: endpointing.on_agent_state(ev.new_state))
+    session.on("user_input_transcribed", lambda ev: endpointing.on_transcript(ev.transcript, ev.is_final))
+    return endpointing
@@ -0,0 +1,254 @@
+# agent/interview_state.py
+"""
+Estado de la entrevista en el servidor (uno por sesión, como ``userdata`` de
+la AgentSession).
+
+El orden de las preguntas, el topic actual, las respuestas y los puntajes
+del webhook viven aquí en lugar de en el contexto del LLM: el modelo pide
+la siguiente pregunta y registra cada respuesta con tools, y su contexto
+puede recortarse a una ventana de los últimos mensajes.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Orden de las áreas en la entrevista; los topics que no estén aquí van al final
+TOPIC_ORDER = ["HTML", "CSS", "JavaScript", "Tools"]
+
+
+@dataclass
+class AnswerRecord:
+    question_id: Any
+    topic: str
+    question: str
+    answer: str
+    score: Optional[float] = None
+    feedback: Optional[str] = None
+    evaluation: Dict[str, Any] = field(default_factory=dict)
+    status: str = "evaluated"  # "pending" mientras la evaluación va en segundo plano, "failed" si no llegó
+
+    def apply_evaluation(self, evaluation: Dict[str, Any]) -> None:
+        """Adjunta la evaluación (p. ej. la que llega de la cola en segundo plano)."""
+        self.evaluation = evaluation
+        self.score = extract_score(evaluation)
+        self.feedback = extract_feedback(evaluation)
+        self.status = "evaluated"
+
+
+def questions_from_payload(payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Preguntas por topic a partir del resultado de ``get_evaluation_criteria``
+    en formato compacto (``topics``) o completo (``questions``).
+    """
+    if "topics" in payload:
+        fields = payload.get("fields", ["id", "difficulty", "question"])
+        return {
+            topic: [dict(zip(fields, row)) for row in rows]
+            for topic, rows in payload["topics"].items()
+        }
+
+    return {
+        topic: [
+            {"id": q.get("id"), "difficulty": q.get("difficulty"), "question": q.get("question")}
+            for q in questions
+        ]
+        for topic, questions in payload.get("questions", {}).items()
+    }
+
+
+def extract_score(evaluation: Dict[str, Any]) -> Optional[float]:
+    """Puntaje numérico de la respuesta del webhook, si viene."""
+    for key in ("score", "puntaje", "calificacion"):
+        value = evaluation.get(key)
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+def difficulty_weight(difficulty: Any) -> float:
+    """Peso de una pregunta en el puntaje de su topic: su dificultad (1 si no es numérica)."""
+    try:
+        weight = float(difficulty)
+    except (TypeError, ValueError):
+        return 1.0
+    return weight if weight > 0 else 1.0
+
+
+def extract_feedback(evaluation: Dict[str, Any]) -> Optional[str]:
+    """Mensaje para el candidato de la respuesta del webhook, si viene."""
+    for key in ("message", "feedback", "output", "mensaje"):
+        value = evaluation.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+@dataclass
+class InterviewState:
+    candidate_id: Optional[str] = None
+    session_id: Optional[str] = None
+    questions: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    topics: List[str] = field(default_factory=list)
+    topic_index: int = 0
+    question_index: int = -1  # -1: aún no se ha hecho la primera pregunta del topic
+    answers: List[AnswerRecord] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.topics)
+
+    @property
+    def total_questions(self) -> int:
+        return sum(len(questions) for questions in self.questions.values())
+
+    def load(self, payload: Dict[str, Any]) -> None:
+        """Carga el banco de preguntas (resultado de ``get_evaluation_criteria``)."""
+        self.questions = {topic: qs for topic, qs in questions_from_payload(payload).items() if qs}
+        order = {topic: i for i, topic in enumerate(TOPIC_ORDER)}
+        self.topics = sorted(self.questions, key=lambda t: (order.get(t, len(order)), t))
+        self.topic_index = 0
+        self.question_index = -1
+
+    @property
+    def current_topic(self) -> Optional[str]:
+        if self.topic_index < len(self.topics):
+            return self.topics[self.topic_index]
+        return None
+
+    def current_question(self) -> Optional[Dict[str, Any]]:
+        topic = self.current_topic
+        if topic is None or self.question_index < 0:
+            return None
+        return {**self.questions[topic][self.question_index], "topic": topic}
+
+    @property
+    def finished(self) -> bool:
+        return self.loaded and self.current_topic is None
+
+    def advance(self) -> Optional[Dict[str, Any]]:
+        """Pasa a la siguiente pregunta (y al siguiente topic al agotar uno)."""
+        while self.current_topic is not None:
+            if self.question_index + 1 < len(self.questions[self.current_topic]):
+                self.question_index += 1
+                return self.current_question()
+            self.topic_index += 1
+            self.question_index = -1
+        return None
+
+    def awaiting_answer(self) -> Optional[Dict[str, Any]]:
+        """Pregunta en curso si el candidato aún no la ha respondido."""
+        question = self.current_question()
+        if question is None or (self.answers and self.answers[-1].question_id == question["id"]):
+            return None
+        return question
+
+    def asked(self) -> int:
+        done_topics = sum(len(self.questions[t]) for t in self.topics[:self.topic_index])
+        return done_topics + self.question_index + 1
+
+    def question_payload(self, question: Optional[Dict[str, Any]], previous_topic: Optional[str] = None) -> Dict[str, Any]:
+        """Lo que ve el LLM de una pregunta: solo lo necesario para hacerla."""
+        if question is None:
+            return {
+                "done": True,
+                "message": "No quedan preguntas: cierra la evaluación técnica.",
+            }
+        return {
+            "done": False,
+            "topic": question["topic"],
+            "question_id": question["id"],
+            "question": question["question"],
+            "position": f"{self.asked()}/{self.total_questions}",
+            "new_topic": question["topic"] != previous_topic,
+        }
+
+    def record(self, answer: str, evaluation: Optional[Dict[str, Any]] = None) -> AnswerRecord:
+        """
+        Registra la respuesta a la pregunta actual con su evaluación, o como
+        pendiente si la evaluación llega después (``apply_evaluation``).
+        """
+        question = self.current_question()
+        if question is None:
+            raise ValueError("No hay una pregunta en curso")
+
+        record = AnswerRecord(
+            question_id=question["id"],
+            topic=question["topic"],
+            question=question["question"],
+            answer=answer,
+        )
+        if evaluation is None:
+            record.status = "pending"
+        else:
+            record.apply_evaluation(evaluation)
+        self.answers.append(record)
+        return record
+
+    def pending_evaluations(self) -> int:
+        return sum(1 for record in self.answers if record.status == "pending")
+
+    def topic_scores(self) -> Dict[str, Optional[float]]:
+        """Promedio de puntajes por topic (None si ninguna respuesta trae puntaje)."""
+        scores: Dict[str, List[float]] = {topic: [] for topic in self.topics}
+        for record in self.answers:
+            if record.score is not None:
+                scores.setdefault(record.topic, []).append(record.score)
+        return {
+            topic: round(sum(values) / len(values), 1) if values else None
+            for topic, values in scores.items()
+        }
+
+    def question_weight(self, record: AnswerRecord) -> float:
+        for question in self.questions.get(record.topic, []):
+            if question.get("id") == record.question_id:
+                return difficulty_weight(question.get("difficulty"))
+        return 1.0
+
+    def weighted_topic_scores(self) -> Dict[str, Optional[float]]:
+        """
+        Puntaje por topic ponderado por la dificultad de cada pregunta (None
+        si ninguna respuesta del topic trae puntaje).
+        """
+        totals: Dict[str, List[float]] = {topic: [0.0, 0.0] for topic in self.topics}
+        for record in self.answers:
+            if record.score is not None:
+                weight = self.question_weight(record)
+                total = totals.setdefault(record.topic, [0.0, 0.0])
+                total[0] += record.score * weight
+                total[1] += weight
+        return {
+            topic: round(weighted / weights, 1) if weights else None
+            for topic, (weighted, weights) in totals.items()
+        }
+
+    def overall_score(self) -> Optional[float]:
+        """Puntaje global ponderado por dificultad sobre todas las respuestas con puntaje."""
+        scored = [(record.score, self.question_weight(record)) for record in self.answers if record.score is not None]
+        weights = sum(weight for _, weight in scored)
+        if not weights:
+            return None
+        return round(sum(score * weight for score, weight in scored) / weights, 1)
+
+    def progress(self) -> str:
+        """Resumen corto del estado para el LLM en cada turno."""
+        if not self.loaded:
+            return "Estado de la entrevista: banco de preguntas aún no cargado."
+        pending = self.pending_evaluations()
+        pending_note = f" Evaluaciones en curso: {pending}." if pending else ""
+        if self.finished:
+            return f"Estado de la entrevista: {len(self.answers)} respuestas registradas, no quedan preguntas.{pending_note}"
+
+        question = self.current_question()
+        if question is None:
+            return f"Estado de la entrevista: {self.total_questions} preguntas cargadas, aún no se ha hecho la primera."
+        return (
+            f"Estado de la entrevista: pregunta {self.asked()}/{self.total_questions} "
+            f"(topic {question['topic']}): \"{question['question']}\". "
+            f"Respuestas registradas: {len(self.answers)}.{pending_note}"
+        )
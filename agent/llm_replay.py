@@ -0,0 +1,348 @@
+# agent/llm_replay.py
+"""
+Grabación y reproducción de las respuestas del LLM.
+
+- ``ReplayLLM`` envuelve el LLM de la sesión (OpenAI). Cada petición se
+  identifica por un hash del request normalizado (mensajes, tool calls y
+  sus resultados, tools disponibles y modelo) y su respuesta en streaming
+  (texto, tool calls, uso de tokens) se guarda en disco con el instante de
+  cada chunk.
+- Al reproducir, los chunks llegan con el tiempo grabado (escalado por
+  ``LLM_REPLAY_SPEED``): mismo time-to-first-token y mismo ritmo de tokens,
+  sin red y sin la variación de ``temperature``.
+- Los UUID del request (candidate_id, ids de evaluación) se sustituyen por
+  marcadores en orden de aparición, en la clave y en la respuesta grabada:
+  una grabación sirve para otra sesión con otros ids y las tool calls
+  reproducidas llevan los ids de la sesión actual.
+
+Modos (``LLM_REPLAY_MODE``): ``off`` (por defecto, sin envolver),
+``record`` (siempre llama al LLM y graba), ``replay`` (solo grabaciones;
+una petición sin grabar es un error) y ``auto`` (reproduce lo grabado y
+graba lo que falte, como una caché de respuestas).
+"""
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit.agents import APIError, llm
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+
+logger = logging.getLogger("sofia-agent")
+
+# "off", "record", "replay" o "auto"
+LLM_REPLAY_MODE = os.getenv("LLM_REPLAY_MODE", "off")
+# Directorio de las grabaciones (un JSON por petición)
+LLM_REPLAY_DIR = os.getenv("LLM_REPLAY_DIR", "cache/llm")
+# Escala del tiempo grabado al reproducir (1 = como se grabó, 0 = sin esperas)
+LLM_REPLAY_SPEED = float(os.getenv("LLM_REPLAY_SPEED", "1.0"))
+
+REPLAY_MODES = ("off", "record", "replay", "auto")
+
+_UUID = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+_PLACEHOLDER = re.compile(r"<id:(\d+)>")
+
+
+# ==========================
+# CLAVE DEL REQUEST
+# ==========================
+
+class IdTemplate:
+    """UUID del request <-> marcadores ``<id:n>`` en orden de aparición."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+
+    def scrub(self, text: str) -> str:
+        def _replace(match: "re.Match[str]") -> str:
+            value = match.group(0).lower()
+            if value not in self.ids:
+                self.ids.append(value)
+            return f"<id:{self.ids.index(value) + 1}>"
+
+        return _UUID.sub(_replace, text)
+
+    def scrub_known(self, text: str) -> str:
+        """Solo los ids que ya aparecieron en el request (los nuevos de la respuesta quedan literales)."""
+        for n, value in enumerate(self.ids, start=1):
+            text = re.sub(re.escape(value), f"<id:{n}>", text, flags=re.IGNORECASE)
+        return text
+
+    def fill(self, text: str) -> str:
+        def _replace(match: "re.Match[str]") -> str:
+            n = int(match.group(1))
+            return self.ids[n - 1] if n <= len(self.ids) else match.group(0)
+
+        return _PLACEHOLDER.sub(_replace, text)
+
+
+def _item_fields(item: Any, template: IdTemplate) -> Dict[str, Any]:
+    # Sin ids de item ni call_id ni timestamps: cambian en cada sesión
+    if item.type == "message":
+        return {"role": item.role, "text": template.scrub(item.text_content or "")}
+    if item.type == "function_call":
+        return {"call": item.name, "arguments": template.scrub(item.arguments)}
+    if item.type == "function_call_output":
+        return {"output": item.name, "result": template.scrub(item.output), "error": item.is_error}
+    return {"type": item.type}
+
+
+def request_keys(
+    chat_ctx: llm.ChatContext,
+    tools: List[Any],
+    model: str,
+    tool_choice: Any = None,
+) -> Tuple[str, str, IdTemplate]:
+    """
+    (clave exacta, clave sin los mensajes de sistema de cada turno, ids).
+
+    La segunda permite reproducir cuando solo cambia el resumen de estado que
+    se añade en cada turno (p. ej. cuántas evaluaciones siguen en curso, que
+    depende de la latencia del webhook).
+    """
+    template = IdTemplate()
+    items = [_item_fields(item, template) for item in chat_ctx.items]
+    tool_names = sorted(str(getattr(tool, "id", tool)) for tool in tools)
+    header = {"model": model, "tools": tool_names, "tool_choice": None if tool_choice is NOT_GIVEN else tool_choice}
+
+    loose = [fields for i, fields in enumerate(items) if i == 0 or fields.get("role") not in ("system", "developer")]
+    exact_key = hashlib.sha256(json.dumps([header, items], ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    loose_key = hashlib.sha256(json.dumps([header, loose], ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    return exact_key, loose_key, template
+
+
+# ==========================
+# GRABACIONES EN DISCO
+# ==========================
+
+class ReplayStore:
+    """
+    Args:
+        directory: Directorio de las grabaciones (``<clave>.json``)
+    """
+
+    def __init__(self, directory: str = LLM_REPLAY_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._loose: Optional[Dict[str, str]] = None
+        self.hits = 0
+        self.loose_hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _loose_index(self) -> Dict[str, str]:
+        if self._loose is None:
+            index = {}
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith(".json"):
+                    record = self._read(name[:-5])
+                    if record and record.get("loose_key"):
+                        index.setdefault(record["loose_key"], record["key"])
+            self._loose = index
+        return self._loose
+
+    def get(self, key: str, loose_key: str) -> Optional[Dict[str, Any]]:
+        record = self._read(key)
+        with self._lock:
+            if record is not None:
+                self.hits += 1
+                return record
+            fallback = self._loose_index().get(loose_key)
+        record = self._read(fallback) if fallback else None
+        with self._lock:
+            if record is not None:
+                self.loose_hits += 1
+            else:
+                self.misses += 1
+        return record
+
+    def put(self, record: Dict[str, Any]) -> None:
+        # Escritura atómica: otra sesión nunca lee una grabación a medias
+        path = self._path(record["key"])
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+        with self._lock:
+            self.recorded += 1
+            if self._loose is not None:
+                self._loose.setdefault(record["loose_key"], record["key"])
+
+    async def aget(self, key: str, loose_key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key, loose_key)
+
+    async def aput(self, record: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.put, record)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "loose_hits": self.loose_hits, "misses": self.misses, "recorded": self.recorded}
+
+
+# ==========================
+# LLM
+# ==========================
+
+class ReplayLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        replay: "ReplayLLM",
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: List[Any],
+        conn_options: APIConnectOptions,
+        parallel_tool_calls: NotGivenOr[bool],
+        tool_choice: NotGivenOr[Any],
+        extra_kwargs: NotGivenOr[Dict[str, Any]],
+    ):
+        super().__init__(replay, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._replay = replay
+        self._parallel_tool_calls = parallel_tool_calls
+        self._tool_choice = tool_choice
+        self._extra_kwargs = extra_kwargs
+
+    async def _run(self) -> None:
+        replay = self._replay
+        key, loose_key, template = request_keys(self._chat_ctx, self._tools, replay.model, self._tool_choice)
+
+        if replay.mode in ("replay", "auto"):
+            record = await replay.store.aget(key, loose_key)
+            if record is not None:
+                await self._play(record, template)
+                return
+            if replay.mode == "replay":
+                last = self._chat_ctx.items[-1] if self._chat_ctx.items else None
+                logger.warning(f"⚠️ No LLM recording for request {key[:12]} (last item: {getattr(last, 'type', None)})")
+                raise APIError(f"no LLM recording for request {key}", retryable=False)
+
+        await self._record(key, loose_key, template)
+
+    async def _play(self, record: Dict[str, Any], template: IdTemplate) -> None:
+        """Reproduce los chunks grabados con su tiempo, con los ids de esta sesión."""
+        replay = self._replay
+        replay.replayed += 1
+        n = replay.replayed
+        start = time.perf_counter()
+        for entry in record["chunks"]:
+            delay = entry["t"] / 1000 * replay.speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            chunk = llm.ChatChunk.model_validate_json(template.fill(entry["chunk"]))
+            if chunk.delta is not None:
+                # call_id únicos en la sesión aunque una grabación se reproduzca dos veces
+                for call in chunk.delta.tool_calls:
+                    call.call_id = f"{call.call_id}_r{n}"
+            self._event_ch.send_nowait(chunk)
+
+    async def _record(self, key: str, loose_key: str, template: IdTemplate) -> None:
+        """Llama al LLM real reenviando cada chunk y lo graba si la respuesta termina entera."""
+        replay = self._replay
+        chunks = []
+        start = time.perf_counter()
+        # Los reintentos los hace este stream, no el del LLM real
+        async with replay.inner.chat(
+            chat_ctx=self._chat_ctx,
+            tools=self._tools,
+            conn_options=dataclasses.replace(self._conn_options, max_retry=0),
+            parallel_tool_calls=self._parallel_tool_calls,
+            tool_choice=self._tool_choice,
+            extra_kwargs=self._extra_kwargs,
+        ) as stream:
+            async for chunk in stream:
+                chunks.append({
+                    "t": round((time.perf_counter() - start) * 1000, 1),
+                    "chunk": template.scrub_known(chunk.model_dump_json(exclude_none=True)),
+                })
+                self._event_ch.send_nowait(chunk)
+
+        # Una respuesta interrumpida no llega aquí (el stream se cancela) y no se graba
+        await replay.store.aput({
+            "key": key,
+            "loose_key": loose_key,
+            "model": replay.model,
+            "recorded_at": time.time(),
+            "chunks": chunks,
+        })
+
+
+class ReplayLLM(llm.LLM):
+    """
+    LLM que graba o reproduce las respuestas de ``inner``.
+
+    Args:
+        inner: LLM real (se llama al grabar, y en ``auto`` si falta la grabación)
+        mode: ``record``, ``replay`` o ``auto``
+        store: Grabaciones en disco
+        speed: Escala del tiempo grabado al reproducir (0 = sin esperas)
+    """
+
+    def __init__(
+        self,
+        inner: llm.LLM,
+        mode: str = "auto",
+        store: Optional[ReplayStore] = None,
+        speed: float = LLM_REPLAY_SPEED,
+    ):
+        super().__init__()
+        if mode not in REPLAY_MODES[1:]:
+            raise ValueError(f"LLM replay mode must be one of {REPLAY_MODES[1:]}, got {mode!r}")
+        self.inner = inner
+        self.mode = mode
+        self.store = store or ReplayStore()
+        self.speed = speed
+        self.replayed = 0
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[List[Any]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[Any] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[Dict[str, Any]] = NOT_GIVEN,
+    ) -> ReplayLLMStream:
+        return ReplayLLMStream(
+            self,
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+            extra_kwargs=extra_kwargs,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def replay_llm(inner: llm.LLM, mode: str = LLM_REPLAY_MODE) -> llm.LLM:
+    """``inner`` tal cual con ``LLM_REPLAY_MODE=off``; si no, envuelto en ``ReplayLLM``."""
+    if mode == "off":
+        return inner
+    logger.info(f"🎞️ LLM replay mode '{mode}' ({LLM_REPLAY_DIR})")
+    return ReplayLLM(inner, mode=mode)
@@ -0,0 +1,356 @@
+# agent/metrics.py
+"""
+Métricas del agente:
+
+- Arranque: tiempo de prewarm del proceso y tiempo hasta el primer saludo.
+- Turnos de voz: spans por etapa (fin de habla, STT final, primer token del
+  LLM, cada tool, primer byte de TTS y publicación al avatar), agregados en
+  histogramas p50/p95/p99 por sesión y por worker, con exportadores
+  enchufables (JSONL o endpoint Prometheus/OpenMetrics).
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("sofia-agent")
+
+# Exportadores separados por comas: "jsonl", "prometheus" o "none"
+METRICS_EXPORTERS = os.getenv("METRICS_EXPORTERS", "jsonl")
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "metrics/turns.jsonl")
+METRICS_PROMETHEUS_PORT = int(os.getenv("METRICS_PROMETHEUS_PORT", "9464"))
+
+# Muestras que conserva cada histograma (las más recientes)
+METRICS_MAX_SAMPLES = int(os.getenv("METRICS_MAX_SAMPLES", "10000"))
+
+try:
+    import prometheus_client  # noqa: F401
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+class StartupTimer:
+    """
+    Marca hitos del arranque de un job (en ms desde el inicio del entrypoint)
+    para medir el tiempo hasta el primer saludo.
+    """
+
+    def __init__(self, prewarmed: bool = False):
+        self._start = time.perf_counter()
+        self.prewarmed = prewarmed
+        self.marks: Dict[str, float] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def mark(self, name: str) -> float:
+        """Registra un hito si aún no se había registrado y devuelve su tiempo."""
+        if name not in self.marks:
+            self.marks[name] = self.elapsed_ms()
+        return self.marks[name]
+
+    @property
+    def time_to_first_greeting(self) -> Optional[float]:
+        return self.marks.get("first_greeting")
+
+    def report(self) -> str:
+        steps = ", ".join(f"{name}={ms:.0f}ms" for name, ms in self.marks.items())
+        return f"prewarmed={self.prewarmed} {steps}"
+
+
+def watch_first_greeting(session, timer: StartupTimer) -> None:
+    """
+    Registra el hito ``first_greeting`` cuando el agente empieza a hablar por
+    primera vez en la sesión.
+    """
+
+    def _on_state_changed(ev):
+        if ev.new_state != "speaking" or "first_greeting" in timer.marks:
+            return
+
+        ms = timer.mark("first_greeting")
+        logger.info(f"⏱️ Time to first greeting: {ms:.0f} ms ({timer.report()})")
+
+    session.on("agent_state_changed", _on_state_changed)
+
+
+
+# ==========================
+# SPANS POR TURNO
+# ==========================
+
+# Etapas de un turno de voz (ms)
+STAGE_EOU = "eou"                        # Fin de habla detectado -> turno del usuario cerrado
+STAGE_STT_FINAL = "stt_final"            # Fin de habla -> transcripción final
+STAGE_LLM_TTFT = "llm_ttft"              # Petición al LLM -> primer token
+STAGE_TTS_TTFB = "tts_ttfb"              # Petición a TTS -> primer byte de audio
+STAGE_AVATAR_PUBLISH = "avatar_publish"  # Fin de habla -> audio publicado al avatar
+STAGE_TOOL_PREFIX = "tool."              # tool.<nombre>: duración de cada llamada
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class LatencyHistogram:
+    """Muestras recientes de una etapa con sus percentiles."""
+
+    def __init__(self, max_samples: int = METRICS_MAX_SAMPLES):
+        self.count = 0
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, ms: float) -> None:
+        self.count += 1
+        self._samples.append(ms)
+
+    def summary(self) -> Dict[str, float]:
+        samples = list(self._samples)
+        return {
+            "count": self.count,
+            "p50": round(percentile(samples, 50), 1),
+            "p95": round(percentile(samples, 95), 1),
+            "p99": round(percentile(samples, 99), 1),
+            "max": round(max(samples), 1) if samples else 0.0,
+        }
+
+
+class LatencyRegistry:
+    """Histogramas por etapa."""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, stage: str, ms: float) -> None:
+        if stage not in self.histograms:
+            self.histograms[stage] = LatencyHistogram()
+        self.histograms[stage].observe(ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: hist.summary() for stage, hist in sorted(self.histograms.items())}
+
+
+# Agregado de todas las sesiones del proceso worker
+worker_latency = LatencyRegistry()
+
+
+class JsonlExporter:
+    """Escribe cada span y el resumen de cada sesión como una línea JSON."""
+
+    def __init__(self, path: str = METRICS_JSONL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrometheusExporter:
+    """
+    Histograma ``sofia_turn_stage_seconds{stage=...}`` servido en
+    ``/metrics`` (texto Prometheus/OpenMetrics). El servidor HTTP se abre una
+    vez por proceso; si el puerto está ocupado por otro proceso del worker,
+    solo se registra un aviso.
+    """
+
+    _histogram = None
+    _server_started = False
+
+    def __init__(self, port: int = METRICS_PROMETHEUS_PORT):
+        if not PROMETHEUS_AVAILABLE:
+            raise RuntimeError("prometheus_client no está instalado")
+
+        from prometheus_client import Histogram, start_http_server
+
+        cls = PrometheusExporter
+        if cls._histogram is None:
+            cls._histogram = Histogram(
+                "sofia_turn_stage_seconds",
+                "Latencia por etapa de un turno de voz",
+                ["stage"],
+                buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+            )
+        if not cls._server_started:
+            try:
+                start_http_server(port)
+                cls._server_started = True
+                logger.info(f"📈 Prometheus metrics on :{port}/metrics")
+            except OSError as e:
+                logger.warning(f"⚠️ Prometheus endpoint not started on :{port}: {e}")
+
+    def export(self, record: Dict[str, Any]) -> None:
+        if record.get("type") == "span":
+            self._histogram.labels(stage=record["stage"]).observe(record["ms"] / 1000)
+
+    def close(self) -> None:
+        pass
+
+
+def build_exporters(names: str = METRICS_EXPORTERS) -> List[Any]:
+    """Crea los exportadores configurados; los que fallen se omiten con un aviso."""
+    exporters = []
+    for name in (n.strip().lower() for n in names.split(",")):
+        try:
+            if name == "jsonl":
+                exporters.append(JsonlExporter())
+            elif name == "prometheus":
+                exporters.append(PrometheusExporter())
+            elif name and name != "none":
+                logger.warning(f"⚠️ Unknown metrics exporter: {name}")
+        except Exception as e:
+            logger.warning(f"⚠️ Metrics exporter '{name}' disabled: {e}")
+    return exporters
+
+
+class SessionMetrics:
+    """
+    Spans de latencia de una sesión (entrevista). Cada muestra se agrega al
+    histograma de la sesión y al del worker y se envía a los exportadores.
+    """
+
+    def __init__(self, session_id: str, exporters: Optional[List[Any]] = None):
+        self.session_id = session_id
+        self.exporters = exporters if exporters is not None else []
+        self.latency = LatencyRegistry()
+        self.current_speech_id: Optional[str] = None
+        self._user_stopped_at: Optional[float] = None
+
+    def record(self, stage: str, ms: float, speech_id: Optional[str] = None, **attrs: Any) -> None:
+        self.latency.observe(stage, ms)
+        worker_latency.observe(stage, ms)
+        self._export({
+            "type": "span",
+            "ts": time.time(),
+            "session_id": self.session_id,
+            "speech_id": speech_id or self.current_speech_id,
+            "stage": stage,
+            "ms": round(ms, 1),
+            **attrs,
+        })
+
+    def _export(self, record: Dict[str, Any]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics export failed: {e}")
+
+    def on_chat_item(self, item: Any) -> None:
+        """
+        Convierte las métricas por turno de un ``ChatMessage`` de livekit
+        (``item.metrics``) en spans: EOU y STT del mensaje del usuario, que
+        abre el turno; primer token del LLM y primer byte de TTS de la
+        respuesta. Las que faltan en el mensaje no se registran.
+        """
+        metrics = getattr(item, "metrics", None) or {}
+        role = getattr(item, "role", None)
+
+        if role == "user":
+            self.current_speech_id = item.id
+            if "end_of_turn_delay" in metrics:
+                self.record(STAGE_EOU, metrics["end_of_turn_delay"] * 1000)
+            if "transcription_delay" in metrics:
+                self.record(STAGE_STT_FINAL, metrics["transcription_delay"] * 1000)
+        elif role == "assistant" and not getattr(item, "interrupted", False):
+            if "llm_node_ttft" in metrics:
+                self.record(STAGE_LLM_TTFT, metrics["llm_node_ttft"] * 1000, tps=metrics.get("llm_node_tps"))
+            if "tts_node_ttfb" in metrics:
+                self.record(STAGE_TTS_TTFB, metrics["tts_node_ttfb"] * 1000)
+
+    def on_user_state(self, new_state: str) -> None:
+        if new_state == "listening":
+            self._user_stopped_at = time.perf_counter()
+        elif new_state == "speaking":
+            self._user_stopped_at = None
+
+    def on_agent_state(self, new_state: str) -> None:
+        # El audio de TTS se enruta al avatar: "speaking" = primer audio publicado
+        if new_state == "speaking" and self._user_stopped_at is not None:
+            self.record(STAGE_AVATAR_PUBLISH, (time.perf_counter() - self._user_stopped_at) * 1000)
+            self._user_stopped_at = None
+
+    def close(self) -> Dict[str, Dict[str, float]]:
+        summary = self.latency.summary()
+        self._export({
+            "type": "session_summary",
+            "ts": time.time(),
+            "session_id": self.session_id,
+            "stages": summary,
+            "worker": worker_latency.summary(),
+        })
+        for exporter in self.exporters:
+            try:
+                exporter.close()
+            except Exception:
+                pass
+
+        for stage, stats in summary.items():
+            logger.info(f"⏱️ {stage}: p50={stats['p50']:.0f}ms p95={stats['p95']:.0f}ms p99={stats['p99']:.0f}ms (n={stats['count']})")
+        return summary
+
+
+# Sesión del job en curso: las tools registran aquí su duración
+current_session_metrics: contextvars.ContextVar[Optional[SessionMetrics]] = contextvars.ContextVar(
+    "current_session_metrics", default=None
+)
+
+
+def watch_turn_latency(session, session_metrics: SessionMetrics) -> None:
+    """
+    Suscribe ``session_metrics`` a los eventos de la sesión de livekit. Las
+    latencias de cada turno llegan en los mensajes del chat
+    (``conversation_item_added``), no en ``metrics_collected`` (obsoleto).
+    """
+    current_session_metrics.set(session_metrics)
+
+    session.on("conversation_item_added", lambda ev: session_metrics.on_chat_item(ev.item))
+    session.on("user_state_changed", lambda ev: session_metrics.on_user_state(ev.new_state))
+    session.on("agent_state_changed", lambda ev: session_metrics.on_agent_state(ev.new_state))
+
+
+def timed_tool(name: str):
+    """
+    Decorador para tools: mide cada llamada como span ``tool.<name>``.
+    Se aplica debajo de ``@function_tool`` para conservar firma y docstring.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            ok = True
+            try:
+                result = await fn(*args, **kwargs)
+                if isinstance(result, dict) and result.get("success") is False:
+                    ok = False
+                return result
+            except Exception:
+                ok = False
+                raise
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                session_metrics = current_session_metrics.get()
+                if session_metrics is not None:
+                    session_metrics.record(STAGE_TOOL_PREFIX + name, ms, ok=ok)
+                else:
+                    worker_latency.observe(STAGE_TOOL_PREFIX + name, ms)
+
+        return wrapper
+
+    return decorator
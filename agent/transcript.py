@@ -0,0 +1,56 @@
+# agent/transcript.py
+"""
+Grabación de transcripciones de la sesión (mensajes, llamadas a tools y sus
+resultados) en JSONL, un item del contexto de livekit por línea, en el
+formato de ``ChatContext.to_dict``. Sirven para reproducir entrevistas
+reales en ``benchmarks/bench_context_replay.py``.
+"""
+import json
+import os
+from typing import Any, List
+
+from livekit.agents import llm
+
+# Directorio de las transcripciones; vacío = no se graban
+TRANSCRIPTS_DIR = os.getenv("TRANSCRIPTS_DIR", "")
+
+
+class TranscriptRecorder:
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def write(self, item: Any) -> None:
+        self._file.write(json.dumps(item.model_dump(mode="json", exclude_none=True), ensure_ascii=False) + "\n")
+
+    def on_item_added(self, item: Any) -> None:
+        self.write(item)
+
+    def on_tools_executed(self, calls: List[Any], outputs: List[Any]) -> None:
+        for item in [*calls, *outputs]:
+            if item is not None:
+                self.write(item)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def record_transcript(session, path: str) -> TranscriptRecorder:
+    """Suscribe un ``TranscriptRecorder`` a los eventos de la sesión de livekit."""
+    recorder = TranscriptRecorder(path)
+    session.on("conversation_item_added", lambda ev: recorder.on_item_added(ev.item))
+    session.on(
+        "function_tools_executed",
+        lambda ev: recorder.on_tools_executed(ev.function_calls, ev.function_call_outputs),
+    )
+    return recorder
+
+
+def load_transcript(path: str) -> List[Any]:
+    """Items de una transcripción grabada, en orden."""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return llm.ChatContext.from_dict({"items": rows}).items
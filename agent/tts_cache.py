@@ -0,0 +1,399 @@
+# agent/tts_cache.py
+"""
+Audio de Sofía por frases, con caché en disco.
+
+- ``AudioCache``: caché de audio direccionada por contenido (hash de texto
+  + voz + modelo + sample rate) en disco, un WAV por frase, con expulsión
+  LRU por tamaño total. La comparten todas las sesiones y procesos del
+  worker que usen el mismo directorio.
+- ``CachedTTS``: envuelve el TTS (ElevenLabs) y sintetiza la respuesta del
+  LLM frase a frase: cada frase empieza a sintetizarse en cuanto está
+  completa, unas pocas por delante de la que suena, y las que ya están en
+  caché (saludo, transiciones, preguntas del banco) suenan sin llamar a
+  la API.
+- ``presynthesize``: al cargar el banco de preguntas se sintetizan en
+  segundo plano las frases fijas y las preguntas que falten en la caché.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import wave
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from livekit.agents import tokenize, tts, utils
+from livekit.agents.tts.stream_adapter import DEFAULT_STREAM_ADAPTER_API_CONNECT_OPTIONS
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+from agent.interview_state import InterviewState
+from prompts.sofia_prompt import GREETING, READY_QUESTION, TOPIC_TRANSITION
+
+logger = logging.getLogger("sofia-agent")
+
+# Directorio de la caché de audio; vacío = sin caché (síntesis por frases igualmente)
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "200"))
+# Frases que se sintetizan por delante de la que está sonando
+TTS_PIPELINE_DEPTH = int(os.getenv("TTS_PIPELINE_DEPTH", "2"))
+# Síntesis simultáneas al precargar el banco de preguntas
+TTS_PRESYNTH_CONCURRENCY = int(os.getenv("TTS_PRESYNTH_CONCURRENCY", "2"))
+
+# Mismo tokenizer que usa livekit (StreamAdapter) para partir el texto del LLM
+_sentence_tokenizer = tokenize.blingfire.SentenceTokenizer(retain_format=True)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Frases de ``text`` tal como las cortará la síntesis en vivo."""
+    return [s for s in (normalize_text(t) for t in _sentence_tokenizer.tokenize(text)) if s]
+
+
+def audio_key(text: str, voice_id: str, model: str, sample_rate: int) -> str:
+    raw = f"{model}\n{voice_id}\n{sample_rate}\n{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Args:
+        directory: Directorio de los WAV (uno por frase, ``<clave>.wav``)
+        max_bytes: Tamaño total máximo; al superarlo se borran los menos usados
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MAX_MB * 2 ** 20)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Índice LRU reconstruido del disco: el mtime es el último uso
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".wav"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        self._index: "OrderedDict[str, int]" = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._bytes = sum(self._index.values())
+        # get/put corren en hilos (to_thread), de varios jobs con jobs en hilos
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """PCM 16 bits de la frase, o None si no está (o la borró otro proceso)."""
+        if key not in self._index:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            with wave.open(self._path(key), "rb") as wav:
+                pcm = wav.readframes(wav.getnframes())
+            os.utime(self._path(key))
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            self.hits += 1
+        return pcm
+
+    def put(self, key: str, pcm: bytes, sample_rate: int, num_channels: int) -> None:
+        # Escritura atómica: otro proceso nunca lee un WAV a medias
+        tmp = f"{self._path(key)}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with wave.open(tmp, "wb") as wav:
+            wav.setnchannels(num_channels)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+        os.replace(tmp, self._path(key))
+        size = os.path.getsize(self._path(key))
+
+        evicted = []
+        with self._lock:
+            self._forget(key)
+            self._index[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._forget(oldest)
+                self.evictions += 1
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
+
+    def _forget(self, key: str) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, pcm: bytes, sample_rate: int, num_channels: int) -> None:
+        await asyncio.to_thread(self.put, key, pcm, sample_rate, num_channels)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._index),
+            "mb": round(self._bytes / 2 ** 20, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_audio_cache: Optional[AudioCache] = None
+
+
+def get_audio_cache() -> Optional[AudioCache]:
+    """Caché de audio del proceso (None si ``TTS_CACHE_DIR`` está vacío)."""
+    global _audio_cache
+    if _audio_cache is None and TTS_CACHE_DIR:
+        _audio_cache = AudioCache()
+    return _audio_cache
+
+
+def set_audio_cache(cache: Optional[AudioCache]) -> None:
+    """Reemplaza la caché del proceso (pruebas, benchmarks)."""
+    global _audio_cache
+    _audio_cache = cache
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        cached: CachedTTS = self._tts
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=cached.sample_rate,
+            num_channels=cached.num_channels,
+            mime_type="audio/pcm",
+        )
+        async for chunk in cached.audio(self._input_text, self._conn_options):
+            output_emitter.push(chunk)
+        output_emitter.flush()
+
+
+class PipelinedSynthesizeStream(tts.SynthesizeStream):
+    """
+    Síntesis por frases con adelanto: mientras suena una frase, las
+    siguientes (hasta ``pipeline_depth``) ya se están sintetizando.
+    """
+
+    def __init__(self, *, tts: "CachedTTS", conn_options: APIConnectOptions):
+        # Los reintentos los hace cada síntesis de frase, no el stream completo
+        super().__init__(tts=tts, conn_options=DEFAULT_STREAM_ADAPTER_API_CONNECT_OPTIONS)
+        self._cached: CachedTTS = tts
+        self._sentence_conn_options = conn_options
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        from livekit.agents.voice.io import TimedString
+
+        cached = self._cached
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=cached.sample_rate,
+            num_channels=cached.num_channels,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=utils.shortuuid())
+
+        sent_stream = _sentence_tokenizer.stream()
+        sentences: asyncio.Queue = asyncio.Queue(maxsize=max(1, cached.pipeline_depth))
+        synth_tasks: Set[asyncio.Task] = set()
+
+        async def _forward_input() -> None:
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sent_stream.flush()
+                    continue
+                sent_stream.push_text(data)
+            sent_stream.end_input()
+
+        async def _synthesize(text: str, chunks: asyncio.Queue) -> None:
+            try:
+                async for chunk in cached.audio(text, self._sentence_conn_options):
+                    chunks.put_nowait(chunk)
+            finally:
+                chunks.put_nowait(None)
+
+        async def _prefetch() -> None:
+            async for ev in sent_stream:
+                if not ev.token.strip():
+                    continue
+                chunks: asyncio.Queue = asyncio.Queue()
+                task = asyncio.create_task(_synthesize(ev.token.strip(), chunks))
+                synth_tasks.add(task)
+                task.add_done_callback(synth_tasks.discard)
+                await sentences.put((ev.token, chunks, task))
+            await sentences.put(None)
+
+        async def _emit() -> None:
+            duration = 0.0
+            bytes_per_second = 2 * cached.num_channels * cached.sample_rate
+            while (item := await sentences.get()) is not None:
+                token, chunks, task = item
+                output_emitter.push_timed_transcript(TimedString(text=token, start_time=duration))
+                self._mark_started()
+                while (chunk := await chunks.get()) is not None:
+                    output_emitter.push(chunk)
+                    duration += len(chunk) / bytes_per_second
+                await task  # errores de la síntesis de la frase
+                output_emitter.flush()
+
+        tasks = [
+            asyncio.create_task(_forward_input()),
+            asyncio.create_task(_prefetch()),
+            asyncio.create_task(_emit()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await sent_stream.aclose()
+            await utils.aio.cancel_and_wait(*tasks, *synth_tasks)
+
+
+class CachedTTS(tts.TTS):
+    """
+    Args:
+        inner: TTS real (``elevenlabs.TTS``); se usa con ``synthesize`` por frase
+        voice_id: Voz de ``inner``; forma parte de la clave de la caché
+        cache: Caché de audio (None = solo síntesis por frases)
+        pipeline_depth: Frases sintetizadas por delante de la que suena
+    """
+
+    def __init__(
+        self,
+        inner: tts.TTS,
+        voice_id: str,
+        cache: Optional[AudioCache] = None,
+        pipeline_depth: int = TTS_PIPELINE_DEPTH,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True, aligned_transcript=True),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self.inner = inner
+        self.voice_id = voice_id
+        self.cache = cache
+        self.pipeline_depth = pipeline_depth
+        self.synthesized_chars = 0
+        self.inner.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+
+    def key(self, text: str) -> str:
+        return audio_key(text, self.voice_id, self.model, self.sample_rate)
+
+    async def audio(self, text: str, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> AsyncIterator[bytes]:
+        """PCM de una frase: de la caché si está; si no, de ``inner`` a medida que llega (y se guarda)."""
+        key = self.key(text)
+        if self.cache is not None:
+            pcm = await self.cache.aget(key)
+            if pcm is not None:
+                yield pcm
+                return
+
+        self.synthesized_chars += len(text)
+        audio = bytearray()
+        async with self.inner.synthesize(text, conn_options=conn_options) as stream:
+            async for ev in stream:
+                chunk = ev.frame.data.tobytes()
+                audio += chunk
+                yield chunk
+
+        if self.cache is not None and audio:
+            await self.cache.aput(key, bytes(audio), self.sample_rate, self.num_channels)
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> CachedChunkedStream:
+        return CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> PipelinedSynthesizeStream:
+        return PipelinedSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.inner.prewarm()
+
+    def _on_metrics_collected(self, *args, **kwargs) -> None:
+        self.emit("metrics_collected", *args, **kwargs)
+
+    async def aclose(self) -> None:
+        self.inner.off("metrics_collected", self._on_metrics_collected)
+
+    async def presynthesize(self, texts: Iterable[str], concurrency: int = TTS_PRESYNTH_CONCURRENCY) -> Dict[str, int]:
+        """Sintetiza y guarda las frases de ``texts`` que no están en la caché."""
+        if self.cache is None:
+            return {"sentences": 0, "synthesized": 0, "failed": 0}
+
+        sentences = list(dict.fromkeys(s for text in texts for s in split_sentences(text)))
+        missing = [s for s in sentences if self.key(s) not in self.cache]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        failed = 0
+
+        async def one(sentence: str) -> None:
+            nonlocal failed
+            async with semaphore:
+                if self.key(sentence) in self.cache:  # otra sesión la sintetizó mientras tanto
+                    return
+                try:
+                    async for _ in self.audio(sentence):
+                        pass
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"⚠️ TTS pre-synthesis failed for {sentence[:40]!r}: {e}")
+
+        await asyncio.gather(*(one(s) for s in missing))
+        return {"sentences": len(sentences), "synthesized": len(missing) - failed, "failed": failed}
+
+
+def interview_utterances(state: InterviewState) -> List[str]:
+    """Lo que Sofía dice igual en todas las entrevistas: saludo, transiciones y preguntas del banco."""
+    texts = [f"{GREETING} {READY_QUESTION}"]
+    texts += [TOPIC_TRANSITION.format(topic=topic) for topic in state.topics]
+    texts += [question["question"] for topic in state.topics for question in state.questions[topic]]
+    return texts
+
+
+async def presynthesize_utterances(tts_: tts.TTS, state: InterviewState) -> None:
+    """Precarga en segundo plano el audio fijo de la entrevista (no hace nada sin caché)."""
+    if not isinstance(tts_, CachedTTS) or tts_.cache is None:
+        return
+    started = time.perf_counter()
+    result = await tts_.presynthesize(interview_utterances(state))
+    logger.info(
+        f"🔊 TTS cache warm: {result['synthesized']} of {result['sentences']} sentences synthesized "
+        f"in {time.perf_counter() - started:.1f}s ({result['failed']} failed)"
+    )
+
+
+def cached_tts(inner: tts.TTS, voice_id: str) -> tts.TTS:
+    """``CachedTTS`` sobre ``inner`` con la caché del proceso."""
+    return CachedTTS(inner, voice_id=voice_id, cache=get_audio_cache())
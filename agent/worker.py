@@ -0,0 +1,282 @@
+# agent/worker.py
+"""
+Worker con varias entrevistas por proceso y aceptación de jobs según carga.
+
+- Ejecutor (``WORKER_EXECUTOR``): ``thread`` (por defecto) corre cada
+  entrevista en un hilo del proceso del worker con su propio event loop;
+  ``process`` usa un proceso por entrevista (más aislamiento, pero un
+  prewarm completo y un modelo VAD por job).
+- Recursos compartidos por los jobs del proceso: el modelo Silero VAD, el
+  tokenizer de ``ContextPolicy``, la caché del banco de preguntas, la caché
+  de audio del TTS y el circuit breaker del webhook. Los clientes
+  asíncronos (httpx, Supabase, colas) son de cada job
+  (``tools/job_local.py``) y se cierran al terminar.
+- Carga (``WorkerLoad``): el máximo entre sesiones activas /
+  ``WORKER_MAX_SESSIONS``, CPU / ``WORKER_MAX_CPU`` y lag de los event
+  loops de los jobs / ``WORKER_MAX_LOOP_LAG_MS``. Con la carga en
+  ``WORKER_LOAD_THRESHOLD`` LiveKit deja de asignarle jobs al worker.
+- Drenado: con SIGTERM (p. ej. un despliegue) el worker deja de aceptar
+  jobs y espera hasta ``WORKER_DRAIN_TIMEOUT`` a que terminen las
+  entrevistas en curso; cada job tiene ``WORKER_SHUTDOWN_TIMEOUT`` para
+  vaciar sus evaluaciones y escrituras pendientes.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from tools.evaluation_queue import peek_evaluation_queue, set_evaluation_queue
+from tools.http_client import close_http_client
+from tools.repository import peek_repository, set_repository
+from tools.search_knowledge import peek_knowledge_searcher, set_knowledge_searcher
+from tools.write_behind import peek_write_behind, set_write_behind
+
+logger = logging.getLogger("sofia-agent")
+
+# "thread": varias entrevistas por proceso; "process": un proceso por entrevista
+WORKER_EXECUTOR = os.getenv("WORKER_EXECUTOR", "thread")
+# Límites de carga: sesiones simultáneas, fracción de CPU, lag de los event loops (ms)
+WORKER_MAX_SESSIONS = int(os.getenv("WORKER_MAX_SESSIONS", "8"))
+WORKER_MAX_CPU = float(os.getenv("WORKER_MAX_CPU", "0.8"))
+WORKER_MAX_LOOP_LAG_MS = float(os.getenv("WORKER_MAX_LOOP_LAG_MS", "100"))
+# Carga a partir de la cual el worker no acepta más jobs (1.0 = algún límite alcanzado)
+WORKER_LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", "1.0"))
+# Espera máxima por las entrevistas en curso al apagar el worker (s)
+WORKER_DRAIN_TIMEOUT = int(os.getenv("WORKER_DRAIN_TIMEOUT", "1800"))
+# Tiempo de cada job para sus shutdown callbacks (evaluaciones, write-behind) (s)
+WORKER_SHUTDOWN_TIMEOUT = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "30"))
+
+# Muestreo del lag de cada event loop de job y ventana que cuenta para la carga (s)
+LAG_INTERVAL = 0.1
+LAG_WINDOW = 5.0
+# Percentil del lag en la ventana (el máximo se dispara con cualquier pausa del GC)
+LAG_PERCENTILE = 0.95
+# Muestras de CPU promediadas (una cada CPU_INTERVAL s)
+CPU_INTERVAL = 0.5
+CPU_SAMPLES = 5
+
+
+def jobs_in_threads() -> bool:
+    """True si los jobs corren en hilos del proceso principal (por configuración, consola o Windows)."""
+    return WORKER_EXECUTOR == "thread" or sys.platform == "win32" or sys.argv[1:2] == ["console"]
+
+
+# ==========================
+# LAG DE LOS EVENT LOOPS
+# ==========================
+
+class LoopLagProbe:
+    """
+    Mide el retraso del event loop de un job: un sleep corto en bucle y el
+    exceso sobre lo esperado. Con jobs en hilos todos compiten por el mismo
+    GIL, y el lag es lo primero que sube cuando el proceso se satura.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL, window: float = LAG_WINDOW):
+        self.interval = interval
+        self.window = window
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - start - self.interval) * 1000
+            now = time.monotonic()
+            self._samples.append((now, lag_ms))
+            while self._samples[0][0] < now - self.window:
+                self._samples.popleft()
+
+    def lag_ms(self) -> float:
+        """Percentil ``LAG_PERCENTILE`` del lag en la última ventana (ms)."""
+        horizon = time.monotonic() - self.window
+        # El deque lo llena el loop del job; se lee (copia) desde el hilo de load_fnc
+        samples = sorted(lag for at, lag in list(self._samples) if at >= horizon)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * LAG_PERCENTILE))]
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        _probes.add(self)
+
+    async def stop(self) -> None:
+        _probes.discard(self)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Sondas de los jobs de este proceso (con procesos de job, el principal no tiene ninguna)
+_probes: Set[LoopLagProbe] = set()
+
+
+def loop_lag_ms() -> float:
+    """Peor lag entre los event loops de los jobs del proceso (ms)."""
+    return max((probe.lag_ms() for probe in list(_probes)), default=0.0)
+
+
+# ==========================
+# CARGA
+# ==========================
+
+class CpuSampler:
+    """
+    CPU promediada en segundo plano: la del sistema (o cgroup) y la de este
+    proceso en núcleos. Con jobs en hilos el GIL limita el proceso a un
+    núcleo para el código Python, aunque la máquina esté libre.
+    """
+
+    def __init__(self, interval: float = CPU_INTERVAL, samples: int = CPU_SAMPLES):
+        import psutil
+        from livekit.agents.utils.hw import get_cpu_monitor
+
+        self.interval = interval
+        self._monitor = get_cpu_monitor()
+        self._process = psutil.Process()
+        self._system: Deque[float] = deque(maxlen=samples)
+        self._own: Deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sofia_cpu_sampler")
+        self._thread.start()
+
+    def _run(self) -> None:
+        self._process.cpu_percent(None)
+        while True:
+            system = self._monitor.cpu_percent(interval=self.interval)
+            own = self._process.cpu_percent(None) / 100
+            with self._lock:
+                self._system.append(system)
+                self._own.append(own)
+
+    def values(self) -> Tuple[float, float]:
+        """(fracción de CPU del sistema, núcleos usados por este proceso)."""
+        with self._lock:
+            if not self._system:
+                return 0.0, 0.0
+            return sum(self._system) / len(self._system), sum(self._own) / len(self._own)
+
+
+class WorkerLoad:
+    """
+    ``load_fnc`` del worker: carga entre 0 y 1 como el máximo de las
+    fracciones de sus límites (sesiones, CPU, lag). LiveKit la consulta
+    cada 0.5 s y antes de responder a cada job.
+
+    Args:
+        max_sessions: Sesiones simultáneas por worker
+        max_cpu: Fracción de CPU (del sistema; con hilos, también de un núcleo del proceso)
+        max_lag_ms: Lag del event loop de los jobs a partir del cual el worker está lleno
+        threshold: Carga a partir de la cual no acepta jobs (solo para el log; la aplica LiveKit)
+        threads: Los jobs corren en hilos de este proceso
+        cpu: Muestreador de CPU (por defecto uno propio en segundo plano)
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = WORKER_MAX_SESSIONS,
+        max_cpu: float = WORKER_MAX_CPU,
+        max_lag_ms: float = WORKER_MAX_LOOP_LAG_MS,
+        threshold: float = WORKER_LOAD_THRESHOLD,
+        threads: Optional[bool] = None,
+        cpu: Optional[CpuSampler] = None,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.max_cpu = max_cpu
+        self.max_lag_ms = max_lag_ms
+        self.threshold = threshold
+        self.threads = jobs_in_threads() if threads is None else threads
+        self._cpu = cpu
+        self.last: Dict[str, float] = {}
+        self._full = False
+
+    def load(self, sessions: int) -> float:
+        if self._cpu is None:
+            self._cpu = CpuSampler()
+        system, own = self._cpu.values()
+        cpu = max(system, min(1.0, own)) if self.threads else system
+        lag_ms = loop_lag_ms()
+        parts = {
+            "sessions": sessions / self.max_sessions,
+            "cpu": cpu / self.max_cpu,
+            "lag": lag_ms / self.max_lag_ms,
+        }
+        self.last = parts
+        load = round(min(1.0, max(parts.values())), 3)
+
+        full = load >= self.threshold
+        if full != self._full:
+            self._full = full
+            if full:
+                reason = max(parts, key=parts.get)
+                logger.warning(f"🚦 Worker full ({reason}): {sessions} sessions, CPU {cpu:.0%}, "
+                               f"loop lag {lag_ms:.0f} ms; not accepting interviews")
+            else:
+                logger.info(f"🟢 Worker accepting interviews again ({sessions} sessions)")
+        return load
+
+    def __call__(self, server: Any) -> float:
+        return self.load(len(server.active_jobs))
+
+
+def worker_options() -> Dict[str, Any]:
+    """Argumentos de ``WorkerOptions``: ejecutor, carga, límites y drenado."""
+    from livekit.agents import JobExecutorType
+
+    return {
+        "job_executor_type": JobExecutorType.THREAD if jobs_in_threads() else JobExecutorType.PROCESS,
+        "load_fnc": WorkerLoad(),
+        "load_threshold": WORKER_LOAD_THRESHOLD,
+        "drain_timeout": WORKER_DRAIN_TIMEOUT,
+        "shutdown_process_timeout": WORKER_SHUTDOWN_TIMEOUT,
+    }
+
+
+# ==========================
+# CICLO DE VIDA DEL JOB
+# ==========================
+
+def watch_loop_lag(ctx) -> LoopLagProbe:
+    """Mide el lag del event loop del job para ``WorkerLoad`` mientras dure."""
+    probe = LoopLagProbe()
+    probe.start()
+    ctx.add_shutdown_callback(probe.stop)
+    return probe
+
+
+async def close_job_resources() -> None:
+    """
+    Cierra los clientes del job (``tools/job_local.py``). Con jobs en hilos
+    el proceso sigue vivo: sin esto quedarían atados a un loop cerrado.
+    Va después de los callbacks que vacían evaluaciones y escrituras.
+    """
+    queue = peek_evaluation_queue()
+    if queue is not None:
+        # Lo que no terminó queda en el spool: lo recupera el siguiente job
+        await queue.aclose()
+        set_evaluation_queue(None)
+
+    store = peek_write_behind()
+    if store is not None:
+        await store.aclose()
+        set_write_behind(None)
+
+    repository = peek_repository()
+    if repository is not None:
+        await repository.aclose()
+        set_repository(None)
+
+    searcher = peek_knowledge_searcher()
+    if searcher is not None:
+        # Qdrant y OpenAI asíncronos, atados al loop del job
+        await searcher.aclose()
+        set_knowledge_searcher(None)
+
+    await close_http_client()
@@ -0,0 +1,151 @@
+# benchmarks/bench_background_evaluation.py
+"""
+Latencia de record_answer con la evaluación en línea (sync) y en segundo
+plano (background) contra un webhook local lento que falla una de cada
+``fail_every`` peticiones.
+
+ANTES: cada turno espera al webhook (y a sus fallos).
+DESPUÉS: el turno solo encola; se comprueba además que, tras drenar la
+cola, todas las respuestas tienen su puntaje y el spool no deja trabajos
+pendientes, y que los trabajos de un proceso caído se recuperan y se
+guardan en la tabla de evaluaciones con el candidato de su sesión.
+
+Uso:
+    python -m benchmarks.bench_background_evaluation [sesiones] [respuestas] [latencia_ms] [fail_every]
+"""
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from benchmarks.common import Stopwatch, StubServer, json_response, summarize
+from benchmarks.stubs import PostgrestStub, sample_question_rows
+
+
+def make_webhook(latency_ms: float, fail_every: int):
+    counter = itertools.count(1)
+
+    def handler(method, path, body):
+        time.sleep(latency_ms / 1000)
+        if fail_every and next(counter) % fail_every == 0:
+            return json_response({"error": "overloaded"}, status=503)
+        return json_response({"message": "Buena respuesta", "score": 80})
+    return handler
+
+
+class FakeRunContext:
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+async def run_sessions(sessions: int, answers: int):
+    from agent.interview_state import InterviewState
+    from tools.get_evaluation_criteria import build_question_bank
+    from tools.interview_flow import next_question, record_answer
+
+    bank = build_question_bank(sample_question_rows())
+    latencies, states = [], []
+
+    async def session(i: int):
+        state = InterviewState(session_id=f"session-{i}")
+        state.load(bank)
+        states.append(state)
+        context = FakeRunContext(state)
+        await next_question(context)
+        for j in range(answers):
+            watch = Stopwatch()
+            await record_answer(context, f"respuesta {i}-{j}")
+            latencies.append(watch.elapsed_ms())
+
+    watch = Stopwatch()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return watch.elapsed_ms(), latencies, states
+
+
+def print_report(name: str, total_ms: float, latencies, states):
+    lat = summarize(latencies)
+    records = [record for state in states for record in state.answers]
+    statuses = {status: sum(1 for r in records if r.status == status) for status in ("evaluated", "pending", "failed")}
+    scored = sum(1 for r in records if r.score is not None)
+    print(f"\n[{name}]")
+    print(f"  turnos:       {total_ms:.0f} ms en total")
+    print(f"  record_answer p50: {lat['p50']:.1f} ms  p95: {lat['p95']:.1f} ms  max: {lat['max']:.1f} ms")
+    print(f"  respuestas:   {len(records)}  con puntaje: {scored}  estados: {statuses}")
+
+
+async def main(sessions: int, answers: int, latency_ms: float, fail_every: int):
+    spool_dir = tempfile.mkdtemp(prefix="sofia_spool_")
+
+    postgrest = PostgrestStub()
+    with StubServer(make_webhook(latency_ms, fail_every)) as server, StubServer(postgrest) as db_server:
+        os.environ["EVALUATION_WEBHOOK_URL"] = f"{server.url}/webhook/sofia_ai"
+
+        # Importar después de fijar la URL del webhook local
+        import tools.interview_flow as interview_flow
+        from tools.circuit_breaker import CircuitBreaker
+        from tools.evaluation_question import set_evaluation_breaker, set_fallback_evaluator
+        from tools.evaluation_queue import EvaluationJob, EvaluationQueue, EvaluationSpool, set_evaluation_queue
+        from tools.http_client import close_http_client, get_http_client
+        from tools.repository import EVALUATIONS_TABLE, SupabaseRepository, set_repository
+        from tools.write_behind import WriteBehindStore, set_write_behind
+
+        # Solo webhook: los fallos deben resolverse con reintentos, no con el evaluador local
+        set_evaluation_breaker(CircuitBreaker("webhook", failure_threshold=0))
+        set_fallback_evaluator(None)
+        get_http_client()
+        print(f"[INFO] {sessions} sesiones x {answers} respuestas, webhook con {latency_ms:.0f} ms, "
+              f"falla 1 de cada {fail_every}")
+
+        interview_flow.EVALUATION_MODE = "sync"
+        print_report("ANTES: evaluación en línea", *await run_sessions(sessions, answers))
+
+        queue = EvaluationQueue(spool=EvaluationSpool(spool_dir), maxsize=sessions * answers, backoff=0.05)
+        set_evaluation_queue(queue)
+        interview_flow.EVALUATION_MODE = "background"
+        total_ms, latencies, states = await run_sessions(sessions, answers)
+
+        watch = Stopwatch()
+        drained = await asyncio.gather(*(queue.drain(state.session_id, timeout=60) for state in states))
+        print_report("DESPUÉS: evaluación en segundo plano", total_ms, latencies, states)
+        print(f"  drenado:      {watch.elapsed_ms():.0f} ms  completo: {all(drained)}  cola: {queue.stats()}")
+        print(f"  spool:        {len(queue.spool.pending())} trabajos pendientes")
+
+        # Proceso caído con trabajos sin terminar: los recoge el siguiente
+        # (complete_evaluation ya había anotado el candidato de la sesión)
+        orphan_path = os.path.join(spool_dir, "evaluations-999999999.jsonl")
+        with open(orphan_path, "w", encoding="utf-8") as f:
+            for k in range(5):
+                job = EvaluationJob(response=f"huérfana {k}", topic="HTML", session_id="crashed", question_id=k)
+                f.write(json.dumps({"event": "queued", **asdict(job)}) + "\n")
+            f.write(json.dumps({"event": "candidate", "session_id": "crashed", "candidate_id": "cand-crashed"}) + "\n")
+
+        repository = SupabaseRepository(rest_url=f"{db_server.url}/rest/v1", key="stub-key")
+        set_repository(repository)
+        store = WriteBehindStore(repository=repository, dead_letter_path=os.path.join(spool_dir, "dead_letters.jsonl"))
+        set_write_behind(store)
+        recovered = await queue.recover()
+        await queue.drain("crashed", timeout=60)
+        await store.flush()
+        saved = [row for row in postgrest.tables.get(EVALUATIONS_TABLE, []) if row.get("candidate_id") == "cand-crashed"]
+        print(f"\n[RECUPERACIÓN] {recovered} trabajos huérfanos reencolados; "
+              f"pendientes en el spool: {len(queue.spool.pending())}; guardados en la BD: {len(saved)}")
+
+        await queue.aclose()
+        await store.aclose()
+        await repository.aclose()
+        await close_http_client()
+        set_repository(None)
+        set_write_behind(None)
+
+
+if __name__ == "__main__":
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    n_answers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    webhook_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 1500
+    failure_every = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+
+    asyncio.run(main(n_sessions, n_answers, webhook_latency, failure_every))
@@ -0,0 +1,92 @@
+# benchmarks/bench_chunker.py
+"""
+Benchmark de throughput del chunker sobre el corpus TXT del crawler.
+
+Compara el chunk_text anterior (cortes cada 400 palabras) con el chunker por
+tokens de helpers/chunker.py: páginas/s, MB/s, número de chunks, tokens por
+chunk y chunks cortados a mitad de frase.
+
+Uso:
+    python -m benchmarks.bench_chunker [archivo.txt ...]
+
+Sin argumentos usa helpers/*.txt y, si no hay ninguno, un corpus sintético.
+"""
+import glob
+import random
+import re
+import sys
+
+from benchmarks.common import Stopwatch, summarize
+from helpers.chunker import count_tokens, iter_chunks
+from helpers.crawler import load_from_txt
+
+SENTENCE_END = re.compile(r"([.!?…:]|```)\s*$")
+
+
+def legacy_chunk_text(text: str, max_tokens: int = 400):
+    """chunk_text anterior: cuenta palabras, no tokens, y corta donde caiga."""
+    words = text.split()
+    return [" ".join(words[i:i + max_tokens]) for i in range(0, len(words), max_tokens)]
+
+
+def synthetic_corpus(pages: int = 300, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = (
+        "query cache componente estado servidor mutación invalidar clave datos "
+        "hook React TanStack petición respuesta render efecto suscripción"
+    ).split()
+
+    def sentence():
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 24))).capitalize() + "."
+
+    corpus = {}
+    for i in range(pages):
+        blocks = [f"# Página {i}"]
+        for section in range(rng.randint(2, 5)):
+            blocks.append(f"## Sección {section}")
+            for _ in range(rng.randint(1, 4)):
+                blocks.append(" ".join(sentence() for _ in range(rng.randint(2, 12))))
+            if rng.random() < 0.5:
+                code = "\n".join(f"const q{k} = useQuery({{ queryKey: ['k{k}'] }})" for k in range(rng.randint(3, 15)))
+                blocks.append(f"```\n{code}\n```")
+        corpus[f"https://docs.example.com/page-{i}"] = "\n\n".join(blocks)
+    return corpus
+
+
+def load_corpus(paths):
+    corpus = {}
+    for path in paths:
+        corpus.update(load_from_txt(path))
+    return corpus
+
+
+def measure(name, corpus, chunker):
+    size_mb = sum(len(text.encode("utf-8")) for text in corpus.values()) / 1e6
+    tokens, cut = [], 0
+
+    watch = Stopwatch()
+    for text in corpus.values():
+        for chunk in chunker(text):
+            tokens.append(count_tokens(chunk))
+            if not SENTENCE_END.search(chunk):
+                cut += 1
+    seconds = watch.elapsed_ms() / 1000
+
+    stats = summarize(tokens)
+    print(f"\n[{name}]")
+    print(f"  {len(corpus) / seconds:.0f} páginas/s  {size_mb / seconds:.2f} MB/s  ({seconds:.2f} s)")
+    print(f"  chunks: {len(tokens)}  tokens p50: {stats['p50']:.0f}  p95: {stats['p95']:.0f}  max: {stats['max']:.0f}")
+    print(f"  chunks cortados a mitad de frase: {cut} ({100 * cut / max(1, len(tokens)):.0f}%)")
+
+
+def main(paths):
+    paths = paths or glob.glob("helpers/*.txt")
+    corpus = load_corpus(paths) if paths else synthetic_corpus()
+    print(f"[INFO] Corpus: {len(corpus)} páginas ({'TXT' if paths else 'sintético'})")
+
+    measure("ANTES: 400 palabras", corpus, legacy_chunk_text)
+    measure("DESPUÉS: 400 tokens con estructura", corpus, lambda text: (c.text for c in iter_chunks(text)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,165 @@
+# benchmarks/bench_complete_evaluation.py
+"""
+Cierre de la entrevista con complete_evaluation contra un PostgREST local
+con latencia (``PostgrestStub``).
+
+ANTES: el LLM repite en los argumentos de la tool cada pregunta, respuesta,
+feedback y puntaje (tokens de salida que genera antes de que la tool se
+ejecute) y se inserta una fila por respuesta, cada una con su petición.
+DESPUÉS: los argumentos son solo candidate_id y notas breves; los puntajes
+por topic se calculan en el servidor y las filas compactas salen en un
+solo upsert (write-behind).
+
+Los tokens de salida se traducen a tiempo con ``tokens_por_segundo``
+(velocidad de generación aproximada del LLM).
+
+Uso:
+    python -m benchmarks.bench_complete_evaluation [sesiones] [latencia_ms] [tokens_por_segundo]
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import uuid
+
+from benchmarks.common import Stopwatch, StubServer, summarize
+from benchmarks.stubs import PostgrestStub, sample_question_rows
+from helpers.tokens import count_tokens
+from tools.repository import SupabaseRepository, set_repository
+from tools.write_behind import WriteBehindStore, set_write_behind
+
+MODEL = "gpt-4o-mini"
+ANSWER = (
+    "Bueno, yo diría que sirve para estructurar el contenido de la página con etiquetas que tienen "
+    "significado, y eso ayuda a la accesibilidad y al SEO porque el navegador entiende mejor la página."
+)
+FEEDBACK = "Buena respuesta: cubres la idea principal; podrías mencionar ejemplos concretos de etiquetas."
+NOTES = "Buen dominio de HTML y CSS; JavaScript asíncrono por reforzar."
+
+
+class FakeRunContext:
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+def interview_state(session: int):
+    from agent.interview_state import InterviewState
+    from tools.get_evaluation_criteria import build_question_bank
+
+    state = InterviewState(session_id=f"session-{session}", candidate_id=str(uuid.uuid4()))
+    state.load(build_question_bank(sample_question_rows()))
+    k = 0
+    while state.advance() is not None:
+        state.record(ANSWER, {"success": True, "score": 55 + (7 * k + 3 * session) % 45, "message": FEEDBACK})
+        k += 1
+    return state
+
+
+def full_arguments(state) -> str:
+    """Argumentos que el LLM tenía que generar repitiendo toda la entrevista."""
+    return json.dumps({
+        "candidate_id": state.candidate_id,
+        "questions": [
+            {
+                "question": record.question,
+                "topic": record.topic,
+                "answer": record.answer,
+                "evaluation": record.feedback,
+                "score": record.score,
+            }
+            for record in state.answers
+        ],
+        "scores_by_area": state.topic_scores(),
+        "overall_notes": NOTES,
+    }, ensure_ascii=False)
+
+
+def compact_arguments(state) -> str:
+    return json.dumps({"candidate_id": state.candidate_id, "overall_notes": NOTES}, ensure_ascii=False)
+
+
+async def run_before(repository: SupabaseRepository, states):
+    latencies = []
+
+    async def session(state):
+        watch = Stopwatch()
+        for record in state.answers:
+            await repository.insert_evaluations([{
+                "candidate_id": state.candidate_id,
+                "question_id": record.question_id,
+                "topic": record.topic,
+                "score": record.score,
+                "notes": record.feedback,
+            }])
+        latencies.append(watch.elapsed_ms())
+
+    await asyncio.gather(*(session(state) for state in states))
+    return latencies
+
+
+async def run_after(states):
+    from tools.complete_evaluation import complete_evaluation
+
+    latencies, results = [], []
+
+    async def session(state):
+        watch = Stopwatch()
+        results.append(await complete_evaluation(FakeRunContext(state), state.candidate_id, NOTES))
+        latencies.append(watch.elapsed_ms())
+
+    await asyncio.gather(*(session(state) for state in states))
+    return latencies, results
+
+
+def print_report(name: str, arguments, tokens_per_s: float, latencies, stub: PostgrestStub, requests: int, expected: int):
+    tokens = [count_tokens(args, MODEL) for args in arguments]
+    avg_tokens = sum(tokens) / len(tokens)
+    lat = summarize(latencies)
+    rows = len(stub.tables.get("evaluations", []))
+    print(f"\n[{name}]")
+    print(f"  argumentos de la tool: {avg_tokens:.0f} tokens de salida por entrevista "
+          f"(~{avg_tokens / tokens_per_s * 1000:.0f} ms generándolos)")
+    print(f"  tool p50: {lat['p50']:.1f} ms  max: {lat['max']:.1f} ms")
+    print(f"  peticiones a la BD: {requests}  filas: {rows}/{expected}")
+
+
+async def main(sessions: int, latency_ms: float, tokens_per_s: float):
+    states = [interview_state(i) for i in range(sessions)]
+    expected = sum(len(state.answers) for state in states)
+    print(f"[INFO] {sessions} entrevistas de {len(states[0].answers)} respuestas, "
+          f"PostgREST con {latency_ms:.0f} ms, LLM a {tokens_per_s:.0f} tokens/s")
+
+    stub = PostgrestStub(latency_ms=latency_ms)
+    with StubServer(stub) as server:
+        repository = SupabaseRepository(rest_url=f"{server.url}/rest/v1", key="stub-key")
+        repository.client
+        latencies = await run_before(repository, states)
+        print_report("ANTES: argumentos completos, una fila por petición",
+                     [full_arguments(s) for s in states], tokens_per_s, latencies, stub, server.requests, expected)
+        await repository.aclose()
+
+    stub = PostgrestStub(latency_ms=latency_ms)
+    with StubServer(stub) as server:
+        repository = SupabaseRepository(rest_url=f"{server.url}/rest/v1", key="stub-key")
+        set_repository(repository)
+        repository.client
+        store = WriteBehindStore(repository=repository, dead_letter_path=f"{tempfile.mkdtemp()}/dead_letters.jsonl")
+        set_write_behind(store)
+
+        latencies, results = await run_after(states)
+        await store.aclose()
+        print_report("DESPUÉS: argumentos mínimos, upsert en lote",
+                     [compact_arguments(s) for s in states], tokens_per_s, latencies, stub, server.requests, expected)
+        print(f"  resultado: {json.dumps(results[0], ensure_ascii=False)}")
+
+        await repository.aclose()
+        set_repository(None)
+        set_write_behind(None)
+
+
+if __name__ == "__main__":
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    db_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 120
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else 80
+
+    asyncio.run(main(n_sessions, db_latency, speed))
@@ -0,0 +1,135 @@
+# benchmarks/bench_context_replay.py
+"""
+Reproduce transcripciones grabadas (``TRANSCRIPTS_DIR``, ver
+agent/transcript.py) turno a turno y cuenta los tokens de prompt que
+recibiría el LLM en cada turno:
+
+ANTES: el contexto completo (todo mensaje y resultado de tool se reenvía).
+DESPUÉS: ``ContextPolicy`` aplicada antes de cada turno, como en
+``Assistant.on_user_turn_completed``, con varios presupuestos de tokens.
+
+Sin rutas genera y graba una entrevista sintética (respuestas largas,
+record_answer por respuesta y search_knowledge cada pocos turnos).
+
+Uso:
+    python -m benchmarks.bench_context_replay [transcripcion.jsonl ...]
+    python -m benchmarks.bench_context_replay --questions 8
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from livekit.agents import llm
+
+from agent.context_policy import ContextPolicy
+from agent.interview_state import InterviewState
+from agent.transcript import TranscriptRecorder, load_transcript
+from benchmarks.bench_question_payload import ANSWER, REPLY, make_rows
+from benchmarks.common import summarize
+from helpers.tokens import count_tokens
+from prompts.sofia_prompt import SOFIA_SYSTEM_PROMPT
+from tools.get_evaluation_criteria import PROMPT_TOKEN_MODEL, build_question_bank, encode_question_bank
+
+BUDGETS = [800, 1500, 3000]
+SEARCH_EVERY = 5
+SNIPPET = "La etiqueta <section> agrupa contenido temático relacionado, normalmente con un encabezado. " * 4
+
+
+def item_tokens(item) -> int:
+    return count_tokens(json.dumps(item.model_dump(mode="json", exclude_none=True), ensure_ascii=False), PROMPT_TOKEN_MODEL)
+
+
+def synthetic_transcript(path: str, per_topic: int) -> int:
+    """Graba una entrevista completa con el mismo formato que una sesión real."""
+    state = InterviewState()
+    state.load(encode_question_bank(build_question_bank(make_rows(per_topic)), "compact"))
+    recorder = TranscriptRecorder(path)
+
+    def tool_call(call_id, name, arguments, output):
+        call = llm.FunctionCall(call_id=call_id, name=name, arguments=json.dumps(arguments, ensure_ascii=False))
+        # Como LiveKit guarda el dict que devuelve la tool
+        result = llm.FunctionCallOutput(call_id=call_id, name=name, output=str(output), is_error=False)
+        recorder.on_tools_executed([call], [result])
+
+    tool_call("call_0", "next_question", {}, {"success": True, **state.question_payload(state.advance())})
+    recorder.on_item_added(llm.ChatMessage(role="assistant", content=[REPLY]))
+
+    turn = 0
+    while not state.finished:
+        turn += 1
+        recorder.on_item_added(llm.ChatMessage(role="user", content=[ANSWER]))
+
+        if turn % SEARCH_EVERY == 0:
+            results = [{"text": SNIPPET, "url": f"https://developer.mozilla.org/es/docs/{i}", "score": 0.8} for i in range(3)]
+            tool_call(f"search_{turn}", "search_knowledge", {"query": "section", "topic": "HTML"}, {"success": True, "results": results})
+
+        evaluation = {"score": 50 + (turn * 7) % 50, "message": "Buena respuesta, podrías profundizar en la accesibilidad."}
+        state.record(ANSWER, evaluation)
+        previous_topic = state.current_topic
+        result = {"success": True, "feedback": evaluation["message"], "score": evaluation["score"],
+                  "next": state.question_payload(state.advance(), previous_topic)}
+        tool_call(f"call_{turn}", "record_answer", {"response": ANSWER}, result)
+        recorder.on_item_added(llm.ChatMessage(role="assistant", content=[REPLY]))
+
+    recorder.close()
+    return turn
+
+
+def replay(items, budget=None):
+    """Tokens de prompt y tiempo de la política (ms) en cada turno del candidato."""
+    system_tokens = count_tokens(SOFIA_SYSTEM_PROMPT, PROMPT_TOKEN_MODEL)
+    policy = ContextPolicy(token_budget=budget) if budget is not None else None
+    chat_ctx = llm.ChatContext.empty()
+    tokens, apply_ms = [], []
+
+    for item in items:
+        if item.type == "message" and item.role == "user":
+            if policy is not None:
+                start = time.perf_counter()
+                compacted = chat_ctx.copy()
+                policy.apply(compacted)
+                apply_ms.append((time.perf_counter() - start) * 1000)
+                chat_ctx = compacted
+            tokens.append(system_tokens + sum(item_tokens(i) for i in chat_ctx.items) + item_tokens(item))
+        chat_ctx.items.append(item)
+
+    return tokens, apply_ms
+
+
+def main(paths):
+    for path in paths:
+        items = load_transcript(path)
+        print(f"[INFO] {os.path.basename(path)}: {len(items)} items")
+
+        baseline, _ = replay(items)
+        runs = [("ANTES: contexto completo", baseline, [])]
+        runs += [(f"DESPUÉS: presupuesto {budget}", *replay(items, budget)) for budget in BUDGETS]
+
+        for label, tokens, apply_ms in runs:
+            print(f"[{label}]")
+            print(f"  tokens de prompt: primer turno {tokens[0]}  máx {max(tokens)}  último {tokens[-1]}  "
+                  f"total {sum(tokens)} ({sum(tokens) / sum(baseline):.0%})")
+            if apply_ms:
+                stats = summarize(apply_ms)
+                print(f"  política: p50 {stats['p50']:.2f} ms  p95 {stats['p95']:.2f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    questions = 4
+    if "--questions" in args:
+        i = args.index("--questions")
+        questions = int(args[i + 1])
+        del args[i:i + 2]
+
+    if args:
+        main(args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            transcript = os.path.join(tmp, "synthetic.jsonl")
+            turns = synthetic_transcript(transcript, questions)
+            print(f"[INFO] Transcripción sintética: {turns} turnos\n")
+            main([transcript])
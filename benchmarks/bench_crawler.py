@@ -0,0 +1,120 @@
+# benchmarks/bench_crawler.py
+"""
+Benchmark del crawler contra un sitio de documentación estático local.
+
+Compara el BFS secuencial anterior (dos descargas por página) con el crawler
+asíncrono concurrente de helpers/crawler.py.
+
+Uso:
+    python -m benchmarks.bench_crawler [paginas] [latencia_ms] [rate_por_host]
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from benchmarks.common import Stopwatch, StubServer
+from helpers.crawler import crawl_docs_async, is_internal_link, scrape_html
+
+
+def make_docs_site(pages: int, latency_ms: float):
+    """
+    Sitio estático con ``pages`` páginas bajo /docs/. Cada página enlaza a las
+    siguientes con variantes duplicadas (fragmentos, barra final, utm_*).
+    """
+
+    def page(i: int) -> bytes:
+        links = []
+        for j in (i + 1, i + 2, i + 7, (i * 13) % pages):
+            if j < pages:
+                links.append(f'<a href="/docs/page-{j}">Página {j}</a>')
+                links.append(f'<a href="/docs/page-{j}/#intro">Intro {j}</a>')
+                links.append(f'<a href="/docs/page-{j}?utm_source=nav">Nav {j}</a>')
+        links.append('<a href="/blog/otra-cosa">Blog</a>')
+        links.append('<a href="https://externo.example.com/">Externo</a>')
+
+        body = " ".join(f"Contenido de la página {i}, párrafo {k}." for k in range(40))
+        html = (
+            f"<html><head><title>Página {i}</title></head><body>"
+            f"<nav>{''.join(links)}</nav><article><h1>Página {i}</h1><p>{body}</p></article>"
+            f"</body></html>"
+        )
+        return html.encode("utf-8")
+
+    def handler(method, path, body):
+        time.sleep(latency_ms / 1000)
+        route = urlparse(path).path.rstrip("/")
+
+        if route == "/docs":
+            return 200, {"Content-Type": "text/html"}, page(0)
+        if route.startswith("/docs/page-"):
+            i = int(route.rsplit("-", 1)[-1])
+            if i < pages:
+                return 200, {"Content-Type": "text/html"}, page(i)
+
+        return 404, {"Content-Type": "text/plain"}, b"not found"
+
+    return handler
+
+
+def legacy_crawl(base_url: str, start_path: str, max_pages: int):
+    """BFS secuencial anterior: descarga cada página dos veces y no normaliza URLs."""
+    base_domain = urlparse(base_url).netloc
+    queue = deque([urljoin(base_url, start_path)])
+    visited = set()
+    scraped = {}
+
+    while queue and len(scraped) < max_pages:
+        current = queue.popleft()
+        if current in visited:
+            continue
+        visited.add(current)
+
+        try:
+            scraped[current] = scrape_html(current)
+        except Exception:
+            continue
+
+        html = requests.get(current).text
+        soup = BeautifulSoup(html, "lxml")
+        for a in soup.find_all("a", href=True):
+            full = urljoin(current, a["href"])
+            if is_internal_link(full, base_domain) and urlparse(full).path.startswith(start_path):
+                if full not in visited:
+                    queue.append(full)
+
+    return scraped
+
+
+async def main(pages: int, latency_ms: float, rate: float):
+    with StubServer(make_docs_site(pages, latency_ms)) as server:
+        print(f"[INFO] Sitio local con {pages} páginas, {latency_ms:.0f} ms por petición\n")
+
+        before = server.requests
+        watch = Stopwatch()
+        legacy = await asyncio.to_thread(legacy_crawl, server.url, "/docs", pages)
+        legacy_ms = watch.elapsed_ms()
+        legacy_requests = server.requests - before
+
+        before = server.requests
+        watch = Stopwatch()
+        scraped = await crawl_docs_async(server.url, "/docs", pages, concurrency=16, rate_per_host=rate)
+        async_ms = watch.elapsed_ms()
+        async_requests = server.requests - before
+
+    print("\n[ANTES: BFS secuencial]")
+    print(f"  páginas: {len(legacy)}  peticiones: {legacy_requests}  tiempo: {legacy_ms / 1000:.1f} s")
+    print("[DESPUÉS: crawler asíncrono]")
+    print(f"  páginas: {len(scraped)}  peticiones: {async_requests}  tiempo: {async_ms / 1000:.1f} s")
+
+
+if __name__ == "__main__":
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    page_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    host_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    asyncio.run(main(n_pages, page_latency, host_rate))
@@ -0,0 +1,270 @@
+# benchmarks/bench_endpointing.py
+"""
+Evaluador offline del endpointing: reproduce turnos de candidatos y mide,
+para cada política, cuánto tarda en cerrarse el turno tras el final real
+de la respuesta y cuántas respuestas se cortan antes de tiempo (una pausa
+dentro de la respuesta más larga que la espera).
+
+ANTES: umbral fijo (VAD con 0.6 s de silencio mínimo).
+DESPUÉS: ``EndpointingPolicy`` (retardo por tipo de respuesta, dificultad,
+pausas y ritmo del candidato, cortes prematuros), reproducida turno a turno
+en el orden de la entrevista como en una sesión real.
+
+Con ``--audio DIR`` reproduce audio grabado: ``DIR/manifest.jsonl`` con una
+línea por turno, en orden, ``{"file": "c1_03.wav", "candidate": "c1",
+"kind": "answer", "difficulty": 2, "transcript": "..."}`` (``kind``:
+``short`` o ``answer``; ``transcript`` opcional, para el ritmo). Cada WAV
+(PCM 16 bits) es el turno del candidato desde que Sofía calla hasta que él
+termina; se pasa por Silero VAD y las pausas salen de su probabilidad de
+habla. Sin ``--audio`` se usa un corpus sintético de segmentos de habla
+y pausas con tres perfiles de candidato (semilla fija).
+
+El turn detector no se simula: ambas políticas se comparan solo por silencio.
+
+Uso:
+    python -m benchmarks.bench_endpointing [candidatos_por_perfil] [semilla]
+    python -m benchmarks.bench_endpointing --audio grabaciones/
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import wave
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agent.endpointing import (
+    ENDPOINTING_VAD_SILENCE,
+    FIXED_VAD_SILENCE,
+    RESUME_WINDOW,
+    EndpointingPolicy,
+    TurnExpectation,
+)
+from benchmarks.common import summarize
+from benchmarks.stubs import sample_question_rows
+
+# Retardo de endpointing por defecto de LiveKit (el modo fijo no lo cambiaba)
+LIVEKIT_MIN_DELAY = 0.5
+# Umbrales de Silero para segmentar (activación / desactivación) y habla mínima
+SPEECH_THRESHOLD = 0.5
+SILENCE_THRESHOLD = 0.35
+MIN_SPEECH = 0.2
+
+PROFILES = {
+    # wps, pausa típica, prob. de pausa para pensar, rango de esa pausa (s)
+    "ágil": (3.0, 0.35, 0.10, (0.6, 1.1)),
+    "normal": (2.5, 0.45, 0.20, (0.7, 1.5)),
+    "pensativo": (1.9, 0.60, 0.35, (0.9, 2.1)),
+}
+
+
+@dataclass
+class Turn:
+    candidate: str
+    kind: str
+    difficulty: float
+    segments: List[Tuple[float, float]]  # (inicio, fin) de habla en segundos
+    words: int = 0
+
+    @property
+    def pauses(self) -> List[float]:
+        return [b[0] - a[1] for a, b in zip(self.segments, self.segments[1:])]
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.segments)
+
+
+@dataclass
+class Result:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: {"short": [], "answer": []})
+    turns: Dict[str, int] = field(default_factory=lambda: {"short": 0, "answer": 0})
+    cut_turns: Dict[str, int] = field(default_factory=lambda: {"short": 0, "answer": 0})
+    cuts: int = 0
+
+
+# ==========================
+# CORPUS
+# ==========================
+
+def synthetic_turns(per_profile: int, seed: int) -> List[Turn]:
+    rng = random.Random(seed)
+    questions = sample_question_rows()
+    turns = []
+
+    def short_turn(name: str) -> Turn:
+        first = rng.uniform(0.4, 1.0)
+        segments = [(0.0, first)]
+        if rng.random() < 0.3:  # "Sí... estoy listo"
+            start = first + rng.uniform(0.2, 0.4)
+            segments.append((start, start + rng.uniform(0.3, 0.8)))
+        return Turn(name, "short", 1.0, segments)
+
+    for profile, (wps, pause, think_p, think_range) in PROFILES.items():
+        for k in range(per_profile):
+            name = f"{profile}-{k}"
+            turns.append(short_turn(name))
+            for row in questions:
+                difficulty = float(row.get("difficulty") or 1)
+                t, segments = 0.0, []
+                for i in range(rng.randint(2, 3 + int(difficulty))):
+                    if i:
+                        if rng.random() < think_p * (0.7 + 0.3 * difficulty):
+                            t += rng.uniform(*think_range)
+                        else:
+                            t += max(0.15, rng.gauss(pause, 0.12))
+                    length = rng.uniform(1.0, 4.0)
+                    segments.append((t, t + length))
+                    t += length
+                speech = sum(end - start for start, end in segments)
+                turns.append(Turn(name, "answer", difficulty, segments, words=int(speech * wps)))
+            turns.append(short_turn(name))
+    return turns
+
+
+def speech_segments(probabilities: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Segmentos de habla a partir de (timestamp, probabilidad) de Silero, con histéresis."""
+    segments, start, last_speech = [], None, 0.0
+    for timestamp, probability in probabilities:
+        if start is None and probability >= SPEECH_THRESHOLD:
+            start = timestamp
+        if start is not None:
+            if probability >= SILENCE_THRESHOLD:
+                last_speech = timestamp
+            else:
+                if last_speech - start >= MIN_SPEECH:
+                    segments.append((start, last_speech))
+                start = None
+    if start is not None and last_speech - start >= MIN_SPEECH:
+        segments.append((start, last_speech))
+    return segments
+
+
+async def vad_probabilities(path: str, vad) -> List[Tuple[float, float]]:
+    from livekit import rtc
+    from livekit.agents.vad import VADEventType
+
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: solo PCM de 16 bits")
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        data = wav.readframes(wav.getnframes())
+
+    stream = vad.stream()
+    chunk = rate // 100  # 10 ms
+    step = chunk * channels * 2
+    for offset in range(0, len(data) - step + 1, step):
+        stream.push_frame(rtc.AudioFrame(data[offset:offset + step], rate, channels, chunk))
+    stream.end_input()
+
+    probabilities = []
+    async for event in stream:
+        if event.type == VADEventType.INFERENCE_DONE:
+            probabilities.append((event.timestamp, event.probability))
+    await stream.aclose()
+    return probabilities
+
+
+async def recorded_turns(directory: str) -> List[Turn]:
+    from livekit.plugins import silero
+
+    vad = silero.VAD.load(min_speech_duration=0.05, min_silence_duration=0.05)
+    turns = []
+    with open(os.path.join(directory, "manifest.jsonl"), encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        segments = speech_segments(await vad_probabilities(os.path.join(directory, entry["file"]), vad))
+        if not segments:
+            print(f"  ⚠️ {entry['file']}: sin habla detectada, se omite")
+            continue
+        turns.append(Turn(
+            candidate=entry.get("candidate", "grabación"),
+            kind=entry.get("kind", "answer"),
+            difficulty=float(entry.get("difficulty") or 1),
+            segments=segments,
+            words=len((entry.get("transcript") or "").split()),
+        ))
+    return turns
+
+
+# ==========================
+# REPRODUCCIÓN
+# ==========================
+
+def replay(turns: List[Turn], wait_for: Callable[[Optional[EndpointingPolicy], Turn], float],
+           adaptive: bool) -> Result:
+    """
+    Reproduce los turnos en orden. ``wait_for`` da el silencio que se espera
+    antes de cerrar el turno; una pausa igual o mayor es un corte.
+    """
+    result = Result()
+    policies: Dict[str, EndpointingPolicy] = {}
+
+    for turn in turns:
+        policy = policies.setdefault(turn.candidate, EndpointingPolicy()) if adaptive else None
+        if policy is not None:
+            policy.expect(TurnExpectation(turn.kind, turn.difficulty))
+
+        cut = False
+        for pause in turn.pauses:
+            wait = wait_for(policy, turn)
+            if pause >= wait:
+                cut = True
+                result.cuts += 1
+                # En vivo solo se detecta si el candidato retoma dentro de la ventana
+                if policy is not None and pause - wait <= RESUME_WINDOW:
+                    policy.observe_cutoff()
+            elif policy is not None:
+                policy.observe_pause(pause)
+
+        result.latencies[turn.kind].append(wait_for(policy, turn) * 1000)
+        result.turns[turn.kind] += 1
+        result.cut_turns[turn.kind] += cut
+        if policy is not None:
+            policy.observe_speech(words=turn.words, seconds=turn.speech_seconds)
+    return result
+
+
+def fixed_wait(policy, turn: Turn) -> float:
+    return max(FIXED_VAD_SILENCE, LIVEKIT_MIN_DELAY)
+
+
+def adaptive_wait(policy: EndpointingPolicy, turn: Turn) -> float:
+    return max(ENDPOINTING_VAD_SILENCE, policy.delays()[0])
+
+
+def print_result(name: str, result: Result):
+    print(f"\n[{name}]")
+    for kind, label in (("short", "respuestas cortas"), ("answer", "respuestas técnicas")):
+        if not result.turns[kind]:
+            continue
+        lat = summarize(result.latencies[kind])
+        cut = result.cut_turns[kind]
+        print(f"  {label:<20} cierre de turno p50: {lat['p50']:5.0f} ms  p95: {lat['p95']:5.0f} ms   "
+              f"cortadas: {cut}/{result.turns[kind]} ({cut / result.turns[kind]:.0%})")
+    print(f"  cortes totales (pausas >= espera): {result.cuts}")
+
+
+def main(turns: List[Turn], source: str):
+    candidates = len({turn.candidate for turn in turns})
+    pauses = [pause for turn in turns if turn.kind == "answer" for pause in turn.pauses]
+    pause_stats = summarize([p * 1000 for p in pauses]) if pauses else None
+    print(f"[INFO] {source}: {len(turns)} turnos de {candidates} candidatos")
+    if pause_stats:
+        print(f"  pausas dentro de respuestas técnicas: p50 {pause_stats['p50']:.0f} ms, "
+              f"p95 {pause_stats['p95']:.0f} ms, max {pause_stats['max']:.0f} ms")
+
+    print_result(f"ANTES: umbral fijo ({max(FIXED_VAD_SILENCE, LIVEKIT_MIN_DELAY):.1f} s)",
+                 replay(turns, fixed_wait, adaptive=False))
+    print_result("DESPUÉS: endpointing adaptativo", replay(turns, adaptive_wait, adaptive=True))
+
+
+if __name__ == "__main__":
+    if "--audio" in sys.argv:
+        audio_dir = sys.argv[sys.argv.index("--audio") + 1]
+        main(asyncio.run(recorded_turns(audio_dir)), f"audio grabado en {audio_dir}")
+    else:
+        n_candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+        seed = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+        main(synthetic_turns(n_candidates, seed), "corpus sintético")
@@ -0,0 +1,102 @@
+# benchmarks/bench_evaluation_fallback.py
+"""
+Evaluación de respuestas durante una caída del webhook, contra un stub
+local con latencia y errores inyectables (``WebhookStub``).
+
+Fases: webhook sano -> caída (no responde antes del timeout) -> webhook
+recuperado.
+
+ANTES: sin circuit breaker ni respaldo: cada respuesta espera el timeout
+completo y la evaluación se pierde.
+DESPUÉS: tras ``threshold`` fallos el circuito se abre y responde el
+evaluador local al instante; pasado ``reset`` una llamada de prueba
+(half-open) detecta que el webhook volvió.
+
+Uso:
+    python -m benchmarks.bench_evaluation_fallback [respuestas_por_fase] [timeout_s] [threshold]
+"""
+import asyncio
+import os
+import sys
+
+from benchmarks.common import Stopwatch, StubServer, summarize
+from benchmarks.stubs import WebhookStub, sample_question_rows
+
+GOOD_ANSWER = (
+    "El HTML semántico usa etiquetas con significado como header, nav, article o section, "
+    "lo que mejora la accesibilidad para lectores de pantalla y el SEO en el navegador."
+)
+SHORT_ANSWER = "No estoy seguro, creo que es algo de estilos."
+
+
+async def run_phase(evaluate, webhook: WebhookStub, name: str, answers: int, latency_ms: float, questions):
+    webhook.latency_ms = latency_ms
+    latencies, sources = [], {"webhook": 0, "local": 0, "error": 0}
+
+    for i in range(answers):
+        question = questions[i % len(questions)]
+        watch = Stopwatch()
+        try:
+            result = await evaluate(GOOD_ANSWER, question["tech"]["name"], question)
+            sources[result.get("source", "webhook")] += 1
+        except Exception:
+            sources["error"] += 1
+        latencies.append(watch.elapsed_ms())
+
+    lat = summarize(latencies)
+    print(f"  {name:<11} p50 {lat['p50']:7.1f} ms  max {lat['max']:7.1f} ms  "
+          f"total {sum(latencies) / 1000:5.1f} s  {sources}")
+
+
+async def run(label: str, answers: int, timeout_s: float, breaker, fallback, reset_s: float):
+    from tools import evaluation_question
+
+    evaluation_question.set_evaluation_breaker(breaker)
+    evaluation_question.set_fallback_evaluator(fallback)
+    questions = sample_question_rows()
+    webhook = WebhookStub()
+
+    with StubServer(webhook) as server:
+        evaluation_question.EVALUATION_WEBHOOK_URL = f"{server.url}/webhook/sofia_ai"
+        print(f"\n[{label}]")
+        await run_phase(evaluation_question.evaluate_answer, webhook, "sano", answers, 100, questions)
+        await run_phase(evaluation_question.evaluate_answer, webhook, "caída", answers, timeout_s * 1000 + 500, questions)
+        # Dar tiempo a que el circuito pase a half-open antes de la recuperación
+        await asyncio.sleep(reset_s)
+        await run_phase(evaluation_question.evaluate_answer, webhook, "recuperado", answers, 100, questions)
+        print(f"  peticiones al webhook: {webhook.calls}  breaker: {breaker.stats()}")
+
+
+async def main(answers: int, timeout_s: float, threshold: int):
+    os.environ["EVALUATION_TIMEOUT"] = str(timeout_s)
+
+    # Importar después de fijar el timeout
+    from tools.circuit_breaker import CircuitBreaker
+    from tools.http_client import close_http_client
+    from tools.local_evaluator import KeywordEvaluator
+
+    reset_s = 2 * timeout_s
+    print(f"[INFO] {answers} respuestas por fase, timeout {timeout_s:.1f} s, "
+          f"breaker: {threshold} fallos, reset {reset_s:.1f} s")
+
+    await run("ANTES: sin breaker ni respaldo", answers, timeout_s,
+              CircuitBreaker("before", failure_threshold=0), None, reset_s)
+    await run("DESPUÉS: breaker + evaluador local", answers, timeout_s,
+              CircuitBreaker("after", failure_threshold=threshold, reset_timeout=reset_s), KeywordEvaluator(rubrics={}), reset_s)
+
+    evaluator = KeywordEvaluator(rubrics={})
+    question = sample_question_rows()[0]
+    print(f"\n[EVALUADOR LOCAL] \"{question['question']}\"")
+    for answer in (GOOD_ANSWER, SHORT_ANSWER):
+        result = evaluator(answer, question["tech"]["name"], question)
+        print(f"  {result['score']:3d}  {result['matched_keywords']}  <- {answer[:50]}...")
+
+    await close_http_client()
+
+
+if __name__ == "__main__":
+    n_answers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    failure_threshold = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    asyncio.run(main(n_answers, timeout, failure_threshold))
@@ -0,0 +1,93 @@
+# benchmarks/bench_evaluation_question.py
+"""
+Benchmark de evaluation_question contra un webhook local simulado.
+
+Lanza N sesiones concurrentes que envían M respuestas cada una y mide el lag
+del event loop con la implementación anterior (requests.post bloqueante) y con
+el cliente asíncrono compartido.
+
+Uso:
+    python -m benchmarks.bench_evaluation_question [sesiones] [respuestas] [latencia_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import requests
+
+from benchmarks.common import LoopLagMonitor, Stopwatch, StubServer, json_response, summarize
+
+
+def make_webhook(latency_ms: float):
+    def handler(method, path, body):
+        time.sleep(latency_ms / 1000)
+        return json_response({"message": "Buena respuesta", "score": 80})
+    return handler
+
+
+async def legacy_evaluation(url: str, response: str, topic: str):
+    """Implementación anterior: requests.post bloqueante dentro de una corrutina."""
+    resp = requests.post(url, json={"response": response, "topic": topic}, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def run_sessions(evaluate, sessions: int, answers: int):
+    latencies = []
+
+    async def session(i: int):
+        for j in range(answers):
+            watch = Stopwatch()
+            await evaluate(f"respuesta {i}-{j}", "JavaScript")
+            latencies.append(watch.elapsed_ms())
+
+    monitor = LoopLagMonitor()
+    await monitor.start()
+    watch = Stopwatch()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    total_ms = watch.elapsed_ms()
+    lag = await monitor.stop()
+
+    return {"total_ms": total_ms, "latency": summarize(latencies), "loop_lag": lag}
+
+
+def print_report(name: str, result: dict):
+    lat, lag = result["latency"], result["loop_lag"]
+    print(f"\n[{name}]")
+    print(f"  total:        {result['total_ms']:.0f} ms")
+    print(f"  latencia p50: {lat['p50']:.1f} ms  p95: {lat['p95']:.1f} ms  p99: {lat['p99']:.1f} ms")
+    print(f"  loop lag p50: {lag['p50']:.1f} ms  p95: {lag['p95']:.1f} ms  max: {lag['max']:.1f} ms")
+
+
+async def main(sessions: int, answers: int, latency_ms: float):
+    with StubServer(make_webhook(latency_ms)) as server:
+        url = f"{server.url}/webhook/sofia_ai"
+        os.environ["EVALUATION_WEBHOOK_URL"] = url
+
+        # Importar después de fijar la URL del webhook local
+        from tools.evaluation_question import evaluation_question
+        from tools.http_client import close_http_client, get_http_client
+
+        # Crear el cliente (contexto TLS) fuera de la medición, como en el prewarm
+        get_http_client()
+
+        print(f"[INFO] {sessions} sesiones x {answers} respuestas, webhook con {latency_ms:.0f} ms")
+
+        before = await run_sessions(
+            lambda r, t: legacy_evaluation(url, r, t), sessions, answers
+        )
+        print_report("ANTES: requests bloqueante", before)
+
+        after = await run_sessions(evaluation_question, sessions, answers)
+        print_report("DESPUÉS: httpx asíncrono con pool", after)
+
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_answers = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    webhook_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    asyncio.run(main(n_sessions, n_answers, webhook_latency))
@@ -0,0 +1,114 @@
+# benchmarks/bench_import_time.py
+"""
+Tiempo de import del worker, medido en procesos nuevos con
+``python -X importtime`` (cada escenario se repite y se toma la mediana).
+
+Antes de registrarse en LiveKit el proceso principal del worker importa
+``main`` (y con él ``agent.agent`` y las tools), así que ese import es el
+piso del tiempo hasta "worker registered".
+
+ANTES: el camino eager anterior. ``agent.agent`` importaba todos los
+plugins de LiveKit, las tools cargaban openai/qdrant_client y el chunker
+(bs4) solo para contar tokens; se reproduce importando esos módulos junto
+con ``main``.
+DESPUÉS: ``import main`` a secas (plugins, openai, qdrant_client y
+tiktoken se importan en el forkserver vía ``preload_modules`` o en el
+prewarm) y el camino completo de un proceso de job, que con forkserver
+se paga una sola vez y los jobs heredan.
+
+Uso:
+    python -m benchmarks.bench_import_time [repeticiones] [top]
+"""
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLUGIN_MODULES = [
+    "livekit.plugins.openai",
+    "livekit.plugins.deepgram",
+    "livekit.plugins.elevenlabs",
+    "livekit.plugins.silero",
+    "livekit.plugins.tavus",
+]
+# Lo que se importaba con agent.agent antes de hacer perezosos plugins y clientes
+EAGER_MODULES = PLUGIN_MODULES + ["openai", "qdrant_client", "helpers.chunker", "helpers.indexer"]
+# Lo que importa un proceso de job (agent.agent.PRELOAD_MODULES); con
+# ``import`` explícito para que -X importtime reporte cada paquete
+JOB_MODULES = PLUGIN_MODULES + ["openai", "qdrant_client", "tiktoken"]
+
+
+def imports(modules: List[str]) -> str:
+    return "".join(f"import {module}\n" for module in modules)
+
+
+SCENARIOS = [
+    ("ANTES: import main con plugins y clientes eager",
+     "import main\n" + imports(EAGER_MODULES)),
+    ("DESPUÉS: import main (proceso principal del worker)",
+     "import main\n"),
+    ("DESPUÉS: proceso de job (forkserver: una vez por worker)",
+     "import main\n" + imports(JOB_MODULES)),
+]
+
+
+def run_importtime(code: str) -> List[Tuple[str, int, int]]:
+    """(módulo, µs propios, µs acumulados) de cada import, en orden."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def is_reported(name: str) -> bool:
+    """Paquetes de primer nivel, livekit.agents, plugins de LiveKit y módulos del repo."""
+    if name == "livekit.agents":
+        return True
+    if name.startswith("livekit.plugins."):
+        return name.count(".") == 2
+    if name.split(".")[0] in ("agent", "tools", "helpers", "prompts"):
+        return True
+    return "." not in name
+
+
+def measure(code: str, repeats: int) -> Tuple[float, Dict[str, float]]:
+    totals, per_module = [], {}
+    for _ in range(repeats):
+        rows = run_importtime(code)
+        totals.append(sum(self_us for _, self_us, _ in rows) / 1000)
+        for name, _, cumulative_us in rows:
+            per_module.setdefault(name, []).append(cumulative_us / 1000)
+    return statistics.median(totals), {name: statistics.median(v) for name, v in per_module.items()}
+
+
+def main(repeats: int, top: int):
+    print(f"[INFO] {repeats} procesos por escenario, Python {sys.version.split()[0]}; "
+          f"tiempos = mediana del total de -X importtime")
+
+    for title, code in SCENARIOS:
+        total_ms, modules = measure(code, repeats)
+        heavy = [m for m in ("livekit.plugins.openai", "livekit.plugins.silero", "qdrant_client", "bs4", "tiktoken")
+                 if m in modules]
+        print(f"\n[{title}]")
+        print(f"  import total: {total_ms:.0f} ms  ({len(modules)} módulos)")
+        print(f"  pesados cargados: {', '.join(heavy) or 'ninguno'}")
+        ranked = sorted(((ms, name) for name, ms in modules.items() if is_reported(name)), reverse=True)
+        for ms, name in ranked[:top]:
+            print(f"    {ms:7.0f} ms  {name}")
+
+
+if __name__ == "__main__":
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_top = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    main(n_repeats, n_top)
@@ -0,0 +1,92 @@
+# benchmarks/bench_indexer.py
+"""
+Benchmark del pipeline de indexación con un embedder falso y Qdrant en memoria.
+
+Compara el flujo anterior (un embedding y un upsert por chunk) con
+``index_chunks`` (lotes de embedding + upsert masivo solapados). El embedder
+falso simula la latencia de la API y puede inyectar fallos para ejercitar
+los reintentos.
+
+Uso:
+    python -m benchmarks.bench_indexer [chunks] [latencia_ms] [tasa_fallos]
+"""
+import asyncio
+import hashlib
+import random
+import sys
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from benchmarks.common import Stopwatch
+from helpers.indexer import IndexStats, ensure_collection, index_chunks
+
+DIM = 64
+
+
+def fake_vector(text: str):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [digest[i % len(digest)] / 255 for i in range(DIM)]
+
+
+def make_fake_embedder(latency_ms: float, failure_rate: float = 0.0):
+    calls = {"requests": 0}
+
+    async def embed(texts):
+        calls["requests"] += 1
+        await asyncio.sleep(latency_ms / 1000)
+        if random.random() < failure_rate:
+            raise RuntimeError("429 Too Many Requests (simulado)")
+        return [fake_vector(text) for text in texts]
+
+    return embed, calls
+
+
+def make_chunks(n: int):
+    return [
+        {"url": f"https://docs.example.com/page-{i // 10}", "content": f"Chunk {i}: " + "texto " * 300, "topic": "TanStack"}
+        for i in range(n)
+    ]
+
+
+async def legacy_index(chunks, qdrant, collection, embed):
+    """Flujo anterior: una petición de embedding y un upsert por chunk."""
+    for i, chunk in enumerate(chunks):
+        vector = (await embed([chunk["content"]]))[0]
+        await qdrant.upsert(
+            collection_name=collection,
+            points=[qmodels.PointStruct(id=i, vector=vector, payload=chunk)],
+        )
+
+
+async def main(n_chunks: int, latency_ms: float, failure_rate: float):
+    chunks = make_chunks(n_chunks)
+    print(f"[INFO] {n_chunks} chunks, embeddings con {latency_ms:.0f} ms por petición\n")
+
+    qdrant = AsyncQdrantClient(":memory:")
+    await ensure_collection(qdrant, "legacy", size=DIM)
+    await ensure_collection(qdrant, "batched", size=DIM)
+
+    embed, calls = make_fake_embedder(latency_ms)
+    watch = Stopwatch()
+    await legacy_index(chunks, qdrant, "legacy", embed)
+    print("\n[ANTES: un chunk por petición]")
+    print(f"  peticiones de embedding: {calls['requests']}  upserts: {n_chunks}  tiempo: {watch.elapsed_ms() / 1000:.2f} s")
+
+    embed, calls = make_fake_embedder(latency_ms, failure_rate)
+    watch = Stopwatch()
+    stats = await index_chunks(chunks, qdrant, "batched", embed_fn=embed, batch_size=128, upsert_batch_size=256)
+    count = (await qdrant.count("batched")).count
+    print("[DESPUÉS: lotes + upsert masivo]")
+    print(f"  peticiones de embedding: {calls['requests']}  upserts: {stats.upsert_requests}  tiempo: {watch.elapsed_ms() / 1000:.2f} s")
+    print(f"  reintentos: {stats.retries}  lotes fallidos: {stats.failed_batches}  puntos en Qdrant: {count}")
+
+    await qdrant.close()
+
+
+if __name__ == "__main__":
+    total_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    embed_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    failures = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    asyncio.run(main(total_chunks, embed_latency, failures))
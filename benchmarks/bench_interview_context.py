@@ -0,0 +1,98 @@
+# benchmarks/bench_interview_context.py
+"""
+Tokens de prompt por turno durante una entrevista completa.
+
+ANTES: el contexto del LLM crece con cada pregunta, respuesta y resultado
+de tool (el prompt pedía llevar un "registro mental" de todo).
+DESPUÉS: las preguntas, respuestas y puntajes viven en ``InterviewState``;
+el contexto se compacta con ``ContextPolicy`` a un presupuesto de tokens y
+cada turno recibe solo un resumen del estado.
+
+Uso:
+    python -m benchmarks.bench_interview_context [preguntas_por_topic] [presupuesto_tokens]
+"""
+import json
+import sys
+
+from livekit.agents import llm
+
+from agent.context_policy import ContextPolicy
+from agent.interview_state import InterviewState
+from benchmarks.bench_question_payload import ANSWER, REPLY, make_rows
+from helpers.tokens import count_tokens
+from prompts.sofia_prompt import SOFIA_SYSTEM_PROMPT
+from tools.get_evaluation_criteria import PROMPT_TOKEN_MODEL, build_question_bank, encode_question_bank
+
+EVALUATION = {"score": 70, "message": "Buena respuesta, podrías profundizar en la accesibilidad."}
+
+
+def ctx_tokens(chat_ctx: llm.ChatContext) -> int:
+    return count_tokens(SOFIA_SYSTEM_PROMPT, PROMPT_TOKEN_MODEL) + sum(
+        count_tokens(json.dumps(item.model_dump(mode="json"), ensure_ascii=False), PROMPT_TOKEN_MODEL)
+        for item in chat_ctx.items
+    )
+
+
+def add_tool_call(chat_ctx: llm.ChatContext, call_id: str, name: str, arguments: dict, output: dict):
+    chat_ctx.insert(llm.FunctionCall(call_id=call_id, name=name, arguments=json.dumps(arguments, ensure_ascii=False)))
+    # Como LiveKit guarda el dict que devuelve la tool
+    chat_ctx.insert(llm.FunctionCallOutput(call_id=call_id, name=name, output=str(output), is_error=False))
+
+
+def run(payload, budget):
+    state = InterviewState()
+    state.load(payload)
+    chat_ctx = llm.ChatContext.empty()
+    policy = ContextPolicy(token_budget=budget) if budget is not None else None
+
+    if policy is None:
+        # Flujo anterior: el banco completo en el contexto y evaluation_question por respuesta
+        add_tool_call(chat_ctx, "call_0", "get_evaluation_criteria", {}, payload)
+    else:
+        add_tool_call(chat_ctx, "call_0", "next_question", {}, state.question_payload(state.advance()))
+
+    per_turn = []
+    for turn in range(state.total_questions):
+        chat_ctx.add_message(role="user", content=ANSWER)
+
+        if policy is None:
+            per_turn.append(ctx_tokens(chat_ctx))
+            add_tool_call(chat_ctx, f"call_{turn + 1}", "evaluation_question", {"response": ANSWER, "topic": "HTML"}, EVALUATION)
+        else:
+            # Lo mismo que Assistant.on_user_turn_completed
+            policy.apply(chat_ctx)
+            turn_ctx = chat_ctx.copy()
+            turn_ctx.add_message(role="system", content=state.progress())
+            per_turn.append(ctx_tokens(turn_ctx))
+
+            state.record(ANSWER, EVALUATION)
+            previous_topic = state.current_topic
+            result = {"success": True, "feedback": EVALUATION["message"], "score": 70,
+                      "next": state.question_payload(state.advance(), previous_topic)}
+            add_tool_call(chat_ctx, f"call_{turn + 1}", "record_answer", {"response": ANSWER}, result)
+
+        chat_ctx.add_message(role="assistant", content=REPLY)
+
+    return per_turn
+
+
+def main(per_topic: int, budget: int):
+    bank = build_question_bank(make_rows(per_topic))
+    payload = encode_question_bank(bank, "compact")
+    print(f"[INFO] {payload['total_questions']} preguntas, presupuesto de {budget} tokens de historial\n")
+
+    for label, tokens in (
+        ("ANTES: contexto completo", run(payload, None)),
+        ("DESPUÉS: estado en servidor + ContextPolicy", run(payload, budget)),
+    ):
+        quarter = max(1, len(tokens) // 4)
+        print(f"[{label}]")
+        print(f"  tokens de prompt: primer turno {tokens[0]}  turno {quarter} {tokens[quarter - 1]}  "
+              f"último {tokens[-1]}  total {sum(tokens)}")
+
+
+if __name__ == "__main__":
+    questions_per_topic = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    token_budget = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+
+    main(questions_per_topic, token_budget)
@@ -0,0 +1,93 @@
+# benchmarks/bench_knowledge.py
+"""
+Benchmark de la tool search_knowledge con Qdrant en memoria y un embedder
+falso con latencia configurable.
+
+Indexa un corpus sintético con varios topics y lanza una secuencia de
+consultas con repeticiones (como repreguntas sobre el mismo concepto):
+latencia por llamada en frío y en caché, y comportamiento cuando el
+embedding supera el presupuesto de latencia.
+
+Uso:
+    python -m benchmarks.bench_knowledge [consultas] [latencia_embedding_ms] [presupuesto_ms]
+"""
+import asyncio
+import random
+import sys
+
+from qdrant_client import AsyncQdrantClient
+
+from benchmarks.bench_indexer import DIM, make_fake_embedder
+from benchmarks.common import summarize
+from helpers.indexer import ensure_collection, index_chunks
+from tools.search_knowledge import KnowledgeSearcher, search_knowledge, set_knowledge_searcher
+
+TOPICS = ["TanStack", "React", "CSS"]
+CONCEPTS = ["caché", "invalidación", "mutaciones", "paginación", "suspense", "selectores", "flexbox", "grid"]
+
+
+async def build_index(qdrant, collection: str, pages: int):
+    await ensure_collection(qdrant, collection, size=DIM)
+
+    embed, _ = make_fake_embedder(latency_ms=0)
+    chunks = [
+        {
+            "url": f"https://docs.example.com/{topic.lower()}/page-{i}",
+            "content": f"{topic}: {concept}, sección {i}. " + "detalle " * 60,
+            "heading_path": [topic, concept],
+            "topic": topic,
+        }
+        for topic in TOPICS
+        for concept in CONCEPTS
+        for i in range(pages)
+    ]
+    await index_chunks(chunks, qdrant, collection, embed_fn=embed)
+    return len(chunks)
+
+
+async def main(n_queries: int, embed_latency_ms: float, budget_ms: float):
+    qdrant = AsyncQdrantClient(":memory:")
+    total = await build_index(qdrant, "docs", pages=20)
+
+    embed, calls = make_fake_embedder(embed_latency_ms)
+    searcher = KnowledgeSearcher(qdrant, embed, collection="docs", budget_ms=budget_ms)
+    set_knowledge_searcher(searcher)
+    print(f"[INFO] {total} chunks indexados, embedding de {embed_latency_ms:.0f} ms, presupuesto de {budget_ms:.0f} ms\n")
+
+    # Pocas consultas distintas repetidas: las repreguntas vuelven sobre los mismos conceptos
+    rng = random.Random(7)
+    queries = [(f"¿Cómo funciona {rng.choice(CONCEPTS)}?", rng.choice(TOPICS)) for _ in range(n_queries)]
+
+    cold, cached = [], []
+    for query, topic in queries:
+        result = await search_knowledge(query, topic)
+        timing = result["timing"]
+        (cached if timing["cached"] else cold).append(timing["total_ms"])
+
+    print("[search_knowledge]")
+    print(f"  en frío:  {summarize(cold)}")
+    print(f"  en caché: {summarize(cached)}")
+    print(f"  peticiones de embedding: {calls['requests']}  stats: {searcher.stats()}")
+
+    # Embedding más lento que el presupuesto: la tool responde a tiempo sin resultados
+    slow_embed, _ = make_fake_embedder(budget_ms * 3)
+    slow = KnowledgeSearcher(qdrant, slow_embed, collection="docs", budget_ms=budget_ms)
+    result = await slow.search("¿Qué es el stale time?", "TanStack")
+    print("\n[EMBEDDING LENTO]")
+    print(f"  success: {result['success']}  error: {result.get('error')}  total: {result['timing']['total_ms']:.0f} ms")
+
+    # El embedding terminó en segundo plano: la misma consulta ya no paga el embedding
+    await asyncio.sleep(budget_ms * 3 / 1000)
+    result = await slow.search("¿Qué es el stale time?", "TanStack")
+    print(f"  reintento: success: {result['success']}  total: {result['timing']['total_ms']:.0f} ms  stats: {slow.stats()}")
+
+    set_knowledge_searcher(None)
+    await qdrant.close()
+
+
+if __name__ == "__main__":
+    total_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    embed_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 120
+    budget = float(sys.argv[3]) if len(sys.argv) > 3 else 800
+
+    asyncio.run(main(total_queries, embed_latency, budget))
@@ -0,0 +1,189 @@
+# benchmarks/bench_llm_replay.py
+"""
+Benchmark del modo replay del LLM (``agent/llm_replay.py``).
+
+Corre entrevistas completas del ``Assistant`` real (tools, InterviewState,
+ContextPolicy) con los stand-ins de ``bench_load`` varias veces:
+
+ANTES: LLM en vivo. Por defecto ``ScriptedLLM`` con variación aleatoria del
+time-to-first-token (como la red); con ``--live``, gpt-4o-mini
+(``temperature=0.8``, necesita ``OPENAI_API_KEY``), donde además cambia lo
+que responde.
+GRABACIÓN: una ejecución con ``ReplayLLM`` grabando (con ``--live``, en
+``LLM_REPLAY_DIR`` y en modo ``auto``: solo la primera vez usa la red).
+DESPUÉS: las mismas ejecuciones reproduciendo la grabación, sin llamar al
+LLM: mismo flujo de tools y respuestas en cada ejecución, y latencias de
+turno con el tiempo grabado. También a velocidad 0 (sin esperas), para
+regresiones rápidas del flujo.
+
+Reporta por ejecución la latencia de turno p50/p95, la dispersión del p50
+entre ejecuciones, los flujos distintos (texto de Sofía + tool calls con
+sus argumentos) y las peticiones al LLM real.
+
+Uso:
+    python -m benchmarks.bench_llm_replay [entrevistas] [ejecuciones] [llm_ms] [jitter_ms] [--live]
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List
+
+from agent.llm_replay import LLM_REPLAY_DIR, IdTemplate, ReplayLLM, ReplayStore
+from benchmarks.bench_load import question_rows, run_interview
+from benchmarks.common import Stopwatch, StubServer, summarize
+from benchmarks.stubs import PostgrestStub, WebhookStub
+from benchmarks.voice_stubs import ScriptedLLM
+
+ARGS = {"stt_ms": 200, "tts_ms": 250, "think_s": 0.3}
+
+
+def flow(history) -> str:
+    """Huella de lo que produjo el LLM: texto de Sofía y tool calls (sin ids de la sesión)."""
+    template = IdTemplate()
+    steps = []
+    for item in history.items:
+        if item.type == "message" and item.role == "assistant":
+            steps.append(["say", item.text_content])
+        elif item.type == "function_call":
+            steps.append(["call", item.name, template.scrub(item.arguments)])
+    return hashlib.sha256(json.dumps(steps, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+
+async def run(n_interviews: int, args: Dict[str, Any], make_llm: Callable[[str], Any]) -> Dict[str, Any]:
+    latencies, histories = [], []
+    watch = Stopwatch()
+    results = await asyncio.gather(
+        *(run_interview(i, latencies, args, make_llm, histories) for i in range(n_interviews)),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors[:3]:
+        print(f"  ⚠️ sesión fallida: {error!r}")
+    # Huella de la ejecución: las de sus entrevistas, sin depender del orden en que terminan
+    run_flow = hashlib.sha256("".join(sorted(flow(h) for h in histories)).encode()).hexdigest()[:12]
+    return {
+        "turn": summarize(latencies),
+        "wall_s": watch.elapsed_ms() / 1000,
+        "completed": sum(1 for r in results if r is True),
+        "errors": len(errors),
+        "flow": run_flow,
+    }
+
+
+def print_run(label: str, result: Dict[str, Any], n_interviews: int):
+    turn = result["turn"]
+    print(f"  {label:<12} turno p50: {turn['p50']:5.0f} ms  p95: {turn['p95']:5.0f} ms   "
+          f"completas {result['completed']}/{n_interviews}   {result['wall_s']:5.1f} s   flujo {result['flow']}")
+
+
+def print_spread(results: List[Dict[str, Any]]):
+    p50s = [r["turn"]["p50"] for r in results]
+    print(f"  dispersión del p50 entre ejecuciones: {max(p50s) - min(p50s):.0f} ms   "
+          f"flujos distintos: {len({r['flow'] for r in results})}")
+
+
+async def main(n_interviews: int, runs: int, llm_ms: float, jitter_ms: float, live: bool):
+    logging.getLogger("sofia-agent").setLevel(logging.WARNING)
+    logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+
+    live_requests = []
+
+    if live:
+        from livekit.plugins import openai
+
+        def new_inner(_candidate_id):
+            inner = openai.LLM(model="gpt-4o-mini", temperature=0.8)
+            # Cada petición completada al LLM real emite sus métricas
+            inner.on("metrics_collected", lambda _metrics: live_requests.append(1))
+            return inner
+
+        directory, record_mode = LLM_REPLAY_DIR, "auto"
+        source = "gpt-4o-mini"
+    else:
+        inners = []
+
+        def new_inner(_candidate_id):
+            inner = ScriptedLLM(None, ttft_ms=llm_ms, jitter_ms=jitter_ms)
+            inners.append(inner)
+            return inner
+
+        directory, record_mode = tempfile.mkdtemp(prefix="llm-replay-"), "record"
+        source = f"ScriptedLLM {llm_ms:.0f} ms + 0..{jitter_ms:.0f} ms"
+
+    def inner_requests() -> int:
+        return len(live_requests) if live else sum(inner.requests for inner in inners)
+
+    postgrest = PostgrestStub({"tech_questions": question_rows(1)}, latency_ms=80)
+    webhook = WebhookStub(latency_ms=300)
+    with StubServer(postgrest) as db_server, StubServer(webhook) as webhook_server:
+        from tools import evaluation_question
+        from tools.http_client import close_http_client
+        from tools.repository import SupabaseRepository, set_repository
+        from tools.write_behind import WriteBehindStore, set_write_behind
+
+        evaluation_question.EVALUATION_WEBHOOK_URL = f"{webhook_server.url}/webhook/sofia_ai"
+        repository = SupabaseRepository(rest_url=f"{db_server.url}/rest/v1", key="stub-key")
+        set_repository(repository)
+        store = WriteBehindStore(repository=repository, dead_letter_path=f"{tempfile.mkdtemp()}/dead_letters.jsonl")
+        set_write_behind(store)
+
+        print(f"[INFO] {n_interviews} entrevistas por ejecución, {runs} ejecuciones; LLM: {source}; "
+              f"STT {ARGS['stt_ms']} ms, TTS {ARGS['tts_ms']} ms; grabaciones en {directory}")
+        # Calentamiento: imports, tokenizers y banco de preguntas en caché
+        await run_interview(-1, [], {**ARGS, "think_s": 0}, lambda _cid: ScriptedLLM(None, ttft_ms=0))
+
+        try:
+            print(f"\n[ANTES: LLM en vivo]")
+            before = []
+            for n in range(runs):
+                before.append(await run(n_interviews, ARGS, new_inner))
+                print_run(f"ejecución {n + 1}", before[-1], n_interviews)
+            print_spread(before)
+            print(f"  peticiones al LLM: {inner_requests()}")
+
+            print(f"\n[GRABACIÓN: {record_mode}]")
+            recordings = ReplayStore(directory)
+            requests = inner_requests()
+            recorded = await run(n_interviews, ARGS, lambda cid: ReplayLLM(new_inner(cid), mode=record_mode, store=recordings))
+            print_run("grabación", recorded, n_interviews)
+            print(f"  peticiones al LLM: {inner_requests() - requests}, grabaciones {recordings.stats()}")
+
+            print(f"\n[DESPUÉS: reproducción, sin LLM]")
+            replays = ReplayStore(directory)
+            requests = inner_requests()
+            after = []
+            for n in range(runs):
+                after.append(await run(n_interviews, ARGS, lambda cid: ReplayLLM(new_inner(cid), mode="replay", store=replays)))
+                print_run(f"ejecución {n + 1}", after[-1], n_interviews)
+            fast = await run(n_interviews, ARGS, lambda cid: ReplayLLM(new_inner(cid), mode="replay", store=replays, speed=0))
+            print_run("velocidad 0", fast, n_interviews)
+            print_spread(after)
+            replay_requests = inner_requests() - requests
+            print(f"  peticiones al LLM: {replay_requests}, grabaciones {replays.stats()}")
+
+            same = all(r["flow"] == recorded["flow"] for r in after + [fast])
+            ok = same and replay_requests == 0 and replays.misses == 0 and not any(r["errors"] for r in after)
+            print(f"\n[RESULTADO] {'flujo idéntico a la grabación en todas las reproducciones' if ok else 'la reproducción NO coincide con la grabación'}; "
+                  f"p50 grabación {recorded['turn']['p50']:.0f} ms vs reproducción "
+                  f"{summarize([r['turn']['p50'] for r in after])['p50']:.0f} ms")
+        finally:
+            if not live:
+                shutil.rmtree(directory, ignore_errors=True)
+            await store.aclose()
+            await repository.aclose()
+            await close_http_client()
+            set_repository(None)
+            set_write_behind(None)
+
+
+if __name__ == "__main__":
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    interviews = int(argv[0]) if len(argv) > 0 else 3
+    n_runs = int(argv[1]) if len(argv) > 1 else 3
+    ttft_ms = float(argv[2]) if len(argv) > 2 else 400
+    jitter = float(argv[3]) if len(argv) > 3 else 600
+    asyncio.run(main(interviews, n_runs, ttft_ms, jitter, "--live" in sys.argv))
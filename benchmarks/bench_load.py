@@ -0,0 +1,246 @@
+# benchmarks/bench_load.py
+"""
+Prueba de carga de un worker: N entrevistas concurrentes del ``Assistant``
+real (tools, InterviewState, ContextPolicy) en un solo proceso, contra
+stand-ins locales con latencia configurable:
+
+- LLM: ``ScriptedLLM`` (sigue el flujo del prompt con tool calls reales)
+- STT: retardo habla -> transcripción final antes de cada turno
+- TTS: ``SilentTTS`` + ``NullAudioOutput`` (pasa por el nodo TTS del agente)
+- Supabase: ``PostgrestStub`` (banco de preguntas y escrituras write-behind)
+- Webhook de evaluación: ``WebhookStub``
+
+La carga sube por niveles de sesiones concurrentes. Por nivel se reporta
+la latencia de turno (fin del habla del candidato -> primer audio de
+Sofía) p50/p95/p99, el lag del event loop, la CPU del hilo del loop por
+sesión y la memoria (RSS) por sesión. El nivel en que la latencia o el lag
+se disparan es el punto de saturación; una tool con I/O bloqueante aparece
+como lag del loop ya en los primeros niveles.
+
+Uso:
+    python -m benchmarks.bench_load [niveles] [preguntas_por_topic] [llm_ms] [stt_ms] [tts_ms] [db_ms] [webhook_ms]
+
+    python -m benchmarks.bench_load 1,10,25,50 2 400 200 250 80 600
+"""
+import asyncio
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import LoopLagMonitor, Stopwatch, StubServer, summarize
+from benchmarks.stubs import PostgrestStub, WebhookStub, sample_question_rows
+from benchmarks.voice_stubs import NullAudioOutput, ScriptedLLM, SilentTTS
+
+ANSWERS = [
+    "El HTML semántico usa etiquetas con significado como header, nav o article, y mejora la accesibilidad y el SEO.",
+    "Uno es un elemento de bloque y el otro en línea, se usan para agrupar contenido sin significado propio.",
+    "Sirve para describir la imagen a los lectores de pantalla y se muestra si la imagen no carga.",
+    "No estoy muy seguro, creo que tiene que ver con los estilos.",
+]
+# Degradación respecto al primer nivel a partir de la cual se considera saturado
+SATURATION_FACTOR = 1.5
+SATURATION_LAG_MS = 50
+
+
+def rss_mb() -> float:
+    """RSS actual del proceso (Linux); si no, el pico."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, rss_mb())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak = rss_mb()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> float:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return self.peak
+
+
+def question_rows(per_topic: int):
+    rows, seen = [], {}
+    for row in sample_question_rows():
+        topic = row["tech"]["name"]
+        if seen.get(topic, 0) < per_topic:
+            seen[topic] = seen.get(topic, 0) + 1
+            rows.append(row)
+    return rows
+
+
+async def run_interview(i: int, latencies: list, args, make_llm=None, histories=None) -> bool:
+    """
+    Una entrevista completa. ``make_llm(candidate_id)`` reemplaza al
+    ``ScriptedLLM``; en ``histories`` se deja el historial de la sesión.
+    """
+    from agent.agent import Assistant
+    from agent.interview_state import InterviewState
+    from tools.get_evaluation_criteria import load_evaluation_criteria
+    from tools.write_behind import get_write_behind
+    from livekit.agents import AgentSession
+
+    candidate_id = get_write_behind().register_candidate(
+        {"name": f"Candidato {i}", "email": f"c{i}-{uuid.uuid4().hex[:6]}@example.com", "status": "pending", "approved": False}
+    )
+    state = InterviewState(session_id=f"load-{i}", candidate_id=candidate_id)
+    criteria = await load_evaluation_criteria()
+    if criteria.get("success"):
+        state.load(criteria)
+
+    audio = NullAudioOutput()
+    session = AgentSession(
+        llm=make_llm(candidate_id) if make_llm else ScriptedLLM(candidate_id, ttft_ms=args["llm_ms"]),
+        tts=SilentTTS(ttfb_ms=args["tts_ms"]),
+        userdata=state,
+    )
+    session.output.audio = audio
+    await session.start(Assistant(state))
+
+    try:
+        turn = 0
+        user_text = "Sí, estoy listo."
+        while turn <= state.total_questions + 1:
+            await asyncio.sleep(args["think_s"])
+            watch = Stopwatch()
+            await asyncio.sleep(args["stt_ms"] / 1000)  # transcripción final
+            audio.first_audio_at = None
+            await session.run(user_input=user_text)
+            if audio.first_audio_at is not None:
+                latencies.append((audio.first_audio_at - watch.start) * 1000)
+            if state.finished:
+                break
+            user_text = ANSWERS[(i + turn) % len(ANSWERS)]
+            turn += 1
+        return state.finished
+    finally:
+        if histories is not None:
+            histories.append(session.history.copy())
+        await session.aclose()
+
+
+async def run_level(sessions: int, args):
+    latencies = []
+    lag = LoopLagMonitor()
+    rss = RssSampler()
+    rss_before = rss_mb()
+    cpu_before = time.thread_time()
+    await lag.start()
+    rss.start()
+
+    watch = Stopwatch()
+    results = await asyncio.gather(*(run_interview(i, latencies, args) for i in range(sessions)), return_exceptions=True)
+    wall_ms = watch.elapsed_ms()
+
+    cpu_ms = (time.thread_time() - cpu_before) * 1000
+    rss_peak = await rss.stop()
+    lag_stats = await lag.stop()
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors[:3]:
+        print(f"  ⚠️ sesión fallida: {error!r}")
+
+    return {
+        "sessions": sessions,
+        "completed": sum(1 for r in results if r is True),
+        "errors": len(errors),
+        "turn": summarize(latencies),
+        "lag": lag_stats,
+        "cpu_ms_per_session": cpu_ms / sessions,
+        "cpu_share": cpu_ms / wall_ms,
+        "rss_mb_per_session": max(0.0, rss_peak - rss_before) / sessions,
+        "rss_mb": rss_peak,
+        "wall_s": wall_ms / 1000,
+    }
+
+
+def print_level(result):
+    turn, lag = result["turn"], result["lag"]
+    print(f"  {result['sessions']:>4}  {result['completed']:>4}/{result['sessions']:<4}"
+          f"{turn['p50']:8.0f} {turn['p95']:8.0f} {turn['p99']:8.0f}   "
+          f"{lag['p95']:7.1f} {lag['max']:7.1f}   "
+          f"{result['cpu_ms_per_session']:8.0f} {result['cpu_share']:6.0%}   "
+          f"{result['rss_mb_per_session']:6.2f} {result['rss_mb']:7.0f}   {result['wall_s']:6.1f}")
+
+
+async def main(levels, per_topic: int, args):
+    # Los logs por turno del agente ensucian la tabla
+    logging.getLogger("sofia-agent").setLevel(logging.WARNING)
+    logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+
+    postgrest = PostgrestStub({"tech_questions": question_rows(per_topic)}, latency_ms=args["db_ms"])
+    webhook = WebhookStub(latency_ms=args["webhook_ms"])
+
+    with StubServer(postgrest) as db_server, StubServer(webhook) as webhook_server:
+        from tools import evaluation_question
+        from tools.http_client import close_http_client
+        from tools.repository import SupabaseRepository, set_repository
+        from tools.write_behind import WriteBehindStore, set_write_behind
+
+        evaluation_question.EVALUATION_WEBHOOK_URL = f"{webhook_server.url}/webhook/sofia_ai"
+        repository = SupabaseRepository(rest_url=f"{db_server.url}/rest/v1", key="stub-key")
+        set_repository(repository)
+        store = WriteBehindStore(repository=repository, dead_letter_path=f"{tempfile.mkdtemp()}/dead_letters.jsonl")
+        set_write_behind(store)
+
+        print(f"[INFO] niveles {levels}, {per_topic} preguntas por topic; latencias: LLM {args['llm_ms']:.0f} ms, "
+              f"STT {args['stt_ms']:.0f} ms, TTS {args['tts_ms']:.0f} ms, BD {args['db_ms']:.0f} ms, "
+              f"webhook {args['webhook_ms']:.0f} ms; el candidato piensa {args['think_s']:.1f} s por turno")
+        print(f"\n  {'ses':>4}  {'ok':<9}{'turno p50':>8} {'p95':>8} {'p99':>8}   "
+              f"{'lag p95':>7} {'max':>7}   {'cpu/ses':>8} {'loop':>6}   {'MB/ses':>6} {'RSS MB':>7}   {'wall s':>6}")
+
+        # Calentamiento fuera de la medición: imports, modelos cargados la primera vez
+        # (tokenizers) y banco de preguntas en caché
+        await run_interview(-1, [], {**args, "llm_ms": 0, "stt_ms": 0, "tts_ms": 0, "think_s": 0})
+
+        results = []
+        for sessions in levels:
+            result = await run_level(sessions, args)
+            print_level(result)
+            results.append(result)
+
+        await store.aclose()
+        baseline = results[0]["turn"]["p95"]
+        saturated = next((
+            r["sessions"] for r in results
+            if r["turn"]["p95"] > SATURATION_FACTOR * baseline or r["lag"]["p95"] > SATURATION_LAG_MS or r["errors"]
+        ), None)
+        print(f"\n[RESULTADO] {'saturación a partir de ' + str(saturated) + ' sesiones' if saturated else 'sin saturación en los niveles probados'} "
+              f"(p95 de turno > {SATURATION_FACTOR}x el primer nivel, lag p95 > {SATURATION_LAG_MS} ms o sesiones fallidas)")
+        print(f"  peticiones: BD {db_server.requests}, webhook {webhook.calls}; write-behind {store.stats()}")
+
+        await repository.aclose()
+        await close_http_client()
+        set_repository(None)
+        set_write_behind(None)
+
+
+if __name__ == "__main__":
+    n_levels = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "1,10,25,50").split(",")]
+    questions_per_topic = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    latencies_ms = {
+        "llm_ms": float(sys.argv[3]) if len(sys.argv) > 3 else 400,
+        "stt_ms": float(sys.argv[4]) if len(sys.argv) > 4 else 200,
+        "tts_ms": float(sys.argv[5]) if len(sys.argv) > 5 else 250,
+        "db_ms": float(sys.argv[6]) if len(sys.argv) > 6 else 80,
+        "webhook_ms": float(sys.argv[7]) if len(sys.argv) > 7 else 600,
+        "think_s": float(os.getenv("LOAD_THINK_SECONDS", "0.5")),
+    }
+
+    asyncio.run(main(n_levels, questions_per_topic, latencies_ms))
@@ -0,0 +1,93 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark del pipeline crawl -> chunk -> embed -> upsert de punta a punta.
+
+Sitio de documentación local + embedder falso + Qdrant en memoria. Compara el
+flujo anterior (crawl completo a un dict y después indexar) con el pipeline
+en streaming (cada página se trocea e indexa mientras el crawl continúa):
+
+- tiempo hasta el primer chunk indexado
+- tiempo total
+- pico de memoria (tracemalloc, en una pasada aparte)
+
+Uso:
+    python -m benchmarks.bench_pipeline [paginas] [latencia_pagina_ms] [latencia_embedding_ms]
+"""
+import asyncio
+import sys
+import tracemalloc
+
+from qdrant_client import AsyncQdrantClient
+
+from benchmarks.bench_crawler import make_docs_site
+from benchmarks.bench_indexer import DIM, make_fake_embedder
+from benchmarks.common import Stopwatch, StubServer
+from helpers.crawler import CrawlStats, crawl_docs_async, crawl_pages, index_pages
+from helpers.index_cache import IndexCache
+from helpers.indexer import ensure_collection
+
+
+async def index_once(pages_source, qdrant, collection, embed_latency_ms):
+    await ensure_collection(qdrant, collection, size=DIM)
+    embed, calls = make_fake_embedder(embed_latency_ms)
+    cache = IndexCache(":memory:")
+
+    watch = Stopwatch()
+    pages = await pages_source()
+    index_start_ms = watch.elapsed_ms()
+    stats = await index_pages(pages, collection, qdrant=qdrant, embed_fn=embed, cache=cache)
+    total_ms = watch.elapsed_ms()
+    cache.close()
+
+    first_ms = None
+    if stats.first_point_seconds is not None:
+        first_ms = index_start_ms + stats.first_point_seconds * 1000
+    return stats, calls["requests"], first_ms, total_ms
+
+
+async def run(label, pages_source, qdrant, collection, embed_latency_ms):
+    stats, requests, first_ms, total_ms = await index_once(pages_source, qdrant, collection, embed_latency_ms)
+
+    # Segunda pasada solo para medir memoria: tracemalloc ralentiza mucho el crawl
+    tracemalloc.start()
+    await index_once(pages_source, qdrant, f"{collection}-mem", embed_latency_ms)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return label, stats, requests, first_ms, total_ms, peak
+
+
+async def main(n_pages: int, page_latency_ms: float, embed_latency_ms: float):
+    qdrant = AsyncQdrantClient(":memory:")
+    results = []
+
+    with StubServer(make_docs_site(n_pages, page_latency_ms)) as server:
+        print(f"[INFO] Sitio local con {n_pages} páginas, {page_latency_ms:.0f} ms por página, "
+              f"{embed_latency_ms:.0f} ms por lote de embeddings\n")
+
+        async def batch_source():
+            # Flujo anterior: todo el sitio en memoria antes de indexar
+            scraped = await crawl_docs_async(server.url, "/docs", n_pages, rate_per_host=1000)
+            return scraped.items()
+
+        async def streaming_source():
+            return crawl_pages(server.url, "/docs", n_pages, rate_per_host=1000, stats=CrawlStats())
+
+        results.append(await run("ANTES: crawl completo -> indexar", batch_source, qdrant, "batch", embed_latency_ms))
+        results.append(await run("DESPUÉS: streaming con backpressure", streaming_source, qdrant, "streaming", embed_latency_ms))
+
+    for label, stats, requests, first_ms, total_ms, peak in results:
+        print(f"\n[{label}]")
+        print(f"  chunks: {stats.chunks}  puntos: {stats.points}  peticiones de embedding: {requests}")
+        print(f"  primer chunk indexado: {first_ms / 1000:.2f} s" if first_ms is not None else "  sin puntos indexados")
+        print(f"  tiempo total: {total_ms / 1000:.2f} s  pico de memoria: {peak / 1024 / 1024:.1f} MiB")
+
+    await qdrant.close()
+
+
+if __name__ == "__main__":
+    total_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    page_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    embed_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    asyncio.run(main(total_pages, page_latency, embed_latency))
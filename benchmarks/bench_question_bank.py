@@ -0,0 +1,78 @@
+# benchmarks/bench_question_bank.py
+"""
+Benchmark del banco de preguntas contra un PostgREST local simulado.
+
+Compara N entrevistas concurrentes consultando tech_questions cada una (sin
+caché) con la tool get_evaluation_criteria (caché por worker + repositorio
+asíncrono). Reporta round trips a la base de datos, latencia y lag del loop.
+
+Uso:
+    python -m benchmarks.bench_question_bank [entrevistas] [latencia_ms]
+"""
+import asyncio
+import sys
+
+from benchmarks.common import LoopLagMonitor, Stopwatch, StubServer, summarize
+from benchmarks.stubs import PostgrestStub, sample_question_rows
+from tools.repository import SupabaseRepository, set_repository
+
+
+async def run_interviews(load, interviews: int):
+    latencies = []
+
+    async def interview():
+        watch = Stopwatch()
+        result = await load()
+        latencies.append(watch.elapsed_ms())
+        assert result["success"], result
+
+    monitor = LoopLagMonitor()
+    await monitor.start()
+    await asyncio.gather(*(interview() for _ in range(interviews)))
+    return summarize(latencies), await monitor.stop()
+
+
+def print_report(name: str, db_calls: int, latency: dict, lag: dict):
+    print(f"\n[{name}]")
+    print(f"  round trips a la BD: {db_calls}")
+    print(f"  latencia p50: {latency['p50']:.1f} ms  p95: {latency['p95']:.1f} ms")
+    print(f"  loop lag p95: {lag['p95']:.1f} ms  max: {lag['max']:.1f} ms")
+
+
+async def main(interviews: int, latency_ms: float):
+    stub = PostgrestStub({"tech_questions": sample_question_rows()}, latency_ms=latency_ms)
+
+    with StubServer(stub) as server:
+        repository = SupabaseRepository(rest_url=f"{server.url}/rest/v1", key="stub-key")
+        set_repository(repository)
+        repository.client  # Crear el cliente fuera de la medición
+
+        from tools.get_evaluation_criteria import (
+            build_question_bank,
+            get_evaluation_criteria,
+            question_bank_cache_stats,
+        )
+
+        async def uncached():
+            return build_question_bank(await repository.fetch_questions())
+
+        print(f"[INFO] {interviews} entrevistas concurrentes, PostgREST con {latency_ms:.0f} ms")
+
+        before = server.requests
+        latency, lag = await run_interviews(uncached, interviews)
+        print_report("SIN CACHÉ", server.requests - before, latency, lag)
+
+        before = server.requests
+        latency, lag = await run_interviews(get_evaluation_criteria, interviews)
+        print_report("CON CACHÉ", server.requests - before, latency, lag)
+        print(f"  stats: {question_bank_cache_stats()}")
+
+        await repository.aclose()
+        set_repository(None)
+
+
+if __name__ == "__main__":
+    n_interviews = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    db_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 80
+
+    asyncio.run(main(n_interviews, db_latency))
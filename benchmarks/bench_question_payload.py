@@ -0,0 +1,144 @@
+# benchmarks/bench_question_payload.py
+"""
+Tokens de prompt por turno con el resultado de get_evaluation_criteria en
+formato completo y compacto.
+
+El resultado de la tool queda en el contexto del LLM durante toda la
+entrevista, así que su tamaño se paga en cada turno. Se simula una
+entrevista (system prompt + resultado de la tool + por turno: respuesta
+del candidato, llamada a evaluation_question y respuesta de Sofía) y se
+cuentan los tokens de prompt de cada turno.
+
+La variante con límite por topic usa una muestra con más preguntas por
+topic que el límite (si se pide menos, se amplía) y comprueba que el
+resultado se recorta y ocupa menos tokens.
+
+Con ``--live`` (requiere OPENAI_API_KEY) mide además el tiempo hasta el
+primer token de gpt-4o-mini en cada turno.
+
+Uso:
+    python -m benchmarks.bench_question_payload [preguntas_por_topic_en_bd] [turnos] [--live]
+"""
+import asyncio
+import json
+import os
+import sys
+
+from benchmarks.common import Stopwatch, summarize
+from benchmarks.stubs import sample_question_rows
+from helpers.tokens import count_tokens
+from prompts.sofia_prompt import SOFIA_SYSTEM_PROMPT
+from tools.get_evaluation_criteria import PROMPT_TOKEN_MODEL, build_question_bank, encode_question_bank
+
+ANSWER = "Bueno, yo creo que la diferencia principal es que uno se usa para el contenido y el otro para el estilo, " * 2
+EVALUATION = {"success": True, "score": 70, "message": "Buena respuesta, podrías profundizar en la accesibilidad."}
+REPLY = "Muy bien, buen punto. Pasemos a la siguiente pregunta: ¿qué es el modelo de caja en CSS?"
+# Preguntas por topic de la variante recortada
+PER_TOPIC_LIMIT = 4
+
+
+def make_rows(per_topic: int):
+    """Exactamente ``per_topic`` preguntas por topic (variantes de las de ejemplo)."""
+    rows, counts = [], {}
+    for k in range(-(-per_topic // 3)):
+        for row in sample_question_rows():
+            topic = row["tech"]["name"]
+            if counts.get(topic, 0) >= per_topic:
+                continue
+            counts[topic] = counts.get(topic, 0) + 1
+            rows.append({
+                **row,
+                "id": row["id"] + 100 * k,
+                "question": row["question"] + (f" (variante {k})" if k else ""),
+                "difficulty": row["difficulty"] + 3 * k,
+            })
+    return sorted(rows, key=lambda r: r["difficulty"])
+
+
+def build_messages(payload, turns: int):
+    """Mensajes de chat en cada turno de la entrevista simulada."""
+    messages = [
+        {"role": "system", "content": SOFIA_SYSTEM_PROMPT},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_0", "type": "function", "function": {"name": "get_evaluation_criteria", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": "call_0", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+
+    for turn in range(turns):
+        messages.append({"role": "user", "content": ANSWER})
+        yield list(messages)
+
+        call_id = f"call_{turn + 1}"
+        arguments = json.dumps({"response": ANSWER, "topic": "HTML"}, ensure_ascii=False)
+        messages.append({"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "evaluation_question", "arguments": arguments}}
+        ]})
+        messages.append({"role": "tool", "tool_call_id": call_id, "content": json.dumps(EVALUATION, ensure_ascii=False)})
+        messages.append({"role": "assistant", "content": REPLY})
+
+
+def prompt_tokens(messages) -> int:
+    return sum(count_tokens(json.dumps(message, ensure_ascii=False), PROMPT_TOKEN_MODEL) for message in messages)
+
+
+async def measure_ttft(client, messages):
+    watch = Stopwatch()
+    stream = await client.chat.completions.create(
+        model=PROMPT_TOKEN_MODEL, messages=messages, stream=True, max_tokens=20,
+    )
+    ttft = None
+    async for chunk in stream:
+        if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+            ttft = watch.elapsed_ms()
+    return ttft or watch.elapsed_ms()
+
+
+async def main(per_topic_in_db: int, turns: int, live: bool):
+    if per_topic_in_db <= PER_TOPIC_LIMIT:
+        # Con menos preguntas que el límite la variante recortada no recortaría nada
+        print(f"[INFO] {per_topic_in_db} preguntas por topic no superan el límite de {PER_TOPIC_LIMIT}: "
+              f"se usan {PER_TOPIC_LIMIT * 2}")
+        per_topic_in_db = PER_TOPIC_LIMIT * 2
+    bank = build_question_bank(make_rows(per_topic_in_db))
+    limited = encode_question_bank(bank, "compact", per_topic=PER_TOPIC_LIMIT)
+    variants = {
+        "ANTES: completo": encode_question_bank(bank, "full"),
+        "DESPUÉS: compacto": encode_question_bank(bank, "compact"),
+        f"DESPUÉS: compacto, {PER_TOPIC_LIMIT} por topic": limited,
+    }
+
+    client = None
+    if live:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    print(f"[INFO] {bank['total_questions']} preguntas en la BD, {turns} turnos\n")
+    for label, payload in variants.items():
+        per_turn = [prompt_tokens(messages) for messages in build_messages(payload, turns)]
+        print(f"[{label}]")
+        print(f"  resultado de la tool: {payload['tokens']} tokens ({payload['total_questions']} preguntas)")
+        print(f"  tokens de prompt: primer turno {per_turn[0]}  último {per_turn[-1]}  total {sum(per_turn)}")
+
+        if client is not None:
+            ttfts = [await measure_ttft(client, messages) for messages in build_messages(payload, turns)]
+            stats = summarize(ttfts)
+            print(f"  primer token: p50 {stats['p50']:.0f} ms  p95 {stats['p95']:.0f} ms")
+        print()
+
+    compact = variants["DESPUÉS: compacto"]
+    trimmed = all(len(questions) == PER_TOPIC_LIMIT for questions in limited["topics"].values())
+    assert trimmed and limited["tokens"] < compact["tokens"], "el límite por topic no recortó el resultado"
+    print(f"[RESULTADO] límite por topic: {compact['total_questions']} -> {limited['total_questions']} preguntas "
+          f"({PER_TOPIC_LIMIT} por topic), {compact['tokens']} -> {limited['tokens']} tokens")
+
+    if client is not None:
+        await client.close()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    db_per_topic = int(args[0]) if len(args) > 0 else 15
+    total_turns = int(args[1]) if len(args) > 1 else 16
+
+    asyncio.run(main(db_per_topic, total_turns, "--live" in sys.argv))
@@ -0,0 +1,79 @@
+# benchmarks/bench_reindex.py
+"""
+Benchmark de re-indexación incremental (Qdrant en memoria + caché SQLite).
+
+Indexa un corpus sintético, modifica y elimina una fracción de las páginas
+y vuelve a indexar: solo los chunks cambiados deben embeberse y escribirse,
+y los de páginas eliminadas deben borrarse.
+
+Uso:
+    python -m benchmarks.bench_reindex [paginas] [fraccion_cambios]
+"""
+import asyncio
+import sys
+
+from qdrant_client import AsyncQdrantClient
+
+from benchmarks.bench_indexer import DIM, make_fake_embedder
+from benchmarks.common import Stopwatch
+from helpers.index_cache import IndexCache
+from helpers.indexer import ensure_collection, index_incremental
+
+
+SITE = "https://docs.example.com/"
+
+
+def make_pages(n: int, version: dict):
+    pages = {}
+    for i in range(n):
+        if version.get(i) == "deleted":
+            continue
+        suffix = f" (revisión {version[i]})" if i in version else ""
+        pages[f"{SITE}page-{i}"] = [
+            f"Página {i}, sección {k}: " + "contenido " * 200 + suffix
+            for k in range(5)
+        ]
+    return pages
+
+
+def page_chunks(pages: dict):
+    for url, chunks in pages.items():
+        for chunk in chunks:
+            yield {"url": url, "content": chunk, "topic": "TanStack"}
+
+
+async def run(label, pages, qdrant, cache, embed, calls):
+    before = calls["requests"]
+    watch = Stopwatch()
+    stats = await index_incremental(page_chunks(pages), qdrant, "docs", embed_fn=embed, cache=cache, batch_size=64,
+                                    prune_missing_pages=True, url_prefix=SITE)
+    count = (await qdrant.count("docs")).count
+    print(f"\n[{label}]")
+    print(f"  chunks: {stats.chunks + stats.unchanged}  sin cambios: {stats.unchanged}  escritos: {stats.points}  borrados: {stats.deleted}")
+    print(f"  peticiones de embedding: {calls['requests'] - before}  puntos en Qdrant: {count}  tiempo: {watch.elapsed_ms():.0f} ms")
+
+
+async def main(n_pages: int, change_ratio: float):
+    qdrant = AsyncQdrantClient(":memory:")
+    await ensure_collection(qdrant, "docs", size=DIM)
+    cache = IndexCache(":memory:")
+    embed, calls = make_fake_embedder(latency_ms=20)
+
+    await run("INDEXACIÓN INICIAL", make_pages(n_pages, {}), qdrant, cache, embed, calls)
+    await run("RE-CRAWL SIN CAMBIOS", make_pages(n_pages, {}), qdrant, cache, embed, calls)
+
+    changed = max(1, int(n_pages * change_ratio))
+    version = {i: 2 for i in range(changed)}
+    version.update({n_pages - 1 - i: "deleted" for i in range(changed // 2)})
+    await run(f"RE-CRAWL: {changed} páginas modificadas, {changed // 2} eliminadas", make_pages(n_pages, version), qdrant, cache, embed, calls)
+
+    print(f"\n[INFO] Caché de embeddings: {cache.hits} hits, {cache.misses} misses")
+    cache.close()
+    await qdrant.close()
+
+
+if __name__ == "__main__":
+    pages_total = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    asyncio.run(main(pages_total, ratio))
@@ -0,0 +1,160 @@
+# benchmarks/bench_tts_cache.py
+"""
+Benchmark del TTS de Sofía: síntesis por frases con caché de audio.
+
+Reproduce lo que Sofía dice en una entrevista (saludo, feedback + transición
++ pregunta por cada respuesta, despedida) llegando palabra a palabra como
+desde el LLM, contra un TTS falso sin streaming con latencia fija por
+petición (``SilentTTS``, como ElevenLabs por frases):
+
+ANTES: ``StreamAdapter`` de livekit (una frase tras otra, sin caché).
+DESPUÉS (sesión en frío): ``CachedTTS`` con caché vacía (solo el adelanto de frases).
+DESPUÉS (caché precargada): ``CachedTTS`` tras ``presynthesize`` del banco de
+preguntas; solo el feedback, que cambia en cada respuesta, llega a la API.
+
+Mide por turno el tiempo hasta el primer audio (desde el primer token) y
+hasta el último, y por sesión las peticiones y caracteres enviados al TTS.
+
+Uso:
+    python -m benchmarks.bench_tts_cache [sesiones] [ttfb_tts_ms] [ms_por_palabra]
+"""
+import asyncio
+import itertools
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from livekit.agents import tts
+
+from agent.interview_state import InterviewState
+from agent.tts_cache import AudioCache, CachedTTS, interview_utterances
+from benchmarks.common import Stopwatch, summarize
+from benchmarks.stubs import sample_question_rows
+from benchmarks.voice_stubs import FAREWELL, SilentTTS
+from prompts.sofia_prompt import GREETING, READY_QUESTION, TOPIC_TRANSITION
+
+VOICE_ID = "bench-voice"
+SESSION_IDS = itertools.count(1)
+
+# El feedback lleva el nombre del candidato: como en producción, no se repite entre sesiones
+FEEDBACKS = [
+    "Muy bien, {name}, mencionaste los puntos clave.",
+    "Correcto, {name}, aunque podrías profundizar un poco más en los detalles.",
+    "Buena respuesta, {name}, se nota que lo has usado en proyectos reales.",
+    "Es un buen comienzo, {name}; te faltó mencionar algunos casos de uso.",
+]
+
+
+def interview_state() -> InterviewState:
+    questions = defaultdict(list)
+    for row in sample_question_rows():
+        questions[row["tech"]["name"]].append(row)
+    state = InterviewState()
+    state.load({"questions": questions})
+    return state
+
+
+def session_turns(state: InterviewState, name: str) -> List[Tuple[str, str]]:
+    """(tipo, texto) de cada turno de Sofía en una entrevista completa."""
+    feedbacks = [feedback.format(name=name) for feedback in FEEDBACKS]
+    turns = [("saludo", f"{GREETING} {READY_QUESTION}")]
+    previous_topic = None
+    i = 0
+    while (question := state.advance()) is not None:
+        parts = [] if previous_topic is None else [feedbacks[i % len(feedbacks)]]
+        if question["topic"] != previous_topic:
+            parts.append(TOPIC_TRANSITION.format(topic=question["topic"]))
+        parts.append(question["question"])
+        turns.append(("pregunta", " ".join(parts)))
+        previous_topic = question["topic"]
+        i += 1
+    turns.append(("despedida", f"{feedbacks[i % len(feedbacks)]} {FAREWELL}"))
+    return turns
+
+
+async def speak(engine: tts.TTS, text: str, word_ms: float) -> Tuple[float, float]:
+    """Envía ``text`` palabra a palabra y devuelve (ms hasta el primer audio, ms hasta el último)."""
+    stream = engine.stream()
+
+    async def _push():
+        for word in text.split(" "):
+            stream.push_text(word + " ")
+            await asyncio.sleep(word_ms / 1000)
+        stream.end_input()
+
+    watch = Stopwatch()
+    pusher = asyncio.create_task(_push())
+    first_ms = last_ms = None
+    async for ev in stream:
+        if ev.frame is not None and ev.frame.samples_per_channel:
+            last_ms = watch.elapsed_ms()
+            first_ms = last_ms if first_ms is None else first_ms
+    await pusher
+    await stream.aclose()
+    return first_ms or 0.0, last_ms or 0.0
+
+
+async def run_sessions(engine: tts.TTS, silent: SilentTTS, sessions: int, word_ms: float) -> Dict[str, object]:
+    first: Dict[str, List[float]] = defaultdict(list)
+    total: Dict[str, List[float]] = defaultdict(list)
+    requests_before, chars_before = silent.requests, silent.chars
+    for _ in range(sessions):
+        session_id = next(SESSION_IDS)
+        for kind, text in session_turns(interview_state(), f"candidato {session_id}"):
+            first_ms, last_ms = await speak(engine, text, word_ms)
+            first[kind].append(first_ms)
+            total[kind].append(last_ms)
+    return {
+        "first": first,
+        "total": total,
+        "requests": (silent.requests - requests_before) / sessions,
+        "chars": (silent.chars - chars_before) / sessions,
+    }
+
+
+def print_result(name: str, result: Dict[str, object]):
+    print(f"\n[{name}]")
+    for kind in ("saludo", "pregunta", "despedida"):
+        first = summarize(result["first"][kind])
+        total = summarize(result["total"][kind])
+        print(f"  {kind:<10} primer audio p50: {first['p50']:6.0f} ms  p95: {first['p95']:6.0f} ms   "
+              f"último audio p50: {total['p50']:6.0f} ms")
+    print(f"  por sesión: {result['requests']:.0f} peticiones al TTS, {result['chars']:.0f} caracteres")
+
+
+async def main(sessions: int, ttfb_ms: float, word_ms: float):
+    turns = session_turns(interview_state(), "candidato")
+    print(f"[INFO] {sessions} sesiones x {len(turns)} turnos de Sofía, "
+          f"TTS {ttfb_ms:.0f} ms por petición, LLM {word_ms:.0f} ms por palabra")
+
+    silent = SilentTTS(ttfb_ms=ttfb_ms)
+    print_result("ANTES: StreamAdapter, sin caché",
+                 await run_sessions(tts.StreamAdapter(tts=silent), silent, sessions, word_ms))
+
+    cache_dir = tempfile.mkdtemp(prefix="tts-cache-")
+    try:
+        silent = SilentTTS(ttfb_ms=ttfb_ms)
+        cached = CachedTTS(silent, voice_id=VOICE_ID, cache=AudioCache(cache_dir))
+        print_result("DESPUÉS: por frases, caché vacía (1 sesión)",
+                     await run_sessions(cached, silent, 1, word_ms))
+
+        silent = SilentTTS(ttfb_ms=ttfb_ms)
+        cached = CachedTTS(silent, voice_id=VOICE_ID, cache=AudioCache(tempfile.mkdtemp(dir=cache_dir)))
+        watch = Stopwatch()
+        presynth = await cached.presynthesize(interview_utterances(interview_state()))
+        print(f"\n[INFO] pre-síntesis del banco: {presynth['synthesized']} frases en {watch.elapsed_ms():.0f} ms "
+              f"({silent.requests} peticiones, {silent.chars} caracteres, una vez por worker)")
+        print_result("DESPUÉS: por frases, caché precargada",
+                     await run_sessions(cached, silent, sessions, word_ms))
+        print(f"  caché: {cached.cache.stats()}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    tts_ttfb_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 250
+    llm_word_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 30
+    asyncio.run(main(n_sessions, tts_ttfb_ms, llm_word_ms))
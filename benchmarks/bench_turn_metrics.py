@@ -0,0 +1,120 @@
+# benchmarks/bench_turn_metrics.py
+"""
+Simula turnos de voz con mensajes reales de livekit (``ChatMessage`` con sus
+métricas por turno: EOU, STT, LLM, TTS) y llamadas a tools, y los pasa por
+``SessionMetrics``:
+
+- coste por span registrado (histogramas + exportadores)
+- histogramas p50/p95/p99 por sesión y por worker
+- salida JSONL y, si prometheus_client está instalado, el texto de /metrics
+
+Uso:
+    python -m benchmarks.bench_turn_metrics [sesiones] [turnos_por_sesion]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from livekit.agents.llm import ChatMessage
+
+from agent.metrics import (
+    PROMETHEUS_AVAILABLE,
+    JsonlExporter,
+    SessionMetrics,
+    current_session_metrics,
+    timed_tool,
+    worker_latency,
+)
+
+
+@timed_tool("evaluation_question")
+async def fake_evaluation_question(rng: random.Random):
+    await asyncio.sleep(rng.uniform(0.05, 0.4) / 10)
+    return {"success": True}
+
+
+def turn_messages(rng: random.Random, turn_id: str):
+    """Mensaje del usuario y respuesta del agente, como en ``conversation_item_added``."""
+    yield ChatMessage(
+        id=f"{turn_id}-user", role="user", content=["..."],
+        metrics={
+            "end_of_turn_delay": rng.uniform(0.3, 0.9),
+            "transcription_delay": rng.uniform(0.1, 0.4),
+            "on_user_turn_completed_delay": 0.0,
+        },
+    )
+    yield ChatMessage(
+        id=f"{turn_id}-agent", role="assistant", content=["..."],
+        metrics={
+            "llm_node_ttft": rng.uniform(0.25, 1.1),
+            "llm_node_tps": 50.0,
+            "tts_node_ttfb": rng.uniform(0.15, 0.6),
+        },
+    )
+
+
+async def run_session(session_id: str, turns: int, exporters, rng: random.Random, cost_us):
+    session_metrics = SessionMetrics(session_id, exporters)
+    current_session_metrics.set(session_metrics)
+
+    for turn in range(turns):
+        turn_id = f"{session_id}-turn-{turn}"
+        session_metrics.on_user_state("listening")
+
+        for message in turn_messages(rng, turn_id):
+            start = time.perf_counter()
+            session_metrics.on_chat_item(message)
+            cost_us.append((time.perf_counter() - start) * 1e6)
+
+        await fake_evaluation_question(rng)
+        session_metrics.on_agent_state("speaking")
+
+    return session_metrics.close()
+
+
+async def main(sessions: int, turns: int):
+    rng = random.Random(3)
+    cost_us = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "turns.jsonl")
+
+        for i in range(sessions):
+            # Cada sesión en su propia tarea, como cada job del worker
+            summary = await asyncio.create_task(run_session(f"job-{i}", turns, [JsonlExporter(path)], rng, cost_us))
+
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+
+    cost_us.sort()
+    print(f"[INFO] {sessions} sesiones x {turns} turnos, {len(lines)} líneas JSONL\n")
+    print(f"[COSTE POR MÉTRICA] p50: {cost_us[len(cost_us) // 2]:.1f} µs  max: {cost_us[-1]:.1f} µs\n")
+
+    print("[ÚLTIMA SESIÓN]")
+    for stage, stats in summary.items():
+        print(f"  {stage:28s} {stats}")
+
+    print("\n[WORKER]")
+    for stage, stats in worker_latency.summary().items():
+        print(f"  {stage:28s} {stats}")
+
+    if PROMETHEUS_AVAILABLE:
+        from prometheus_client import generate_latest
+
+        from agent.metrics import PrometheusExporter
+
+        exporter = PrometheusExporter(port=0)
+        exporter.export({"type": "span", "stage": "llm_ttft", "ms": 420.0})
+        text = generate_latest().decode()
+        print("\n[PROMETHEUS]")
+        print("\n".join(line for line in text.splitlines() if line.startswith("sofia_turn_stage_seconds_count")))
+
+
+if __name__ == "__main__":
+    total_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    turns_per_session = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    asyncio.run(main(total_sessions, turns_per_session))
@@ -0,0 +1,200 @@
+# benchmarks/bench_worker.py
+"""
+Benchmark del worker multi-entrevista (``WORKER_EXECUTOR=thread``).
+
+Llegan entrevistas a ritmo fijo a un worker; cada una aceptada corre el
+``Assistant`` real (``run_interview`` de ``bench_load``) en su propio hilo
+con su event loop, como el ejecutor de hilos de LiveKit, más el camino de
+audio: un stream del VAD Silero compartido del proceso que recibe audio en
+tiempo real mientras dura la entrevista.
+
+ANTES: sin ``load_fnc`` propia, acepta todo (en desarrollo LiveKit no
+limita; en producción solo mira la CPU de la máquina).
+DESPUÉS: ``WorkerLoad`` (sesiones, CPU, lag de los loops) decide cada
+llegada; las rechazadas irían a otro worker.
+
+Reporta aceptadas/rechazadas, sesiones simultáneas, latencia de turno,
+lag de los event loops y RSS pico (la memoria por job la marca el prewarm:
+un VAD por job frente al compartido).
+
+Uso:
+    python -m benchmarks.bench_worker [entrevistas] [llegadas_por_s] [max_sesiones] [preguntas_por_topic]
+"""
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_load import RssSampler, question_rows, rss_mb, run_interview
+from benchmarks.common import StubServer, summarize
+from benchmarks.stubs import PostgrestStub, WebhookStub
+
+ARGS = {"llm_ms": 400, "stt_ms": 200, "tts_ms": 250, "think_s": 0.5}
+# Audio del candidato: frames de 10 ms a 16 kHz
+SAMPLE_RATE = 16000
+FRAME_MS = 10
+
+
+async def feed_vad(vad, stop: asyncio.Event) -> None:
+    """Audio (silencio) en tiempo real a un stream del VAD compartido, como una sesión."""
+    from livekit import rtc
+
+    stream = vad.stream()
+    samples = SAMPLE_RATE * FRAME_MS // 1000
+    silence = b"\x00\x00" * samples
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+
+    async def _drain():
+        async for _ in stream:
+            pass
+
+    drain = asyncio.create_task(_drain())
+    while not stop.is_set():
+        stream.push_frame(rtc.AudioFrame(silence, SAMPLE_RATE, 1, samples))
+        next_at += FRAME_MS / 1000
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+    stream.end_input()
+    await stream.aclose()
+    drain.cancel()
+    await asyncio.gather(drain, return_exceptions=True)
+
+
+async def job(i: int, vad, db_url: str, dead_letters: str, latencies: list) -> bool:
+    """Un job en su hilo: clientes propios (JobLocal) y VAD compartido."""
+    from agent.worker import close_job_resources, watch_loop_lag
+    from tools.repository import SupabaseRepository, set_repository
+    from tools.write_behind import WriteBehindStore, set_write_behind
+
+    repository = SupabaseRepository(rest_url=f"{db_url}/rest/v1", key="stub-key")
+    set_repository(repository)
+    set_write_behind(WriteBehindStore(repository=repository, dead_letter_path=dead_letters))
+
+    callbacks = []
+    ctx = type("JobCtx", (), {"add_shutdown_callback": lambda self, cb: callbacks.append(cb)})()
+    watch_loop_lag(ctx)
+    stop = asyncio.Event()
+    audio = asyncio.create_task(feed_vad(vad, stop))
+    try:
+        return await run_interview(i, latencies, ARGS)
+    finally:
+        stop.set()
+        await audio
+        for callback in callbacks:
+            await callback()
+        await close_job_resources()
+
+
+def run_worker(name: str, n_jobs: int, rate: float, vad, db_url: str, load=None):
+    """Llegadas a ritmo fijo; cada job aceptado corre en un hilo con su event loop."""
+    from agent.worker import loop_lag_ms
+
+    latencies, results, threads = [], [], []
+    active = []
+    rejected = 0
+    peak = 0
+    lag_samples = []
+    dead_letters = f"{tempfile.mkdtemp()}/dead_letters.jsonl"
+    rss = RssSampler()
+    rss_before = rss_mb()
+
+    def _thread(i: int):
+        try:
+            results.append(asyncio.run(job(i, vad, db_url, dead_letters, latencies)))
+        except Exception as e:
+            results.append(e)
+        finally:
+            active.remove(i)
+
+    async def _sample():
+        rss.start()
+        started = time.perf_counter()
+        while threads == [] or any(t.is_alive() for t in threads) or time.perf_counter() - started < n_jobs / rate:
+            lag_samples.append(loop_lag_ms())
+            await asyncio.sleep(0.5)
+        return await rss.stop()
+
+    sampler_result = {}
+    sampler = threading.Thread(target=lambda: sampler_result.update(rss=asyncio.run(_sample())), daemon=True)
+    sampler.start()
+
+    for i in range(n_jobs):
+        if load is not None and load.load(len(active)) >= load.threshold:
+            rejected += 1
+        else:
+            active.append(i)
+            peak = max(peak, len(active))
+            thread = threading.Thread(target=_thread, args=(i,), daemon=True)
+            threads.append(thread)
+            thread.start()
+        time.sleep(1 / rate)
+
+    for thread in threads:
+        thread.join()
+    sampler.join()
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors[:3]:
+        print(f"  ⚠️ sesión fallida: {error!r}")
+    turn = summarize(latencies) if latencies else {"p50": 0, "p95": 0, "p99": 0}
+    lag = summarize(lag_samples) if lag_samples else {"p95": 0, "max": 0}
+    print(f"\n[{name}]")
+    print(f"  aceptadas {len(threads)}/{n_jobs} (rechazadas {rejected}), simultáneas máx. {peak}, "
+          f"completas {sum(1 for r in results if r is True)}, fallidas {len(errors)}")
+    print(f"  turno p50: {turn['p50']:5.0f} ms  p95: {turn['p95']:5.0f} ms  p99: {turn['p99']:5.0f} ms   "
+          f"lag de los loops p95: {lag['p95']:5.1f} ms  max: {lag['max']:5.1f} ms   "
+          f"RSS pico {sampler_result.get('rss', rss_before):.0f} MB")
+
+
+def prewarm_cost(n_jobs: int):
+    """Coste de cargar el VAD en cada job frente a compartirlo."""
+    from agent.agent import load_vad, shared_vad
+
+    shared_vad()  # primera carga (imports, onnxruntime) fuera de la medición
+    before, start = rss_mb(), time.perf_counter()
+    models = [load_vad() for _ in range(3)]
+    per_job_ms = (time.perf_counter() - start) * 1000 / len(models)
+    per_job_mb = max(0.0, rss_mb() - before) / len(models)
+    start = time.perf_counter()
+    for _ in range(n_jobs):
+        shared_vad()
+    shared_ms = (time.perf_counter() - start) * 1000
+    print(f"[INFO] prewarm del VAD para {n_jobs} jobs: uno por job {per_job_ms * n_jobs:.0f} ms, "
+          f"~{per_job_mb * n_jobs:.0f} MB; compartido {shared_ms:.1f} ms, 0 MB adicionales")
+    del models
+
+
+def main(n_jobs: int, rate: float, max_sessions: int, per_topic: int):
+    logging.getLogger("sofia-agent").setLevel(logging.ERROR)
+    logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+    logging.getLogger("livekit.plugins.silero").setLevel(logging.ERROR)
+
+    from agent.agent import load_plugins, shared_vad
+    from agent.worker import WorkerLoad
+    from tools import evaluation_question
+
+    load_plugins()
+    prewarm_cost(n_jobs)
+    vad = shared_vad()
+
+    postgrest = PostgrestStub({"tech_questions": question_rows(per_topic)}, latency_ms=80)
+    webhook = WebhookStub(latency_ms=600)
+    with StubServer(postgrest) as db_server, StubServer(webhook) as webhook_server:
+        evaluation_question.EVALUATION_WEBHOOK_URL = f"{webhook_server.url}/webhook/sofia_ai"
+        print(f"[INFO] {n_jobs} entrevistas, {rate:g} llegadas/s, {per_topic} preguntas por topic, "
+              f"una por hilo con su event loop; VAD compartido con audio en tiempo real")
+
+        run_worker("ANTES: acepta todo", n_jobs, rate, vad, db_server.url)
+        load = WorkerLoad(max_sessions=max_sessions, threads=True)
+        run_worker(f"DESPUÉS: WorkerLoad (máx. {max_sessions} sesiones, CPU, lag)", n_jobs, rate, vad, db_server.url, load)
+        print(f"  última carga: { {k: round(v, 2) for k, v in load.last.items()} }")
+
+
+if __name__ == "__main__":
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    arrivals = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+    sessions = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    questions = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    main(jobs, arrivals, sessions, questions)
@@ -0,0 +1,161 @@
+# benchmarks/bench_write_behind.py
+"""
+Escrituras de candidatos y evaluaciones durante la entrevista contra un
+PostgREST local con latencia y errores inyectados (``PostgrestStub``).
+
+Cada sesión registra al candidato, guarda una evaluación por respuesta,
+actualiza sus notas a mitad de entrevista y su estado al final.
+
+ANTES: cada escritura espera a la BD dentro del turno (una petición por
+escritura; un error pierde la escritura).
+DESPUÉS: write-behind: la tool responde al instante (el alta solo espera a
+la lectura que comprueba si el email ya existe, como mucho
+``WRITE_BEHIND_PRECHECK_TIMEOUT``), los cambios se juntan por
+candidato y se escriben en lote con reintentos idempotentes.
+
+Uso:
+    python -m benchmarks.bench_write_behind [sesiones] [respuestas] [latencia_ms] [error_rate]
+"""
+import asyncio
+import sys
+import tempfile
+import uuid
+
+from benchmarks.common import LoopLagMonitor, Stopwatch, StubServer, summarize
+from benchmarks.stubs import PostgrestStub
+from tools.repository import SupabaseRepository, set_repository
+from tools.write_behind import WRITE_BEHIND_PRECHECK_TIMEOUT, WriteBehindStore
+
+
+class DirectWrites:
+    """Escrituras como antes: cada una espera a la BD."""
+
+    def __init__(self, repository: SupabaseRepository):
+        self.repository = repository
+        self.lost = 0
+
+    async def _safe(self, call):
+        try:
+            return await call
+        except Exception:
+            self.lost += 1
+            return None
+
+    async def register_candidate(self, candidate):
+        created = await self._safe(self.repository.insert_candidate(candidate))
+        return created["id"] if created else str(uuid.uuid4())
+
+    async def update_candidate(self, candidate_id, changes):
+        await self._safe(self.repository.update_candidate(candidate_id, changes))
+
+    async def add_evaluation(self, record):
+        await self._safe(self.repository.insert_evaluations([record]))
+
+
+class WriteBehindWrites:
+    def __init__(self, store: WriteBehindStore):
+        self.store = store
+
+    async def register_candidate(self, candidate):
+        # Comprobación previa de register_candidate (email duplicado)
+        if not self.store.email_registered(candidate["email"]):
+            try:
+                await asyncio.wait_for(self.store.repository.find_candidate_by_email(candidate["email"]),
+                                       timeout=WRITE_BEHIND_PRECHECK_TIMEOUT)
+            except Exception:
+                pass
+        return self.store.register_candidate(candidate)
+
+    async def update_candidate(self, candidate_id, changes):
+        # Comprobación previa de update_candidate_status (candidato de otro job)
+        if not self.store.is_registered(candidate_id):
+            try:
+                await asyncio.wait_for(self.store.repository.candidate_exists(candidate_id),
+                                       timeout=WRITE_BEHIND_PRECHECK_TIMEOUT)
+            except Exception:
+                pass
+        self.store.update_candidate(candidate_id, changes)
+
+    async def add_evaluation(self, record):
+        self.store.add_evaluation(record)
+
+
+async def run_sessions(writes, sessions: int, answers: int):
+    latencies = []
+
+    async def timed(call):
+        watch = Stopwatch()
+        result = await call
+        latencies.append(watch.elapsed_ms())
+        return result
+
+    async def session(i: int):
+        candidate_id = await timed(writes.register_candidate(
+            {"name": f"Candidato {i}", "email": f"c{i}@example.com", "status": "pending", "approved": False}
+        ))
+        for j in range(answers):
+            await timed(writes.add_evaluation(
+                {"candidate_id": candidate_id, "question_id": j, "topic": "HTML", "score": 70 + j, "notes": "ok"}
+            ))
+            if j == answers // 2:
+                await timed(writes.update_candidate(candidate_id, {"overall_notes": "A mitad de la entrevista"}))
+            await asyncio.sleep(0.05)  # El candidato responde
+        await timed(writes.update_candidate(candidate_id, {"status": "approved", "approved": True}))
+
+    monitor = LoopLagMonitor()
+    await monitor.start()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return summarize(latencies), await monitor.stop()
+
+
+def print_report(name: str, stub: PostgrestStub, requests: int, latency, lag, sessions: int, answers: int):
+    candidates = stub.tables.get("candidates", [])
+    evaluations = stub.tables.get("evaluations", [])
+    final = sum(1 for c in candidates if c.get("status") == "approved")
+    print(f"\n[{name}]")
+    print(f"  latencia en el turno p50: {latency['p50']:.2f} ms  p95: {latency['p95']:.2f} ms  max: {latency['max']:.1f} ms")
+    print(f"  loop lag p95: {lag['p95']:.1f} ms")
+    print(f"  peticiones a la BD: {requests} (errores inyectados: {stub.errors})")
+    print(f"  filas: candidatos {len(candidates)}/{sessions} (aprobados {final})  "
+          f"evaluaciones {len(evaluations)}/{sessions * answers}")
+
+
+async def main(sessions: int, answers: int, latency_ms: float, error_rate: float):
+    print(f"[INFO] {sessions} sesiones x {answers} respuestas, PostgREST con {latency_ms:.0f} ms "
+          f"y {error_rate:.0%} de escrituras fallidas")
+
+    for label, make_writes in (
+        ("ANTES: escritura directa en el turno", lambda repo: DirectWrites(repo)),
+        ("DESPUÉS: write-behind", lambda repo: WriteBehindWrites(WriteBehindStore(
+            repository=repo, flush_interval=0.5, backoff=0.2,
+            dead_letter_path=f"{tempfile.mkdtemp()}/dead_letters.jsonl",
+        ))),
+    ):
+        stub = PostgrestStub(latency_ms=latency_ms, error_rate=error_rate)
+        with StubServer(stub) as server:
+            repository = SupabaseRepository(rest_url=f"{server.url}/rest/v1", key="stub-key")
+            set_repository(repository)
+            repository.client
+
+            writes = make_writes(repository)
+            latency, lag = await run_sessions(writes, sessions, answers)
+            if isinstance(writes, WriteBehindWrites):
+                watch = Stopwatch()
+                await writes.store.aclose(timeout=30)
+                print_report(label, stub, server.requests, latency, lag, sessions, answers)
+                print(f"  flush final: {watch.elapsed_ms():.0f} ms  stats: {writes.store.stats()}")
+            else:
+                print_report(label, stub, server.requests, latency, lag, sessions, answers)
+                print(f"  escrituras perdidas: {writes.lost}")
+
+            await repository.aclose()
+            set_repository(None)
+
+
+if __name__ == "__main__":
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_answers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    db_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 120
+    errors = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+
+    asyncio.run(main(n_sessions, n_answers, db_latency, errors))
@@ -0,0 +1,165 @@
+# benchmarks/common.py
+"""
+Utilidades compartidas por los benchmarks: servidor HTTP local de pruebas,
+monitor de lag del event loop y cálculo de percentiles.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolación lineal (0 si no hay datos)."""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Resumen p50/p95/p99/max de una lista de muestras."""
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+# Un handler recibe (method, path, body) y devuelve (status, headers, body)
+Handler = Callable[[str, str, bytes], Tuple[int, Dict[str, str], bytes]]
+
+
+def json_response(data: Any, status: int = 200) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"Content-Type": "application/json"}, json.dumps(data).encode("utf-8")
+
+
+class StubServer:
+    """
+    Servidor HTTP local en un hilo aparte, para simular webhooks, PostgREST
+    o sitios de documentación sin salir a la red.
+
+    Uso:
+        with StubServer(handler) as server:
+            url = server.url
+    """
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 0):
+        self._handler = handler
+        self._host = host
+        self._port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_request_handler(self):
+        stub = self
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                stub.requests += 1
+
+                status, headers, payload = stub._handler(self.command, self.path, body)
+
+                try:
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # El cliente ya se fue (timeout simulado): no es un error del stub
+                    self.close_connection = True
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        return _RequestHandler
+
+    def start(self) -> "StubServer":
+        server_class = type("_StubHTTPServer", (ThreadingHTTPServer,), {"request_queue_size": 256})
+        self._server = server_class((self._host, self._port), self._make_request_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._server = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class LoopLagMonitor:
+    """
+    Mide cuánto se retrasa el event loop: programa un sleep corto en bucle
+    y registra el exceso sobre el intervalo esperado (en milisegundos).
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            self.samples.append(max(lag, 0.0) * 1000)
+
+    async def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+        # Ceder el control para que el monitor arranque antes de la carga
+        await asyncio.sleep(0)
+
+    async def stop(self) -> Dict[str, float]:
+        # Dar al monitor la ocasión de registrar un último bloqueo pendiente
+        await asyncio.sleep(self.interval * 2)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        return summarize(self.samples)
+
+
+class Stopwatch:
+    """Cronómetro simple en milisegundos."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
@@ -0,0 +1,221 @@
+# benchmarks/stubs.py
+"""
+Stand-ins locales de servicios externos para benchmarks y pruebas manuales.
+
+- ``PostgrestStub``: imita lo mínimo de PostgREST (select con ``order`` y
+  ``limit``, insert, upsert y update con filtro ``eq``) sobre tablas en
+  memoria.
+- ``WebhookStub``: webhook de evaluación con latencia y errores inyectables,
+  que se pueden cambiar en caliente para simular caídas.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.common import json_response
+
+
+def sample_question_rows() -> List[Dict[str, Any]]:
+    """Banco de preguntas de ejemplo con la forma que devuelve tech_questions."""
+    bank = {
+        "HTML": [
+            "¿Qué es el HTML semántico y por qué es importante?",
+            "¿Cuál es la diferencia entre las etiquetas div y span?",
+            "¿Para qué sirve el atributo alt en las imágenes?",
+        ],
+        "CSS": [
+            "¿Qué es el modelo de caja en CSS?",
+            "¿Cuál es la diferencia entre Flexbox y Grid?",
+            "¿Cómo funciona la especificidad de los selectores?",
+        ],
+        "JavaScript": [
+            "¿Cuál es la diferencia entre let, const y var?",
+            "¿Qué es una closure?",
+            "¿Cómo funcionan las promesas y async/await?",
+        ],
+        "Tools": [
+            "¿Para qué sirve Git y qué es un branch?",
+            "¿Qué hace un bundler como Vite o Webpack?",
+            "¿Cómo depuras un error en el navegador?",
+        ],
+    }
+
+    rows = []
+    ids = itertools.count(1)
+    for tech_id, (topic, questions) in enumerate(bank.items(), start=1):
+        for difficulty, question in enumerate(questions, start=1):
+            rows.append({
+                "id": next(ids),
+                "question": question,
+                "difficulty": difficulty,
+                "tech": {"name": topic},
+                "tech_id": tech_id,
+                "updated_at": "2024-01-01T00:00:00+00:00",
+            })
+
+    return sorted(rows, key=lambda r: r["difficulty"])
+
+
+class PostgrestStub:
+    """
+    Handler para ``StubServer`` que responde como PostgREST en ``/rest/v1``.
+
+    Args:
+        tables: Filas iniciales por tabla
+        latency_ms: Latencia artificial por petición
+        error_rate: Fracción de escrituras que responden 503 (0-1)
+    """
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        latency_ms: float = 0,
+        error_rate: float = 0.0,
+        seed: int = 7,
+    ):
+        self.tables: Dict[str, List[Dict[str, Any]]] = tables or {}
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.calls: Dict[str, int] = {}
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _count(self, method: str, table: str) -> None:
+        key = f"{method} {table}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+    def __call__(self, method: str, path: str, body: bytes):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        parsed = urlparse(path)
+        table = parsed.path.rsplit("/", 1)[-1]
+        query = parse_qs(parsed.query)
+
+        with self._lock:
+            self._count(method, table)
+            rows = self.tables.setdefault(table, [])
+
+            if method != "GET" and self._random.random() < self.error_rate:
+                self.errors += 1
+                return json_response({"message": "service unavailable"}, status=503)
+
+            if method == "GET":
+                selected, total = self._select(rows, query)
+                status, headers, payload = json_response(selected)
+                # Total sin limit, como PostgREST con Prefer: count=exact
+                headers["Content-Range"] = f"0-{max(len(selected) - 1, 0)}/{total}"
+                return status, headers, payload
+
+            if method == "POST":
+                payload = json.loads(body or b"[]")
+                records = payload if isinstance(payload, list) else [payload]
+                on_conflict = query.get("on_conflict", ["id"])[0]
+                return json_response(self._upsert(rows, records, on_conflict), status=201)
+
+            if method == "PATCH":
+                changes = json.loads(body or b"{}")
+                matched = self._filter(rows, query)
+                for row in matched:
+                    row.update(changes)
+                return json_response(matched)
+
+            if method == "DELETE":
+                matched = self._filter(rows, query)
+                self.tables[table] = [row for row in rows if row not in matched]
+                return json_response(matched)
+
+        return json_response({"message": "method not allowed"}, status=405)
+
+    @staticmethod
+    def _filter(rows, query) -> List[Dict[str, Any]]:
+        filters = {
+            key: value[0][3:]
+            for key, value in query.items()
+            if value and value[0].startswith("eq.")
+        }
+        return [
+            row for row in rows
+            if all(str(row.get(key)) == expected for key, expected in filters.items())
+        ]
+
+    def _select(self, rows, query) -> Tuple[List[Dict[str, Any]], int]:
+        """Filas seleccionadas y el total que cumple el filtro (antes de ``limit``)."""
+        matched = self._filter(rows, query)
+        total = len(matched)
+        columns = query.get("select", ["*"])[0]
+
+        if "order" in query:
+            column, _, direction = query["order"][0].partition(".")
+            present = [row for row in matched if row.get(column) is not None]
+            present.sort(key=lambda row: row[column], reverse=direction.startswith("desc"))
+            matched = present + [row for row in matched if row.get(column) is None]
+        if "limit" in query:
+            matched = matched[:int(query["limit"][0])]
+
+        if columns == "id":
+            return [{"id": row.get("id")} for row in matched], total
+        return [dict(row) for row in matched], total
+
+    @staticmethod
+    def _upsert(rows, records, on_conflict: str) -> List[Dict[str, Any]]:
+        stored = []
+        for record in records:
+            record = dict(record)
+            record.setdefault("id", len(rows) + 1)
+
+            existing = next(
+                (row for row in rows if row.get(on_conflict) == record.get(on_conflict)),
+                None,
+            )
+            if existing is not None:
+                existing.update(record)
+                stored.append(dict(existing))
+            else:
+                rows.append(record)
+                stored.append(dict(record))
+
+        return stored
+
+
+class WebhookStub:
+    """
+    Handler para ``StubServer`` que responde como el webhook de evaluación.
+
+    Args:
+        latency_ms: Latencia artificial por petición
+        error_rate: Fracción de peticiones que responden 503 (0-1)
+        seed: Semilla de los errores aleatorios
+    """
+
+    def __init__(self, latency_ms: float = 0, error_rate: float = 0.0, seed: int = 7):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, method: str, path: str, body: bytes):
+        with self._lock:
+            self.calls += 1
+            latency_ms = self.latency_ms
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if failed:
+            return json_response({"message": "service unavailable"}, status=503)
+
+        payload = json.loads(body or b"{}")
+        return json_response({
+            "message": f"Buena respuesta sobre {payload.get('topic', 'el tema')}",
+            "score": 80,
+        })
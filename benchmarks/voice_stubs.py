@@ -0,0 +1,229 @@
+# benchmarks/voice_stubs.py
+"""
+Stand-ins en proceso del pipeline de voz para correr el ``Assistant`` real
+(tools, ContextPolicy, InterviewState) sin red: un LLM que sigue el flujo
+de la entrevista, un TTS que devuelve silencio y una salida de audio que
+no reproduce nada. Todos con latencia configurable.
+
+La STT no tiene stand-in propio: las sesiones reciben el texto del
+candidato con ``AgentSession.run`` y su latencia (habla -> transcripción
+final) se simula con un ``sleep`` antes de cada turno.
+"""
+import ast
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from livekit import rtc
+from livekit.agents import llm, tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+from livekit.agents.voice import io
+
+FAREWELL = "Gracias por tu tiempo. El equipo te contactará con los siguientes pasos. ¡Mucho éxito!"
+PASS_SCORE = 70
+
+
+def _tool_output(item: Any) -> Dict[str, Any]:
+    """Resultado de una tool: JSON (precarga) o repr del dict (LiveKit)."""
+    try:
+        return json.loads(item.output)
+    except ValueError:
+        return ast.literal_eval(item.output) if item.output else {}
+
+
+def _last_turn_item(chat_ctx: llm.ChatContext) -> Optional[Any]:
+    """Último item que no sea un mensaje de sistema (el progreso por turno lo es)."""
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role in ("system", "developer"):
+            continue
+        return item
+    return None
+
+
+def _last_question(chat_ctx: llm.ChatContext):
+    """(payload de la última pregunta servida, True si ya se le hizo al candidato)."""
+    asked = False
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role == "assistant":
+            asked = True
+        if item.type == "function_call_output" and item.name in ("next_question", "record_answer"):
+            output = _tool_output(item)
+            return (output if item.name == "next_question" else output.get("next", {})), asked
+    return None, False
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    def __init__(self, fake: "ScriptedLLM", *, chat_ctx: llm.ChatContext, tools: List[Any], conn_options: APIConnectOptions):
+        super().__init__(fake, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._fake = fake
+        self._request_id = str(uuid.uuid4())
+
+    def _tool_call(self, name: str, arguments: Dict[str, Any]) -> None:
+        call = llm.FunctionToolCall(
+            name=name,
+            arguments=json.dumps(arguments, ensure_ascii=False),
+            call_id=f"call_{uuid.uuid4().hex[:12]}",
+        )
+        self._event_ch.send_nowait(llm.ChatChunk(
+            id=self._request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=[call])
+        ))
+
+    async def _say(self, text: str) -> None:
+        for word in text.split(" "):
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=self._request_id, delta=llm.ChoiceDelta(role="assistant", content=word + " ")
+            ))
+            await asyncio.sleep(self._fake.token_ms / 1000)
+
+    async def _run(self) -> None:
+        fake = self._fake
+        fake.requests += 1
+        await asyncio.sleep((fake.ttft_ms + fake.random.uniform(0, fake.jitter_ms)) / 1000)
+
+        last = _last_turn_item(self._chat_ctx)
+        if last is not None and last.type == "function_call_output":
+            output = _tool_output(last)
+            if last.name in ("next_question", "record_answer"):
+                question, _ = _last_question(self._chat_ctx)
+                if not question:
+                    await self._say("Un momento, por favor.")
+                elif question.get("done"):
+                    self._tool_call("complete_evaluation", {"candidate_id": fake.candidate_id} if fake.candidate_id else {})
+                else:
+                    feedback = output.get("feedback") or "Gracias, respuesta registrada."
+                    prefix = "" if last.name == "next_question" else f"{feedback} "
+                    await self._say(f"{prefix}Siguiente pregunta: {question['question']}")
+            elif last.name == "complete_evaluation":
+                approved = (output.get("overall_score") or 0) >= PASS_SCORE
+                candidate_id = output.get("candidate_id") or fake.candidate_id
+                self._tool_call("update_candidate_status", {"candidate_id": candidate_id, "approved": approved})
+            else:
+                await self._say(FAREWELL)
+            return
+
+        # Turno del candidato
+        question, asked = _last_question(self._chat_ctx)
+        if question is None:
+            self._tool_call("next_question", {})
+        elif not asked:
+            # Primera pregunta precargada en el contexto: hacerla sin otra tool call
+            await self._say(f"Perfecto, empecemos. {question['question']}")
+        elif question.get("done"):
+            await self._say(FAREWELL)
+        else:
+            self._tool_call("record_answer", {"response": last.text_content if last is not None else ""})
+
+
+class ScriptedLLM(llm.LLM):
+    """
+    LLM que sigue el flujo del prompt de Sofía a partir del contexto:
+    next_question -> pregunta -> record_answer -> feedback + siguiente ->
+    complete_evaluation -> update_candidate_status -> despedida.
+
+    Args:
+        candidate_id: candidate_id que pasa a complete_evaluation (None = el
+            de la sesión; update_candidate_status usa el que devuelve)
+        ttft_ms: Tiempo hasta el primer token de cada respuesta
+        token_ms: Tiempo entre palabras del texto generado
+        jitter_ms: Variación aleatoria (0..jitter_ms) del tiempo hasta el primer token, como la red
+    """
+
+    def __init__(self, candidate_id: Optional[str], ttft_ms: float = 400, token_ms: float = 15, jitter_ms: float = 0):
+        super().__init__()
+        self.candidate_id = candidate_id
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random()
+        self.requests = 0
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[List[Any]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs: Any,
+    ) -> ScriptedLLMStream:
+        return ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class SilentChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: SilentTTS = self._tts
+        fake.requests += 1
+        fake.chars += len(self._input_text)
+        await asyncio.sleep(fake.ttfb_ms / 1000)
+
+        output_emitter.initialize(
+            request_id=str(uuid.uuid4()),
+            sample_rate=fake.sample_rate,
+            num_channels=fake.num_channels,
+            mime_type="audio/pcm",
+        )
+        seconds = len(self._input_text) / fake.chars_per_second
+        output_emitter.push(b"\x00\x00" * int(fake.sample_rate * seconds))
+        output_emitter.flush()
+
+
+class SilentTTS(tts.TTS):
+    """
+    TTS sin streaming (como ElevenLabs por frases vía StreamAdapter) que
+    devuelve silencio con la duración que tendría el texto hablado.
+
+    Args:
+        ttfb_ms: Tiempo hasta el primer audio de cada frase
+        chars_per_second: Velocidad de habla para calcular la duración del audio
+    """
+
+    def __init__(self, ttfb_ms: float = 250, chars_per_second: float = 15, sample_rate: int = 24000):
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=sample_rate, num_channels=1)
+        self.ttfb_ms = ttfb_ms
+        self.chars_per_second = chars_per_second
+        self.requests = 0
+        self.chars = 0
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> SilentChunkedStream:
+        return SilentChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class NullAudioOutput(io.AudioOutput):
+    """
+    Salida de audio que descarta los frames (sin reproducirlos en tiempo
+    real) y anota cuándo llega el primer audio de cada respuesta.
+    """
+
+    def __init__(self):
+        super().__init__(label="NullAudioOutput", capabilities=io.AudioOutputCapabilities(pause=False))
+        self.first_audio_at: Optional[float] = None
+        self._capturing = False
+        self._position = 0.0
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._capturing:
+            self._capturing = True
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+            self.on_playback_started(created_at=time.time())
+        self._position += frame.duration
+
+    def _finish(self, interrupted: bool) -> None:
+        if self._capturing:
+            self._capturing = False
+            self.on_playback_finished(playback_position=self._position, interrupted=interrupted)
+            self._position = 0.0
+
+    def flush(self) -> None:
+        super().flush()
+        self._finish(interrupted=False)
+
+    def clear_buffer(self) -> None:
+        self._finish(interrupted=True)
@@ -0,0 +1,295 @@
+# helpers/chunker.py
+"""
+Chunker por tokens que respeta la estructura del documento.
+
+El HTML se convierte primero en un markdown ligero (``# títulos``, párrafos
+separados por línea en blanco, ``- listas`` y bloques de código con ```),
+que es también el formato que se guarda en los TXT. Sobre ese texto:
+
+- Se cuentan tokens reales del modelo de embeddings (tiktoken si está
+  instalado; si no, una estimación de ~4 caracteres por token)
+- Nunca se corta a mitad de frase ni de bloque de código, salvo que una sola
+  frase o línea supere el máximo
+- Cada chunk lleva la ruta de títulos en la que está (``heading_path``)
+- Solape configurable entre chunks consecutivos de la misma sección
+- Todo es un generador: una página grande no crea listas intermedias
+"""
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from bs4 import Comment, NavigableString, Tag
+
+from helpers.tokens import EMBEDDING_MODEL, count_tokens, encoding_for, estimate_tokens
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "400"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+
+
+# ==========================
+# TOKENS
+# ==========================
+
+def split_by_tokens(text: str, max_tokens: int, model: str = EMBEDDING_MODEL) -> Iterator[str]:
+    """Corta un texto sin estructura (una frase o línea enorme) en ventanas de tokens."""
+    encoding = encoding_for(model)
+
+    if encoding is not None:
+        ids = encoding.encode(text, disallowed_special=())
+        for start in range(0, len(ids), max_tokens):
+            yield encoding.decode(ids[start:start + max_tokens])
+        return
+
+    words = text.split()
+    current: List[str] = []
+    tokens = 0
+    for word in words:
+        word_tokens = estimate_tokens(word + " ")
+        if current and tokens + word_tokens > max_tokens:
+            yield " ".join(current)
+            current, tokens = [], 0
+        current.append(word)
+        tokens += word_tokens
+    if current:
+        yield " ".join(current)
+
+
+# ==========================
+# HTML -> MARKDOWN LIGERO
+# ==========================
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "nav", "footer", "button", "form"}
+TEXT_BLOCK_TAGS = {"p", "li", "dt", "dd", "blockquote", "figcaption", "caption", "td", "th", "summary"}
+BLOCK_TAGS = HEADING_TAGS | TEXT_BLOCK_TAGS | {
+    "pre", "div", "section", "article", "main", "ul", "ol", "dl", "table", "thead",
+    "tbody", "tr", "details", "figure", "aside", "header", "body", "html",
+}
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _has_block_child(tag: Tag) -> bool:
+    return tag.find(BLOCK_TAGS) is not None
+
+
+def _emit(tag: Tag, blocks: List[str]) -> None:
+    name = tag.name
+
+    if name in SKIPPED_TAGS:
+        return
+
+    if name in HEADING_TAGS:
+        title = _clean(tag.get_text(" "))
+        if title:
+            blocks.append(f"{'#' * int(name[1])} {title}")
+        return
+
+    if name == "pre":
+        code = tag.get_text().strip("\n")
+        if code.strip():
+            blocks.append(f"```\n{code}\n```")
+        return
+
+    if name in TEXT_BLOCK_TAGS and not _has_block_child(tag):
+        text = _clean(tag.get_text(" "))
+        if text:
+            blocks.append(f"- {text}" if name == "li" else text)
+        return
+
+    # Contenedor: agrupar el contenido inline consecutivo en un párrafo
+    inline: List[str] = []
+
+    def flush_inline():
+        text = _clean(" ".join(inline))
+        if text:
+            blocks.append(text)
+        inline.clear()
+
+    for child in tag.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            inline.append(str(child))
+        elif isinstance(child, Tag):
+            if child.name in SKIPPED_TAGS:
+                continue
+            if child.name not in BLOCK_TAGS and not _has_block_child(child):
+                inline.append(child.get_text(" "))
+            else:
+                flush_inline()
+                _emit(child, blocks)
+
+    flush_inline()
+
+
+def html_to_markdown(root: Tag) -> str:
+    """Convierte un elemento HTML en markdown ligero conservando su estructura."""
+    blocks: List[str] = []
+    _emit(root, blocks)
+    return "\n\n".join(blocks)
+
+
+# ==========================
+# BLOQUES Y CHUNKS
+# ==========================
+
+@dataclass
+class Block:
+    kind: str  # "heading" | "text" | "code"
+    text: str
+    level: int = 0
+
+
+@dataclass
+class TextChunk:
+    text: str
+    tokens: int
+    heading_path: List[str] = field(default_factory=list)
+
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+
+
+def iter_blocks(text: str) -> Iterator[Block]:
+    """Recorre el markdown ligero línea a línea y emite títulos, párrafos y código."""
+    paragraph: List[str] = []
+    code: Optional[List[str]] = None
+
+    def flush_paragraph():
+        if paragraph:
+            block = Block("text", " ".join(paragraph))
+            paragraph.clear()
+            return block
+        return None
+
+    for raw_line in io.StringIO(text):
+        line = raw_line.rstrip("\n")
+
+        if code is not None:
+            if line.strip().startswith("```"):
+                yield Block("code", "```\n" + "\n".join(code) + "\n```")
+                code = None
+            else:
+                code.append(line)
+            continue
+
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            if (block := flush_paragraph()) is not None:
+                yield block
+            code = []
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            if (block := flush_paragraph()) is not None:
+                yield block
+            yield Block("heading", heading.group(2).strip(), len(heading.group(1)))
+            continue
+
+        if not stripped:
+            if (block := flush_paragraph()) is not None:
+                yield block
+            continue
+
+        # Cada elemento de lista es su propio bloque
+        if stripped.startswith("- ") and paragraph:
+            yield flush_paragraph()
+
+        paragraph.append(stripped)
+
+    if code is not None:
+        yield Block("code", "```\n" + "\n".join(code) + "\n```")
+    if (block := flush_paragraph()) is not None:
+        yield block
+
+
+def _pieces(block: Block, max_tokens: int, model: str) -> Iterator[str]:
+    """Divide un bloque en piezas indivisibles: frases o líneas de código."""
+    if count_tokens(block.text, model) <= max_tokens:
+        yield block.text
+        return
+
+    units = block.text.split("\n") if block.kind == "code" else _SENTENCE_RE.split(block.text)
+    for unit in units:
+        if count_tokens(unit, model) <= max_tokens:
+            yield unit
+        else:
+            yield from split_by_tokens(unit, max_tokens, model)
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: int = CHUNK_TOKENS,
+    overlap: int = CHUNK_OVERLAP,
+    model: str = EMBEDDING_MODEL,
+) -> Iterator[TextChunk]:
+    """
+    Genera chunks de como máximo ``max_tokens`` tokens.
+
+    Args:
+        text: Markdown ligero (ver ``html_to_markdown``) o texto plano
+        max_tokens: Tokens máximos por chunk
+        overlap: Tokens del final de un chunk que se repiten al inicio del
+            siguiente dentro de la misma sección
+    """
+    heading_path: List[str] = []
+    current: List[tuple] = []  # (pieza, tokens, nº de bloque, separador interno)
+    current_tokens = 0
+
+    def emit():
+        parts = []
+        previous = None
+        for piece, _, block_id, joiner in current:
+            if previous is not None:
+                parts.append(joiner if block_id == previous else "\n\n")
+            parts.append(piece)
+            previous = block_id
+
+        chunk_text = "".join(parts)
+        return TextChunk(
+            text=chunk_text,
+            tokens=count_tokens(chunk_text, model),
+            heading_path=list(heading_path),
+        )
+
+    for block_id, block in enumerate(iter_blocks(text)):
+        if block.kind == "heading":
+            if current:
+                yield emit()
+            current, current_tokens = [], 0
+            heading_path[block.level - 1:] = [block.text]
+            continue
+
+        joiner = "\n" if block.kind == "code" else " "
+
+        for piece in _pieces(block, max_tokens, model):
+            # +1 por el separador entre piezas
+            piece_tokens = count_tokens(piece, model) + 1
+
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield emit()
+
+                # Solape: arrastrar las últimas piezas hasta ``overlap`` tokens
+                carried: List[tuple] = []
+                carried_tokens = 0
+                for prev in reversed(current):
+                    prev_tokens = prev[1]
+                    if carried_tokens + prev_tokens > overlap or carried_tokens + prev_tokens + piece_tokens > max_tokens:
+                        break
+                    carried.insert(0, prev)
+                    carried_tokens += prev_tokens
+                current, current_tokens = carried, carried_tokens
+
+            current.append((piece, piece_tokens, block_id, joiner))
+            current_tokens += piece_tokens
+
+    if current:
+        yield emit()
@@ -1,18 +1,31 @@
 import sys
-import uuid
 import json
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple, Union
 import requests
+import httpx
 import re
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from collections import deque
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
 
-from qdrant_client import QdrantClient
-from qdrant_client.http import models as qmodels
-from openai import OpenAI
+from qdrant_client import AsyncQdrantClient
+from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 
+from helpers.chunker import CHUNK_TOKENS, html_to_markdown, iter_chunks
+from helpers.index_cache import IndexCache, open_index_cache
+from helpers.indexer import (
+    EmbedFn,
+    IndexStats,
+    as_async_iter,
+    ensure_collection,
+    index_incremental,
+    openai_embedder,
+)
+
 
 # ==========================
 # CONFIGURACIÓN PRINCIPAL
@@ -25,7 +38,16 @@ QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
 MAX_PAGES = 300
-CHUNK_TOKENS = 400
+
+# Crawler: workers concurrentes y peticiones por segundo por host
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "16"))
+CRAWL_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "20"))
+
+# Páginas descargadas que pueden esperar a ser procesadas (backpressure)
+CRAWL_BUFFER_PAGES = int(os.getenv("CRAWL_BUFFER_PAGES", "32"))
+
+# Fuente de páginas del pipeline: (url, texto)
+PageSource = Union[Iterable[Tuple[str, str]], AsyncIterable[Tuple[str, str]]]
 
 
 # ==========================
@@ -52,21 +74,65 @@ def generate_filename_from_url(base_url: str) -> str:
 # SCRAPER
 # ==========================
 
+USER_AGENT = "Mozilla/5.0 HackatonBot"
+SKIPPED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".pdf", ".zip", ".css", ".js")
+
+# Parámetros querystring que no cambian el contenido de la página
+IGNORED_QUERY_PARAMS = {"ref", "source", "fbclid", "gclid"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normaliza una URL para deduplicar páginas:
+    - Elimina el fragmento (#seccion)
+    - Pasa esquema y dominio a minúsculas y quita el puerto por defecto
+    - Elimina la barra final (excepto en la raíz)
+    - Descarta parámetros de tracking (utm_*, ref, ...) y ordena el resto
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = parsed.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.startswith("utm_") and key not in IGNORED_QUERY_PARAMS
+    ]
+    query = urlencode(sorted(params))
+
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+def parse_page(url: str, html: str):
+    """
+    Parsea el HTML una sola vez y devuelve (texto, enlaces absolutos).
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    links = [urljoin(url, a["href"]) for a in soup.find_all("a", href=True)]
+
+    # Texto como markdown ligero: conserva títulos, párrafos y bloques de código
+    root = soup.find("article") or soup.body or soup
+    return html_to_markdown(root), links
+
+
 def scrape_html(url: str) -> str:
     print(f"[SCRAPER] {url}")
 
     resp = requests.get(url, timeout=10, headers={
-        "User-Agent": "Mozilla/5.0 HackatonBot"
+        "User-Agent": USER_AGENT
     })
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    article = soup.find("article")
-    if article:
-        return article.get_text(" ", strip=True)
-
-    return soup.get_text(" ", strip=True)
+    text, _ = parse_page(url, resp.text)
+    return text
 
 
 def is_internal_link(url: str, base_domain: str) -> bool:
@@ -74,37 +140,156 @@ def is_internal_link(url: str, base_domain: str) -> bool:
     return (not parsed.netloc) or (parsed.netloc == base_domain)
 
 
-def crawl_docs(base_url: str, start_path: str, max_pages: int = MAX_PAGES):
-    base_domain = urlparse(base_url).netloc
-
-    queue = deque([urljoin(base_url, start_path)])
-    visited = set()
-    scraped = {}
+class HostRateLimiter:
+    """
+    Limita las peticiones por host a ``rate`` peticiones por segundo,
+    espaciándolas de forma uniforme.
+    """
 
-    while queue and len(scraped) < max_pages:
-        current = queue.popleft()
-        if current in visited:
-            continue
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
 
-        visited.add(current)
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
 
-        if any(current.endswith(ext) for ext in [".png", ".jpg", ".svg", ".pdf"]):
-            continue
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
 
-        try:
-            text = scrape_html(current)
-            scraped[current] = text
-        except Exception as e:
-            print(f"[ERROR] {current}: {e}")
-            continue
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-        try:
-            html = requests.get(current).text
-            soup = BeautifulSoup(html, "lxml")
 
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-                full = urljoin(current, href)
+async def load_robots(client: httpx.AsyncClient, base_url: str) -> RobotFileParser:
+    """Descarga robots.txt del sitio; si no existe, se permite todo."""
+    robots = RobotFileParser()
+    try:
+        resp = await client.get(urljoin(base_url, "/robots.txt"))
+        robots.parse(resp.text.splitlines() if resp.status_code == 200 else [])
+    except httpx.HTTPError:
+        robots.parse([])
+    return robots
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    errors: int = 0
+    truncated: bool = False  # Se alcanzó max_pages con URLs pendientes
+
+    @property
+    def complete(self) -> bool:
+        """El crawl recorrió todo el sitio sin errores."""
+        return not self.truncated and not self.errors
+
+
+def crawl_scope(base_url: str, start_path: str) -> str:
+    """Prefijo de las URLs que visita un crawl (mismo criterio que ``crawl_pages``)."""
+    start = urlparse(normalize_url(urljoin(base_url, start_path)))
+    return f"{start.scheme}://{start.netloc}{start_path}"
+
+
+async def crawl_pages(
+    base_url: str,
+    start_path: str,
+    max_pages: int = MAX_PAGES,
+    concurrency: int = CRAWL_CONCURRENCY,
+    rate_per_host: float = CRAWL_RATE_PER_HOST,
+    buffer_pages: int = CRAWL_BUFFER_PAGES,
+    stats: Optional[CrawlStats] = None,
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Crawler asíncrono de la documentación: genera (url, texto) a medida que
+    se descargan las páginas.
+
+    - Pool de ``concurrency`` workers sobre un único cliente HTTP (keep-alive)
+    - Límite de ``rate_per_host`` peticiones/segundo por host y robots.txt
+    - Cada URL se descarga una sola vez: el mismo HTML alimenta la extracción
+      de texto y el descubrimiento de enlaces
+    - URLs normalizadas para descartar duplicados
+    - Como mucho ``buffer_pages`` páginas esperan a ser consumidas: si el
+      consumidor (chunking, embeddings) va más lento, el crawl se frena
+    """
+    stats = stats if stats is not None else CrawlStats()
+    base_domain = urlparse(base_url).netloc.lower()
+    start_url = normalize_url(urljoin(base_url, start_path))
+
+    queue: asyncio.Queue = asyncio.Queue()
+    pages: asyncio.Queue = asyncio.Queue(maxsize=buffer_pages)
+    seen = {start_url}
+    limiter = HostRateLimiter(rate_per_host)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        timeout=10.0,
+        limits=limits,
+        follow_redirects=True,
+    ) as client:
+        robots = await load_robots(client, base_url)
+        queue.put_nowait(start_url)
+
+        async def worker():
+            while True:
+                current = await queue.get()
+                try:
+                    if stats.pages < max_pages:
+                        await visit(current)
+                    else:
+                        stats.truncated = True
+                except Exception as e:
+                    # Un error inesperado (URL inválida, robots, decodificación) no
+                    # debe matar al worker: sin workers, queue.join() no termina
+                    stats.errors += 1
+                    print(f"[ERROR] {current}: {e!r}")
+                finally:
+                    queue.task_done()
+
+        async def visit(current: str):
+            if not robots.can_fetch(USER_AGENT, current):
+                return
+
+            await limiter.wait(urlparse(current).netloc)
+            print(f"[SCRAPER] {current}")
+
+            try:
+                resp = await client.get(current)
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                stats.errors += 1
+                print(f"[ERROR] {current}: {e}")
+                return
+
+            if "html" not in resp.headers.get("content-type", "text/html"):
+                return
+
+            try:
+                # El parseo es CPU: fuera del event loop para no frenar las descargas
+                text, links = await asyncio.to_thread(parse_page, current, resp.text)
+            except Exception as e:
+                stats.errors += 1
+                print(f"[ERROR LINKS] {current}: {e}")
+                return
+
+            if stats.pages >= max_pages:
+                stats.truncated = True
+                return
+            stats.pages += 1
+
+            for link in links:
+                try:
+                    full = normalize_url(link)
+                except ValueError:
+                    continue  # Enlace mal formado: no tumba la página
+
+                if full in seen:
+                    continue
 
                 if not is_internal_link(full, base_domain):
                     continue
@@ -112,131 +297,210 @@ def crawl_docs(base_url: str, start_path: str, max_pages: int = MAX_PAGES):
                 if not urlparse(full).path.startswith(start_path):
                     continue
 
-                if full not in visited:
-                    queue.append(full)
+                if full.lower().endswith(SKIPPED_EXTENSIONS):
+                    continue
 
-        except Exception as e:
-            print(f"[ERROR LINKS] {current}: {e}")
+                seen.add(full)
+                queue.put_nowait(full)
 
-    return scraped
+            # Bloquea si el consumidor va atrasado (backpressure)
+            await pages.put((current, text))
 
+        async def finish():
+            await queue.join()
+            await pages.put(None)
 
-# ==========================
-# CHUNKING
-# ==========================
+        tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        tasks.append(asyncio.create_task(finish()))
+        try:
+            while (page := await pages.get()) is not None:
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def crawl_docs_async(
+    base_url: str,
+    start_path: str,
+    max_pages: int = MAX_PAGES,
+    concurrency: int = CRAWL_CONCURRENCY,
+    rate_per_host: float = CRAWL_RATE_PER_HOST,
+) -> dict:
+    """
+    Crawl completo en memoria.
 
-def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS):
-    words = text.split()
-    chunks = []
-    current = []
-    count = 0
+    Returns:
+        Dict {url: texto} con como máximo ``max_pages`` páginas
+    """
+    return {
+        url: text
+        async for url, text in crawl_pages(base_url, start_path, max_pages, concurrency, rate_per_host)
+    }
 
-    for w in words:
-        current.append(w)
-        count += 1
 
-        if count >= max_tokens:
-            chunks.append(" ".join(current))
-            current = []
-            count = 0
+def crawl_docs(base_url: str, start_path: str, max_pages: int = MAX_PAGES):
+    """Versión síncrona de ``crawl_docs_async``."""
+    return asyncio.run(crawl_docs_async(base_url, start_path, max_pages))
+
 
-    if current:
-        chunks.append(" ".join(current))
+# ==========================
+# CHUNKING
+# ==========================
 
-    return chunks
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS):
+    """Lista de textos de chunk; ver ``helpers.chunker.iter_chunks``."""
+    return [chunk.text for chunk in iter_chunks(text, max_tokens)]
 
 
 # ==========================
 # 1) MODO TXT – GUARDAR EN ARCHIVO
 # ==========================
 
+def _write_page(f, url: str, content: str) -> None:
+    f.write(f"===== URL: {url} =====\n")
+    f.write(content)
+    f.write("\n\n")
+
+
 def save_as_txt(scraped_pages: dict, filename="helpers/scraped_output.txt"):
     print("\n[INFO] Guardando contenido en archivo TXT...\n")
 
     with open(filename, "w", encoding="utf-8") as f:
         for url, content in scraped_pages.items():
-            f.write(f"===== URL: {url} =====\n")
-            f.write(content)
-            f.write("\n\n")
+            _write_page(f, url, content)
 
     print(f"[DONE] Archivo generado: {filename}\n")
 
 
+async def write_txt(pages: PageSource, filename="helpers/scraped_output.txt") -> int:
+    """Sink TXT del pipeline: escribe cada página en cuanto llega."""
+    print(f"\n[INFO] Guardando contenido en {filename} a medida que se descarga...\n")
+    written = 0
+
+    with open(filename, "w", encoding="utf-8") as f:
+        async for url, content in as_async_iter(pages):
+            _write_page(f, url, content)
+            written += 1
+
+    print(f"[DONE] Archivo generado: {filename} ({written} páginas)\n")
+    return written
+
+
 # ==========================
 # 2) MODO QDRANT – EMBEDDINGS + VECTOR STORE
 # ==========================
 
-def save_to_qdrant(scraped_pages: dict, collection: str):
+async def iter_page_chunks(pages: PageSource, topic: str = "TanStack"):
+    """Genera los chunks (con su payload) de cada página en cuanto llega."""
+    async for url, text in as_async_iter(pages):
+        print(f"\n[PAGE] {url}")
+
+        for chunk in iter_chunks(text):
+            yield {
+                "url": url,
+                "content": chunk.text,
+                "heading_path": chunk.heading_path,
+                "tokens": chunk.tokens,
+                "topic": topic
+            }
+
+
+async def index_pages(
+    pages: PageSource,
+    collection: str,
+    prune_missing_pages: Union[bool, Callable[[], bool]] = False,
+    url_prefix: Optional[str] = None,
+    qdrant: Optional[AsyncQdrantClient] = None,
+    embed_fn: Optional[EmbedFn] = None,
+    cache: Optional[IndexCache] = None,
+) -> IndexStats:
+    """
+    Sink Qdrant del pipeline: chunk -> embed -> upsert a medida que llegan
+    las páginas, con colas acotadas entre etapas.
+
+    Args:
+        pages: Fuente de (url, texto): el crawler o un TXT
+        prune_missing_pages: Borrar puntos de páginas bajo ``url_prefix``
+            que no aparecieron; puede ser una función que se evalúa al
+            terminar (p. ej. solo si el crawl fue completo)
+        url_prefix: Alcance de la fuente (base_url + start_path del crawl):
+            las páginas de otras fuentes de la colección nunca se borran
+        qdrant, embed_fn, cache: Inyectables; por defecto Qdrant/OpenAI
+            configurados por entorno y la caché en disco
+    """
     print("\n[INFO] Inicializando OpenAI y Qdrant...\n")
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    qdrant = QdrantClient(
-                url=QDRANT_URL,
-                api_key=QDRANT_API_KEY,
-                port=443,
-                timeout=10.0
-            )
-    print("\n[INFO] Qdrant...\n", qdrant)
+    openai_client = None
+    own_qdrant = qdrant is None
+    own_cache = cache is None
+
+    if embed_fn is None:
+        openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        embed_fn = openai_embedder(openai_client)
+    if qdrant is None:
+        qdrant = AsyncQdrantClient(
+                    url=QDRANT_URL,
+                    api_key=QDRANT_API_KEY,
+                    port=443,
+                    timeout=10.0
+                )
+    if cache is None:
+        cache = open_index_cache()
+
     try:
-        qdrant.get_collection(collection)
-        print(f"[INFO] Colección existente: {collection}")
-    except:
-        qdrant.create_collection(
-            collection_name=collection,
-            vectors_config=qmodels.VectorParams(
-                size=1536,
-                distance=qmodels.Distance.COSINE
-            )
+        if await ensure_collection(qdrant, collection):
+            # Colección nueva: el manifiesto local ya no refleja lo que hay en Qdrant
+            cache.reset_collection(collection)
+
+        # Solo se embeben y escriben los chunks nuevos o modificados
+        stats = await index_incremental(
+            iter_page_chunks(pages),
+            qdrant,
+            collection,
+            embed_fn=embed_fn,
+            cache=cache,
+            prune_missing_pages=prune_missing_pages,
+            url_prefix=url_prefix,
         )
-        print(f"[INFO] Colección creada: {collection}")
+    finally:
+        if own_cache:
+            cache.close()
+        if own_qdrant:
+            await qdrant.close()
+        if openai_client is not None:
+            await openai_client.close()
+
+    print(f"\n[DONE] Embeddings almacenados en Qdrant: {stats}")
+    if stats.first_point_seconds is not None:
+        print(f"[INFO] Primer chunk indexado a los {stats.first_point_seconds:.1f} s")
+    print(f"[INFO] Caché de embeddings: {cache.hits} hits, {cache.misses} misses\n")
+    return stats
 
-    for url, text in scraped_pages.items():
-        print(f"\n[PAGE] {url}")
 
-        chunks = chunk_text(text)
-
-        for chunk in chunks:
-            emb = client.embeddings.create(
-                model="text-embedding-3-small",
-                input=chunk
-            ).data[0].embedding
-
-            point_id = str(uuid.uuid4())
-
-            qdrant.upsert(
-                collection_name=collection,
-                points=[
-                    qmodels.PointStruct(
-                        id=point_id,
-                        vector=emb,
-                        payload={
-                            "url": url,
-                            "content": chunk,
-                            "topic": 'TanStack'
-                        }
-                    )
-                ]
-            )
-
-    print("\n[DONE] Embeddings almacenados en Qdrant\n")
+async def save_to_qdrant_async(scraped_pages: dict, collection: str) -> IndexStats:
+    return await index_pages(scraped_pages.items(), collection)
+
+
+def save_to_qdrant(scraped_pages: dict, collection: str):
+    return asyncio.run(save_to_qdrant_async(scraped_pages, collection))
 
 # ==========================
 # LEER DESDE TXT
 # ==========================
 
-def load_from_txt(filename="scraped_output.txt"):
-    print(f"\n[INFO] Leyendo contenido desde {filename}...\n")
-    
-    scraped_pages = {}
+def iter_txt_pages(filename="scraped_output.txt") -> Iterator[Tuple[str, str]]:
+    """Fuente TXT del pipeline: genera (url, contenido) página a página."""
     current_url = None
     current_content = []
     
     with open(filename, "r", encoding="utf-8") as f:
         for line in f:
             if line.startswith("===== URL: "):
-                # Si ya hay una URL previa, guardarla
+                # Si ya hay una URL previa, emitirla
                 if current_url:
-                    scraped_pages[current_url] = "\n".join(current_content).strip()
+                    yield current_url, "\n".join(current_content).strip()
                 
                 # Extraer la nueva URL
                 current_url = line.replace("===== URL: ", "").replace(" =====\n", "").strip()
@@ -245,10 +509,16 @@ def load_from_txt(filename="scraped_output.txt"):
                 # Acumular contenido
                 current_content.append(line.rstrip())
         
-        # Guardar la última URL
+        # Emitir la última URL
         if current_url:
-            scraped_pages[current_url] = "\n".join(current_content).strip()
-    
+            yield current_url, "\n".join(current_content).strip()
+
+
+def load_from_txt(filename="scraped_output.txt"):
+    print(f"\n[INFO] Leyendo contenido desde {filename}...\n")
+
+    scraped_pages = dict(iter_txt_pages(filename))
+
     print(f"[INFO] Páginas cargadas: {len(scraped_pages)}\n")
     return scraped_pages
 
@@ -257,11 +527,34 @@ def load_from_txt(filename="scraped_output.txt"):
 # MAIN
 # ==========================
 
+async def run_pipeline(base_url: str, start_path: str, mode: str):
+    """crawl -> extract -> (txt | chunk -> embed -> upsert) en streaming."""
+    crawl_stats = CrawlStats()
+    pages = crawl_pages(base_url, start_path, stats=crawl_stats)
+
+    if mode == "txt":
+        # Generar nombre de archivo basado en la URL
+        filename = generate_filename_from_url(base_url)
+        print(f"[INFO] Guardando como: {filename}\n")
+        await write_txt(pages, filename)
+    else:
+        # Solo se borran páginas desaparecidas si el crawl fue completo, y solo
+        # las de este base_url + start_path (la colección comparte varias fuentes)
+        await index_pages(
+            pages,
+            "sofia_ai",
+            prune_missing_pages=lambda: crawl_stats.complete,
+            url_prefix=crawl_scope(base_url, start_path),
+        )
+
+    print(f"[INFO] Páginas encontradas: {crawl_stats.pages} (errores: {crawl_stats.errors}, truncado: {crawl_stats.truncated})\n")
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Uso:")
-        print("  python crawler_v2.py <base_url> <start_path> <txt|qdrant>")
-        print("  python crawler_v2.py qdrant-txt [filename.txt]")
+        print("  python -m helpers.crawler <base_url> <start_path> <txt|qdrant>")
+        print("  python -m helpers.crawler qdrant-txt [filename.txt]")
         sys.exit(1)
 
     mode = sys.argv[-1].lower()  # El último argumento es siempre el modo
@@ -273,14 +566,14 @@ if __name__ == "__main__":
         filename = sys.argv[1] if len(sys.argv) == 3 else "scraped_output.txt"
         print(f"[INFO] Leyendo contenido desde {filename}...\n")
         
-        scraped_from_file = load_from_txt(filename)
-        save_to_qdrant(scraped_from_file, "sofia_ai")
+        # Un TXT es una fuente parcial: no se borra nada que no esté en él
+        asyncio.run(index_pages(iter_txt_pages(filename), "sofia_ai", prune_missing_pages=False))
     
     elif mode in ["txt", "qdrant"]:
         # Modos que requieren scraping
         if len(sys.argv) < 4:
             print("Uso:")
-            print("python crawler_v2.py <base_url> <start_path> <txt|qdrant>")
+            print("python -m helpers.crawler <base_url> <start_path> <txt|qdrant>")
             sys.exit(1)
         
         base_url = sys.argv[1]
@@ -288,17 +581,7 @@ if __name__ == "__main__":
         
         print(f"\n[INFO] Iniciando crawler:\n- URL base: {base_url}\n- Ruta: {start_path}\n- Modo: {mode}\n")
         
-        scraped = crawl_docs(base_url, start_path)
-        
-        print(f"[INFO] Páginas encontradas: {len(scraped)}\n")
-        
-        if mode == "txt":
-            # Generar nombre de archivo basado en la URL
-            filename = generate_filename_from_url(base_url)
-            print(f"[INFO] Guardando como: {filename}\n")
-            save_as_txt(scraped, filename)
-        elif mode == "qdrant":
-            save_to_qdrant(scraped, "sofia_ai")
+        asyncio.run(run_pipeline(base_url, start_path, mode))
     
     else:
-        print("[ERROR] Modo inválido. Use 'txt', 'qdrant' o 'qdrant-txt'.")
\ No newline at end of file
+        print("[ERROR] Modo inválido. Use 'txt', 'qdrant' o 'qdrant-txt'.")
@@ -0,0 +1,175 @@
+# helpers/index_cache.py
+"""
+Caché local (SQLite) para la re-indexación incremental.
+
+- ``embeddings``: vector por (hash del contenido, modelo), para no volver a
+  pagar embeddings de chunks que ya se calcularon alguna vez.
+- ``points``: manifiesto de los puntos indexados por colección y URL, para
+  saber qué chunks no cambiaron y cuáles hay que borrar de Qdrant.
+
+Los IDs de punto son deterministas (``helpers.indexer.point_id_for``), así
+que el mismo chunk de la misma página siempre produce el mismo punto.
+"""
+import os
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from helpers.indexer import EMBEDDING_MODEL, EmbedFn, content_hash
+
+INDEX_CACHE_PATH = os.getenv("INDEX_CACHE_PATH", "helpers/.index_cache.sqlite")
+
+
+class IndexCache:
+    """
+    Args:
+        path: Archivo SQLite (``:memory:`` para pruebas)
+        model: Modelo de embeddings; forma parte de la clave de la caché
+    """
+
+    def __init__(self, path: str = INDEX_CACHE_PATH, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (content_hash, model)
+            );
+            CREATE TABLE IF NOT EXISTS points (
+                collection TEXT NOT NULL,
+                point_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (collection, point_id)
+            );
+            CREATE INDEX IF NOT EXISTS points_by_url ON points (collection, url);
+        """)
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ==========================
+    # EMBEDDINGS
+    # ==========================
+
+    def get_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+
+        # SQLite limita los parámetros por consulta: buscar en bloques
+        for start in range(0, len(unique), 500):
+            block = unique[start:start + 500]
+            placeholders = ",".join("?" * len(block))
+            rows = self._db.execute(
+                f"SELECT content_hash, vector FROM embeddings "
+                f"WHERE model = ? AND content_hash IN ({placeholders})",
+                [self.model, *block],
+            )
+            for chunk_hash, blob in rows:
+                found[chunk_hash] = array("f", blob).tolist()
+
+        return found
+
+    def put_embeddings(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (content_hash, model, vector) VALUES (?, ?, ?)",
+                [(chunk_hash, self.model, array("f", vector).tobytes()) for chunk_hash, vector in items],
+            )
+
+    def embedder(self, embed_fn: EmbedFn) -> EmbedFn:
+        """Envuelve ``embed_fn`` para calcular solo los embeddings que faltan."""
+
+        async def embed(texts: List[str]) -> List[List[float]]:
+            hashes = [content_hash(text) for text in texts]
+            vectors = self.get_embeddings(hashes)
+            missing = [i for i, chunk_hash in enumerate(hashes) if chunk_hash not in vectors]
+
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                computed = await embed_fn([texts[i] for i in missing])
+                new_items = [(hashes[i], vector) for i, vector in zip(missing, computed)]
+                self.put_embeddings(new_items)
+                vectors.update(new_items)
+
+            return [vectors[chunk_hash] for chunk_hash in hashes]
+
+        return embed
+
+    # ==========================
+    # MANIFIESTO DE PUNTOS
+    # ==========================
+
+    def has_point(self, collection: str, point_id: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM points WHERE collection = ? AND point_id = ?",
+            (collection, point_id),
+        ).fetchone()
+        return row is not None
+
+    def add_points(self, collection: str, points: Iterable[Tuple[str, str]]) -> None:
+        """Registra puntos ya escritos en Qdrant como pares (url, point_id)."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points (collection, point_id, url) VALUES (?, ?, ?)",
+                [(collection, point_id, url) for url, point_id in points],
+            )
+
+    def remove_points(self, collection: str, point_ids: Iterable[str]) -> None:
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM points WHERE collection = ? AND point_id = ?",
+                [(collection, point_id) for point_id in point_ids],
+            )
+
+    def reset_collection(self, collection: str) -> None:
+        """Olvida el manifiesto de una colección (p. ej. si se recreó en Qdrant)."""
+        with self._db:
+            self._db.execute("DELETE FROM points WHERE collection = ?", (collection,))
+
+    def stale_points(
+        self,
+        collection: str,
+        current_ids: Set[str],
+        seen_urls: Set[str],
+        prune_missing_pages: bool = False,
+        keep_urls: Set[str] = frozenset(),
+        url_prefix: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Puntos del manifiesto que ya no existen en el contenido actual:
+        chunks que cambiaron en páginas re-crawleadas y, si
+        ``prune_missing_pages``, todos los de páginas que desaparecieron
+        bajo ``url_prefix`` (la fuente indexada; las demás fuentes de la
+        colección no se tocan). Los de ``keep_urls`` (páginas que no se
+        indexaron completas) se conservan.
+        """
+        if prune_missing_pages and not url_prefix:
+            raise ValueError("prune_missing_pages requiere url_prefix")
+
+        stale = []
+        rows = self._db.execute(
+            "SELECT point_id, url FROM points WHERE collection = ?", (collection,)
+        )
+
+        for point_id, url in rows:
+            if point_id in current_ids or url in keep_urls:
+                continue
+            if url in seen_urls or (prune_missing_pages and url.startswith(url_prefix)):
+                stale.append(point_id)
+
+        return stale
+
+
+def open_index_cache(path: Optional[str] = None, model: str = EMBEDDING_MODEL) -> IndexCache:
+    """Abre la caché creando el directorio si hace falta."""
+    path = path or INDEX_CACHE_PATH
+    directory = os.path.dirname(path)
+    if directory and path != ":memory:":
+        os.makedirs(directory, exist_ok=True)
+    return IndexCache(path, model)
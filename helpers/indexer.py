@@ -0,0 +1,417 @@
+# helpers/indexer.py
+"""
+Pipeline de indexación: embeddings por lotes + upsert masivo en Qdrant.
+
+    chunks ──► lotes de embedding ──► cola acotada ──► lotes de upsert
+
+Los embeddings se piden agrupando chunks hasta el límite de inputs y de
+tokens de la API, y los puntos se insertan en Qdrant en lotes configurables.
+Embedding y upsert se solapan a través de una cola acotada, y los lotes que
+fallan se reintentan con backoff exponencial.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qmodels
+
+from helpers.tokens import EMBEDDING_MODEL, estimate_tokens
+
+EMBEDDING_DIM = 1536
+
+# Límites de la API de embeddings: inputs por petición y tokens por petición
+EMBED_MAX_INPUTS = 2048
+EMBED_MAX_TOKENS = 300_000
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "100000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "256"))
+INDEX_QUEUE_SIZE = int(os.getenv("INDEX_QUEUE_SIZE", "8"))
+INDEX_MAX_RETRIES = int(os.getenv("INDEX_MAX_RETRIES", "5"))
+
+# Segundos máximos que un lote espera a llenarse antes de enviarse (fuentes lentas, p. ej. el crawler)
+EMBED_BATCH_LINGER = float(os.getenv("EMBED_BATCH_LINGER", "0.5"))
+
+
+# embed_fn(textos) -> vectores, en el mismo orden
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Un chunk a indexar: su payload debe incluir "content"
+Chunk = Dict[str, Any]
+
+# Namespace fijo para derivar los IDs de punto
+POINT_NAMESPACE = uuid.UUID("5d3c5a52-6f1e-4c4b-9a57-1f0d2c9b7e31")
+
+
+@dataclass
+class IndexStats:
+    chunks: int = 0
+    points: int = 0
+    embed_requests: int = 0
+    upsert_requests: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    first_point_seconds: Optional[float] = None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id_for(url: str, chunk_hash: str) -> str:
+    """ID determinista del punto a partir de la URL y el hash del chunk."""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{url}\n{chunk_hash}"))
+
+
+def openai_embedder(client, model: str = EMBEDDING_MODEL) -> EmbedFn:
+    """
+    Crea una función de embedding por lotes sobre ``AsyncOpenAI``.
+    """
+
+    async def embed(texts: List[str]) -> List[List[float]]:
+        response = await client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    return embed
+
+
+async def with_retries(
+    operation: Callable[[], Awaitable[Any]],
+    stats: IndexStats,
+    retries: int = INDEX_MAX_RETRIES,
+    base_delay: float = 0.5,
+    max_delay: float = 20.0,
+):
+    """Ejecuta ``operation`` reintentando con backoff exponencial y jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            stats.retries += 1
+            delay = min(max_delay, base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+            print(f"[RETRY] {e} (intento {attempt + 1}/{retries}, esperando {delay:.1f}s)")
+            await asyncio.sleep(delay)
+
+
+async def ensure_collection(qdrant: AsyncQdrantClient, collection: str, size: int = EMBEDDING_DIM) -> bool:
+    """Crea la colección si no existe. Devuelve True si se creó."""
+    if await qdrant.collection_exists(collection):
+        print(f"[INFO] Colección existente: {collection}")
+        return False
+
+    await qdrant.create_collection(
+        collection_name=collection,
+        vectors_config=qmodels.VectorParams(
+            size=size,
+            distance=qmodels.Distance.COSINE
+        )
+    )
+    print(f"[INFO] Colección creada: {collection}")
+    return True
+
+
+async def as_async_iter(items: Union[Iterable[Any], AsyncIterable[Any]]):
+    """Recorre de forma uniforme un iterable síncrono o asíncrono."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def iter_embed_batches(
+    chunks: Union[Iterable[Chunk], AsyncIterable[Chunk]],
+    batch_size: int = EMBED_BATCH_SIZE,
+    batch_tokens: int = EMBED_BATCH_TOKENS,
+    linger: Optional[float] = EMBED_BATCH_LINGER,
+):
+    """
+    Agrupa chunks en lotes que respetan el máximo de inputs y de tokens por
+    petición de embeddings.
+
+    Si la fuente es lenta, un lote se envía incompleto cuando lleva
+    ``linger`` segundos abierto, para no retrasar el resto del pipeline.
+    """
+    batch_size = min(batch_size, EMBED_MAX_INPUTS)
+    batch_tokens = min(batch_tokens, EMBED_MAX_TOKENS)
+
+    batch: List[Chunk] = []
+    tokens = 0
+    opened_at = 0.0
+
+    source = as_async_iter(chunks).__aiter__()
+    pending = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+
+            if batch and linger is not None:
+                # No se cancela la espera: el siguiente chunk se recoge en la próxima vuelta
+                remaining = opened_at + linger - time.monotonic()
+                done = remaining > 0 and (await asyncio.wait({pending}, timeout=remaining))[0]
+                if not done:
+                    yield batch
+                    batch, tokens = [], 0
+                    continue
+
+            try:
+                chunk = await pending
+            except StopAsyncIteration:
+                break
+            finally:
+                if pending.done():
+                    pending = None
+
+            chunk_tokens = chunk.get("tokens") or estimate_tokens(chunk["content"])
+
+            if batch and (len(batch) >= batch_size or tokens + chunk_tokens > batch_tokens):
+                yield batch
+                batch, tokens = [], 0
+
+            if not batch:
+                opened_at = time.monotonic()
+            batch.append(chunk)
+            tokens += chunk_tokens
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+    if batch:
+        yield batch
+
+
+def _point_id(chunk: Chunk) -> str:
+    if chunk.get("id"):
+        return chunk["id"]
+    return point_id_for(chunk.get("url", ""), chunk.get("content_hash") or content_hash(chunk["content"]))
+
+
+async def index_chunks(
+    chunks: Union[Iterable[Chunk], AsyncIterable[Chunk]],
+    qdrant: AsyncQdrantClient,
+    collection: str,
+    embed_fn: EmbedFn,
+    batch_size: int = EMBED_BATCH_SIZE,
+    batch_tokens: int = EMBED_BATCH_TOKENS,
+    upsert_batch_size: int = UPSERT_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY,
+    queue_size: int = INDEX_QUEUE_SIZE,
+    retries: int = INDEX_MAX_RETRIES,
+    stats: Optional[IndexStats] = None,
+    on_upserted: Optional[Callable[[List[qmodels.PointStruct]], None]] = None,
+    on_failed: Optional[Callable[[List[Chunk]], None]] = None,
+) -> IndexStats:
+    """
+    Indexa ``chunks`` en ``collection``.
+
+    Args:
+        chunks: Chunks (sync o async) con payload; ``content`` es el texto a
+            embeber y ``id`` (opcional) el ID del punto
+        qdrant: Cliente Qdrant asíncrono (sirve ``AsyncQdrantClient(":memory:")``)
+        collection: Colección destino (debe existir)
+        embed_fn: Función de embedding por lotes
+        concurrency: Peticiones de embedding en paralelo
+        queue_size: Tamaño de las colas entre etapas (backpressure)
+        on_upserted: Callback con cada lote de puntos escrito con éxito
+        on_failed: Callback con los chunks (o payloads) de cada lote descartado
+
+    Returns:
+        IndexStats con el número de peticiones, reintentos y lotes fallidos
+    """
+    stats = stats or IndexStats()
+    started = time.perf_counter()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    points: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce():
+        try:
+            async for batch in iter_embed_batches(chunks, batch_size, batch_tokens):
+                stats.chunks += len(batch)
+                await batches.put(batch)
+        finally:
+            for _ in range(concurrency):
+                await batches.put(None)
+
+    async def embed_worker():
+        while (batch := await batches.get()) is not None:
+            texts = [chunk["content"] for chunk in batch]
+
+            async def embed():
+                stats.embed_requests += 1
+                return await embed_fn(texts)
+
+            try:
+                vectors = await with_retries(embed, stats, retries)
+            except Exception as e:
+                stats.failed_batches += 1
+                print(f"[ERROR EMBEDDINGS] Lote de {len(batch)} chunks descartado: {e}")
+                if on_failed is not None:
+                    on_failed(batch)
+                continue
+
+            await points.put([
+                qmodels.PointStruct(
+                    id=_point_id(chunk),
+                    vector=vector,
+                    payload={key: value for key, value in chunk.items() if key not in ("id", "tokens")},
+                )
+                for chunk, vector in zip(batch, vectors)
+            ])
+        await points.put(None)
+
+    async def flush(pending: List[qmodels.PointStruct]):
+        async def upsert():
+            stats.upsert_requests += 1
+            await qdrant.upsert(collection_name=collection, points=pending, wait=True)
+
+        try:
+            await with_retries(upsert, stats, retries)
+            stats.points += len(pending)
+            if stats.first_point_seconds is None:
+                stats.first_point_seconds = time.perf_counter() - started
+            if on_upserted is not None:
+                on_upserted(pending)
+        except Exception as e:
+            stats.failed_batches += 1
+            print(f"[ERROR UPSERT] Lote de {len(pending)} puntos descartado: {e}")
+            if on_failed is not None:
+                on_failed([point.payload for point in pending])
+
+    async def upsert_worker():
+        pending: List[qmodels.PointStruct] = []
+        finished = 0
+
+        while finished < concurrency:
+            embedded = await points.get()
+            if embedded is None:
+                finished += 1
+                continue
+
+            pending.extend(embedded)
+            while len(pending) >= upsert_batch_size:
+                await flush(pending[:upsert_batch_size])
+                pending = pending[upsert_batch_size:]
+
+            # Nada más en cola: escribir ya lo pendiente en vez de esperar a llenar el lote
+            if pending and points.empty():
+                await flush(pending)
+                pending = []
+
+        if pending:
+            await flush(pending)
+
+    await asyncio.gather(
+        produce(),
+        *(embed_worker() for _ in range(concurrency)),
+        upsert_worker(),
+    )
+    return stats
+
+
+async def index_incremental(
+    chunks: Union[Iterable[Chunk], AsyncIterable[Chunk]],
+    qdrant: AsyncQdrantClient,
+    collection: str,
+    embed_fn: EmbedFn,
+    cache,
+    prune_missing_pages: Union[bool, Callable[[], bool]] = False,
+    url_prefix: Optional[str] = None,
+    **options,
+) -> IndexStats:
+    """
+    Re-indexación incremental: solo embebe y escribe los chunks nuevos o
+    modificados, y borra de Qdrant los que ya no existen.
+
+    Una página con algún lote fallido conserva sus puntos anteriores y no
+    pasa al manifiesto: la siguiente ejecución la vuelve a indexar.
+
+    Args:
+        chunks: Chunks con ``url`` y ``content``
+        cache: ``helpers.index_cache.IndexCache`` (embeddings + manifiesto)
+        prune_missing_pages: Borrar también los puntos de páginas bajo
+            ``url_prefix`` que no aparecieron en esta ejecución (solo si el
+            crawl fue completo). Si es una función, se evalúa al terminar
+        url_prefix: Alcance de la fuente indexada (p. ej. base_url +
+            start_path del crawl); obligatorio para ``prune_missing_pages``
+        **options: Opciones de ``index_chunks`` (tamaños de lote, etc.)
+    """
+    if prune_missing_pages and not url_prefix:
+        raise ValueError("prune_missing_pages requiere url_prefix")
+
+    stats = IndexStats()
+    seen_urls = set()
+    current_ids = set()
+    upserted: Dict[str, List[str]] = {}
+    failed_urls = set()
+
+    async def changed_chunks():
+        async for chunk in as_async_iter(chunks):
+            chunk["content_hash"] = content_hash(chunk["content"])
+            chunk["id"] = point_id_for(chunk["url"], chunk["content_hash"])
+
+            seen_urls.add(chunk["url"])
+            current_ids.add(chunk["id"])
+
+            if cache.has_point(collection, chunk["id"]):
+                stats.unchanged += 1
+                continue
+
+            yield chunk
+
+    def record(points: List[qmodels.PointStruct]):
+        for point in points:
+            upserted.setdefault(point.payload["url"], []).append(str(point.id))
+
+    def record_failure(failed: List[Chunk]):
+        failed_urls.update(chunk["url"] for chunk in failed)
+
+    await index_chunks(
+        changed_chunks(),
+        qdrant,
+        collection,
+        embed_fn=cache.embedder(embed_fn),
+        stats=stats,
+        on_upserted=record,
+        on_failed=record_failure,
+        **options,
+    )
+
+    # Al manifiesto solo las páginas con todos sus lotes escritos
+    cache.add_points(collection, [
+        (url, point_id)
+        for url, point_ids in upserted.items() if url not in failed_urls
+        for point_id in point_ids
+    ])
+
+    if callable(prune_missing_pages):
+        prune_missing_pages = prune_missing_pages()
+
+    if failed_urls:
+        print(f"[INFO] {len(failed_urls)} páginas con lotes fallidos: se conservan sus puntos anteriores")
+    stale = cache.stale_points(collection, current_ids, seen_urls, prune_missing_pages,
+                               keep_urls=failed_urls, url_prefix=url_prefix)
+    for start in range(0, len(stale), UPSERT_BATCH_SIZE):
+        block = stale[start:start + UPSERT_BATCH_SIZE]
+        await qdrant.delete(
+            collection_name=collection,
+            points_selector=qmodels.PointIdsList(points=block),
+            wait=True,
+        )
+        cache.remove_points(collection, block)
+        stats.deleted += len(block)
+
+    return stats
@@ -0,0 +1,36 @@
+# helpers/tokens.py
+"""
+Conteo de tokens sin dependencias pesadas al importar.
+
+Lo usan el chunker, el indexador y el agente (ContextPolicy, presupuesto
+del banco de preguntas). Vive aparte para que el worker no cargue bs4 ni
+qdrant_client solo para contar tokens: tiktoken se importa la primera vez
+que se pide un encoding.
+"""
+from functools import lru_cache
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens (~4 caracteres por token)."""
+    return max(1, len(text) // 4)
+
+
+@lru_cache(maxsize=None)
+def encoding_for(model: str):
+    """Encoding de tiktoken para ``model``, o None si no está disponible."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # tiktoken no instalado o sin acceso a su archivo BPE: usar estimación
+        return None
+
+
+def count_tokens(text: str, model: str = EMBEDDING_MODEL) -> int:
+    """Tokens de ``text`` para ``model`` (por defecto, el de embeddings)."""
+    encoding = encoding_for(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
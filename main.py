@@ -1,7 +1,32 @@
 # main.py
+import sys
+
+from dotenv import load_dotenv
+
+# El .env se carga antes de importar el agente: la configuración de los
+# módulos se lee al importarlos
+load_dotenv()
+
 from livekit.agents import WorkerOptions, cli
-from agent.agent import entrypoint  # Cambiado aquí
+from agent.agent import PRELOAD_MODULES, entrypoint, load_plugins, prewarm
+from agent.endpointing import register_turn_detector
+from agent.worker import jobs_in_threads, worker_options
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    # Con procesos de job los plugins se importan en el forkserver/prewarm;
+    # con jobs en hilos o para download-files tienen que registrarse aquí
+    if jobs_in_threads() or sys.argv[1:2] == ["download-files"]:
+        load_plugins()
+    # El turn detector corre en el proceso de inferencia del worker, que solo
+    # se crea si el plugin está registrado antes de arrancar
+    register_turn_detector()
+
+    # Varias entrevistas por worker, aceptación según carga y drenado al
+    # apagar (agent/worker.py)
+    cli.run_app(WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        preload_modules=PRELOAD_MODULES,
+        **worker_options(),
+    ))
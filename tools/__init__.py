@@ -0,0 +1,27 @@
+# tools/__init__.py
+"""
+Tools del agente. Se exportan de forma perezosa (PEP 562): importar un
+submódulo como ``tools.write_behind`` no carga el resto de las tools.
+"""
+import importlib
+
+_EXPORTS = {
+    "register_candidate": "tools.register_candidate",
+    "get_evaluation_criteria": "tools.get_evaluation_criteria",
+    "complete_evaluation": "tools.complete_evaluation",
+    "update_candidate_status": "tools.update_candidate_status",
+    "next_question": "tools.interview_flow",
+    "record_answer": "tools.interview_flow",
+    "search_knowledge": "tools.search_knowledge",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
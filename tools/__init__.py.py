@@ -1,12 +0,0 @@
-# tools/__init__.py
-from .register_candidate import register_candidate
-from .get_evaluation_criteria import get_evaluation_criteria
-from .complete_evaluation import complete_evaluation
-from .update_candidate_status import update_candidate_status
-
-__all__ = [
-    "register_candidate",
-    "get_evaluation_criteria", 
-    "complete_evaluation",
-    "update_candidate_status"
-]
\ No newline at end of file
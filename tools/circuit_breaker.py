@@ -0,0 +1,97 @@
+# tools/circuit_breaker.py
+"""
+Circuit breaker para servicios externos (webhook de evaluación).
+
+- closed: las llamadas pasan; ``failure_threshold`` fallos seguidos lo abren.
+- open: las llamadas se rechazan al instante durante ``reset_timeout``
+  segundos, sin esperar al timeout del servicio caído.
+- half_open: pasado ese tiempo se deja pasar una sola llamada de prueba;
+  si sale bien se cierra, si falla vuelve a abrirse.
+
+Un ``failure_threshold`` de 0 lo desactiva (siempre closed).
+"""
+import time
+from typing import Any, Callable, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """La llamada no se hizo: el circuito está abierto."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """True si la llamada puede ir al servicio; si no, se cuenta como rechazada."""
+        if self.failure_threshold <= 0:
+            return True
+
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._state = CLOSED
+
+    def release(self) -> None:
+        """
+        La llamada no terminó (cancelada: turno interrumpido, sesión cerrada):
+        no cuenta como éxito ni fallo, pero libera la prueba de half_open.
+        """
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.opened += 1
+            self._state = OPEN
+            self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,154 @@
+# tools/complete_evaluation.py
+"""
+Cierre de la evaluación técnica: guarda una fila compacta por respuesta
+(pregunta, topic, puntaje y notas cortas) y devuelve los puntajes por
+topic calculados en el servidor.
+
+Las preguntas, respuestas y puntajes ya están en ``InterviewState``
+(record_answer los registra), así que el LLM no los repite en los
+argumentos de la tool: basta con llamarla al terminar.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from livekit.agents import RunContext, function_tool
+
+from agent.interview_state import AnswerRecord, InterviewState
+from agent.metrics import timed_tool
+from tools.evaluation_queue import EVALUATION_DRAIN_TIMEOUT, EVALUATION_MODE, get_evaluation_queue
+from tools.repository import EvaluationRecord
+from tools.write_behind import get_write_behind
+
+logger = logging.getLogger("sofia-agent")
+
+# Espera máxima (s) por las evaluaciones en segundo plano antes de calcular los puntajes
+COMPLETE_EVALUATION_WAIT = float(os.getenv("COMPLETE_EVALUATION_WAIT", "5"))
+# Longitud máxima de las notas de cada respuesta
+EVALUATION_NOTES_CHARS = int(os.getenv("EVALUATION_NOTES_CHARS", "160"))
+
+# Escrituras de evaluaciones que llegaron después del cierre (referencias para el GC)
+_late_writes: Set[asyncio.Task] = set()
+
+
+def short_notes(record: AnswerRecord, limit: int = EVALUATION_NOTES_CHARS) -> str:
+    """Feedback de la respuesta recortado; marca las evaluaciones locales o ausentes."""
+    if record.status != "evaluated":
+        return "sin evaluación" if record.status == "failed" else "evaluación pendiente"
+
+    notes = " ".join((record.feedback or "").split())
+    if record.evaluation.get("source") == "local":
+        notes = f"[local] {notes}"
+    if len(notes) > limit:
+        notes = notes[:limit - 1].rstrip() + "…"
+    return notes
+
+
+def evaluation_record(record: AnswerRecord, candidate_id: str) -> EvaluationRecord:
+    """Fila de una respuesta; también la usa la cola al guardar evaluaciones recuperadas."""
+    return {
+        "candidate_id": candidate_id,
+        "question_id": record.question_id,
+        "topic": record.topic,
+        "score": record.score,
+        "notes": short_notes(record),
+    }
+
+
+def evaluation_records(state: InterviewState, candidate_id: str) -> List[EvaluationRecord]:
+    """Una fila por respuesta, todas con las mismas columnas (un solo upsert en lote)."""
+    return [evaluation_record(record, candidate_id) for record in state.answers]
+
+
+def persist_late_evaluations(state: InterviewState, candidate_id: str) -> None:
+    """
+    Las evaluaciones que aún no llegaron se reescriben al llegar: reutilizan
+    el id de su (candidato, pregunta), así el upsert reemplaza la fila.
+    """
+    async def wait_and_write():
+        await get_evaluation_queue().drain(state.session_id, timeout=EVALUATION_DRAIN_TIMEOUT)
+        get_write_behind().add_evaluations(evaluation_records(state, candidate_id))
+
+    task = asyncio.create_task(wait_and_write())
+    _late_writes.add(task)
+    task.add_done_callback(_late_writes.discard)
+
+
+@function_tool
+@timed_tool("complete_evaluation")
+async def complete_evaluation(
+    context: RunContext[InterviewState],
+    candidate_id: Optional[str] = None,
+    overall_notes: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Cierra la evaluación técnica al terminar todas las preguntas. Las
+    preguntas, respuestas y puntajes ya están registrados en el servidor:
+    NO los repitas en los argumentos.
+
+    Args:
+        candidate_id: UUID del candidato (si no lo tiene ya la sesión)
+        overall_notes: Observaciones generales breves (opcional)
+
+    Returns:
+        Dict con el puntaje por topic (ponderado por dificultad), el puntaje global
+        y cuántas respuestas se guardaron
+    """
+    state = context.userdata
+    candidate_id = candidate_id or state.candidate_id
+
+    if not state.answers:
+        return {
+            "success": False,
+            "error": "no_answers",
+            "message": "No hay respuestas registradas: usa record_answer durante la entrevista"
+        }
+
+    # Evaluación en segundo plano: dar un margen a las que aún están en curso
+    if EVALUATION_MODE == "background" and state.pending_evaluations():
+        await get_evaluation_queue().drain(state.session_id, timeout=COMPLETE_EVALUATION_WAIT)
+
+    summary = {
+        "topic_scores": state.weighted_topic_scores(),
+        "overall_score": state.overall_score(),
+        "answered": len(state.answers),
+        "pending": state.pending_evaluations(),
+    }
+
+    if not candidate_id:
+        return {
+            "success": False,
+            "error": "missing_candidate_id",
+            **summary,
+            "message": "Puntajes calculados, pero no se guardaron: falta el candidate_id"
+        }
+
+    try:
+        state.candidate_id = candidate_id
+        if EVALUATION_MODE == "background":
+            # Si el proceso cae, las evaluaciones recuperadas del spool se guardan con este candidato
+            get_evaluation_queue().link_candidate(state.session_id, candidate_id)
+        store = get_write_behind()
+        saved = store.add_evaluations(evaluation_records(state, candidate_id))
+        if overall_notes:
+            store.update_candidate(candidate_id, {"overall_notes": overall_notes})
+        if summary["pending"]:
+            persist_late_evaluations(state, candidate_id)
+
+        return {
+            "success": True,
+            "candidate_id": candidate_id,
+            **summary,
+            "saved": len(saved),
+            "message": "Evaluación registrada"
+        }
+
+    except Exception as e:
+        logger.error(f"❌ complete_evaluation error: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            **summary,
+            "message": f"Error al registrar la evaluación: {str(e)}"
+        }
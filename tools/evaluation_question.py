@@ -1,38 +1,90 @@
-import requests
-from typing import Dict, Any
+import os
+import httpx
+from typing import Dict, Any, Optional
 from livekit.agents import function_tool
 
+from agent.metrics import timed_tool
+from tools.circuit_breaker import CircuitBreaker, CircuitOpenError
+from tools.http_client import build_timeout, get_http_client
+from tools.local_evaluator import FallbackEvaluator, KeywordEvaluator
 
-@function_tool
-async def evaluation_question(response: str, topic: str) -> Dict[str, Any]:
+# webhook_url = "https://workflow.failfast.com.co/webhook-test/sofia_ai"
+EVALUATION_WEBHOOK_URL = os.getenv(
+    "EVALUATION_WEBHOOK_URL",
+    "https://workflow.failfast.com.co/webhook/sofia_ai"
+)
+# Timeout de lectura del webhook (segundos); más corto que el general del cliente
+EVALUATION_TIMEOUT = float(os.getenv("EVALUATION_TIMEOUT", "10"))
+# Circuit breaker: fallos seguidos para abrirlo (0 = desactivado) y segundos hasta la prueba
+EVALUATION_BREAKER_THRESHOLD = int(os.getenv("EVALUATION_BREAKER_THRESHOLD", "3"))
+EVALUATION_BREAKER_RESET = float(os.getenv("EVALUATION_BREAKER_RESET", "30"))
+# Respaldo si el webhook falla: "keywords" (evaluador local) o "none" (se propaga el error)
+EVALUATION_FALLBACK = os.getenv("EVALUATION_FALLBACK", "keywords")
+
+_breaker: Optional[CircuitBreaker] = None
+_fallback: Optional[FallbackEvaluator] = None
+_fallback_configured = False
+
+
+def get_evaluation_breaker() -> CircuitBreaker:
+    """Circuit breaker del webhook, compartido por el proceso."""
+    global _breaker
+
+    if _breaker is None:
+        _breaker = CircuitBreaker(
+            "evaluation_webhook",
+            failure_threshold=EVALUATION_BREAKER_THRESHOLD,
+            reset_timeout=EVALUATION_BREAKER_RESET,
+        )
+    return _breaker
+
+
+def set_evaluation_breaker(breaker: Optional[CircuitBreaker]) -> None:
+    """Reemplaza el circuit breaker del proceso (benchmarks)."""
+    global _breaker
+    _breaker = breaker
+
+
+def get_fallback_evaluator() -> Optional[FallbackEvaluator]:
+    """Evaluador local de respaldo según EVALUATION_FALLBACK (None si está desactivado)."""
+    global _fallback, _fallback_configured
+
+    if not _fallback_configured:
+        _fallback = KeywordEvaluator() if EVALUATION_FALLBACK == "keywords" else None
+        _fallback_configured = True
+    return _fallback
+
+
+def set_fallback_evaluator(evaluator: Optional[FallbackEvaluator]) -> None:
     """
-    Evalúa la respuesta del usuario enviándola al webhook de evaluación.
-    
-    Args:
-        response: La respuesta del usuario a evaluar
-        topic: El tema o tópico relacionado (ej: "React", "JavaScript", etc)
-        
-    Returns:
-        Dict con la respuesta del webhook que incluye el mensaje a mostrar al usuario
-        
+    Reemplaza el evaluador de respaldo: cualquier callable con la firma de
+    ``KeywordEvaluator`` (None lo desactiva).
+    """
+    global _fallback, _fallback_configured
+    _fallback = evaluator
+    _fallback_configured = True
+
+
+async def post_to_webhook(response: str, topic: str) -> Dict[str, Any]:
+    """
+    Envía una respuesta al webhook de evaluación y devuelve su resultado.
+
     Raises:
         Exception: Si hay un error en la comunicación con el webhook
     """
-    # webhook_url = "https://workflow.failfast.com.co/webhook-test/sofia_ai"
-    webhook_url = "https://workflow.failfast.com.co/webhook/sofia_ai"
-    
     payload = {
         "response": response,
         "topic": topic
     }
     
     try:
-        # Realizar la petición POST al webhook
-        response = requests.post(
-            webhook_url,
+        # Realizar la petición POST al webhook sin bloquear el event loop,
+        # reutilizando el pool keep-alive del job
+        client = get_http_client()
+        response = await client.post(
+            EVALUATION_WEBHOOK_URL,
             json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=30  # Timeout de 30 segundos
+            timeout=build_timeout(read=EVALUATION_TIMEOUT),
         )
         
         # Verificar que la petición fue exitosa
@@ -41,14 +93,98 @@ async def evaluation_question(response: str, topic: str) -> Dict[str, Any]:
         # Retornar la respuesta del webhook
         return response.json()
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise Exception("Timeout al conectar con el servicio de evaluación")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Error al evaluar la respuesta: {str(e)}")
     except ValueError:
         raise Exception("Error al procesar la respuesta del servicio de evaluación")
 
 
+async def webhook_evaluate(response: str, topic: str, question: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Evalúa una respuesta con el webhook, protegido por el circuit breaker,
+    sin respaldo local (la cola de evaluaciones reintenta con esto).
+
+    Raises:
+        CircuitOpenError: Si el circuito está abierto
+        Exception: Si el webhook falla
+    """
+    breaker = get_evaluation_breaker()
+    if not breaker.allow():
+        raise CircuitOpenError("Servicio de evaluación no disponible (circuito abierto)")
+
+    try:
+        result = await post_to_webhook(response, topic)
+    except Exception:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Cancelada: sin liberar la prueba, el circuito quedaría cerrado a todo
+        breaker.release()
+        raise
+
+    breaker.record_success()
+    return result
+
+
+def fallback_evaluate(
+    response: str,
+    topic: str,
+    question: Optional[Dict[str, Any]],
+    error: Exception,
+) -> Optional[Dict[str, Any]]:
+    """Resultado del evaluador local (``source="local"``) tras un fallo del webhook; None si no hay respaldo."""
+    fallback = get_fallback_evaluator()
+    if fallback is None:
+        return None
+    reason = "circuit_open" if isinstance(error, CircuitOpenError) else str(error)
+    return {**fallback(response, topic, question), "fallback_reason": reason}
+
+
+async def evaluate_answer(response: str, topic: str, question: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Evalúa una respuesta con el webhook, protegido por el circuit breaker.
+    Si el webhook falla o el circuito está abierto, responde el evaluador
+    local (resultado con ``source="local"``).
+
+    Args:
+        response: La respuesta del candidato
+        topic: El topic de la pregunta
+        question: La pregunta (id y texto), para la rúbrica del evaluador local
+
+    Raises:
+        Exception: Si el webhook falla y no hay evaluador de respaldo
+    """
+    try:
+        return await webhook_evaluate(response, topic, question)
+    except Exception as e:
+        result = fallback_evaluate(response, topic, question, e)
+        if result is None:
+            raise
+        return result
+
+
+@function_tool
+@timed_tool("evaluation_question")
+async def evaluation_question(response: str, topic: str) -> Dict[str, Any]:
+    """
+    Evalúa la respuesta del usuario enviándola al webhook de evaluación
+    (con el evaluador local de respaldo si el webhook no responde).
+    
+    Args:
+        response: La respuesta del usuario a evaluar
+        topic: El tema o tópico relacionado (ej: "React", "JavaScript", etc)
+        
+    Returns:
+        Dict con la respuesta del webhook que incluye el mensaje a mostrar al usuario
+        
+    Raises:
+        Exception: Si hay un error en la comunicación con el webhook
+    """
+    return await evaluate_answer(response, topic)
+
+
 if __name__ == "__main__":
     # Ejemplo de uso
     import asyncio
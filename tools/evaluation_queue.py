@@ -0,0 +1,498 @@
+# tools/evaluation_queue.py
+"""
+Cola de evaluaciones en segundo plano (una por proceso worker).
+
+Con ``EVALUATION_MODE=background``, record_answer no espera al webhook: la
+respuesta se encola, Sofía sigue con la entrevista y el puntaje se adjunta
+al ``InterviewState`` de la sesión cuando llega.
+
+- Cola acotada (``EVALUATION_QUEUE_SIZE``) atendida por
+  ``EVALUATION_WORKERS`` tareas, con reintentos y backoff exponencial
+  contra el webhook. Solo con los reintentos agotados responde el
+  evaluador local. Con la cola llena, ``submit`` lo rechaza y la
+  evaluación se hace en línea.
+- Spool local en JSONL (``EVALUATION_SPOOL_DIR``): cada trabajo se escribe
+  antes de encolarse y se marca con su resultado al terminar. Lo que no
+  termina (reintentos agotados, proceso caído) y lo evaluado con el
+  evaluador local se vuelve a procesar con ``recover()`` y el resultado se
+  guarda con el write-behind (el spool anota el candidato de la sesión),
+  así no se pierde ninguna evaluación aunque el webhook sea lento. Un
+  trabajo que sigue sin resultado tras ``EVALUATION_MAX_RECOVERIES``
+  recuperaciones se da por perdido: se marca ``dead`` en el spool y pasa a
+  ``EVALUATION_DEAD_LETTER_PATH`` (como las filas que descarta el
+  write-behind).
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from agent.interview_state import AnswerRecord
+from tools.evaluation_question import fallback_evaluate, webhook_evaluate
+from tools.job_local import JobLocal
+from tools.write_behind import get_write_behind
+
+logger = logging.getLogger("sofia-agent")
+
+# "sync": record_answer espera al webhook; "background": se encola
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "sync")
+EVALUATION_QUEUE_SIZE = int(os.getenv("EVALUATION_QUEUE_SIZE", "100"))
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "4"))
+EVALUATION_MAX_RETRIES = int(os.getenv("EVALUATION_MAX_RETRIES", "3"))
+EVALUATION_RETRY_BACKOFF = float(os.getenv("EVALUATION_RETRY_BACKOFF", "1"))
+EVALUATION_SPOOL_DIR = os.getenv("EVALUATION_SPOOL_DIR", "spool")
+# Recuperaciones sin resultado antes de mandar un trabajo al dead letter
+EVALUATION_MAX_RECOVERIES = int(os.getenv("EVALUATION_MAX_RECOVERIES", "3"))
+EVALUATION_DEAD_LETTER_PATH = os.getenv(
+    "EVALUATION_DEAD_LETTER_PATH", os.path.join(EVALUATION_SPOOL_DIR, "evaluation_dead_letters.jsonl")
+)
+# Espera máxima al cerrar una sesión por sus evaluaciones pendientes (segundos)
+EVALUATION_DRAIN_TIMEOUT = float(os.getenv("EVALUATION_DRAIN_TIMEOUT", "20"))
+
+EvaluateFn = Callable[[str, str, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+FallbackFn = Callable[[str, str, Optional[Dict[str, Any]], Exception], Optional[Dict[str, Any]]]
+ResultCallback = Callable[["EvaluationJob", Optional[Dict[str, Any]]], None]
+
+
+@dataclass
+class EvaluationJob:
+    response: str
+    topic: str
+    session_id: Optional[str] = None
+    question_id: Any = None
+    question: Optional[str] = None
+    # Para guardar el resultado si se recupera del spool (sin sesión a la que avisar)
+    candidate_id: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    # Veces que se volvió a encolar desde el spool
+    recoveries: int = 0
+    # Ya tiene un resultado del evaluador local: solo se reintenta el webhook
+    fallback: bool = False
+
+
+# Spools abiertos en este proceso (los de otras colas del mismo pid no son huérfanos)
+_spool_ids = itertools.count(1)
+_open_spools: Set[str] = set()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, OverflowError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_pending(path: str) -> List[EvaluationJob]:
+    """Trabajos encolados en un fichero de spool que aún no tienen resultado."""
+    jobs: Dict[str, EvaluationJob] = {}
+    candidates: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Línea a medio escribir por un proceso caído
+            event = record.pop("event", None)
+            if event == "queued":
+                jobs[record["id"]] = EvaluationJob(**record)
+            elif event == "failed" and record["id"] in jobs:
+                jobs[record["id"]].attempts = record["attempts"]
+            elif event == "done" and record.get("fallback") and record["id"] in jobs:
+                # Puntaje del evaluador local: pendiente de reevaluar con el webhook
+                jobs[record["id"]].fallback = True
+                jobs[record["id"]].attempts = record["attempts"]
+            elif event in ("done", "dead"):
+                jobs.pop(record["id"], None)
+            elif event == "candidate":
+                candidates[record["session_id"]] = record["candidate_id"]
+    # El candidato de la sesión se conoce a veces después de encolar (complete_evaluation)
+    for job in jobs.values():
+        job.candidate_id = job.candidate_id or candidates.get(job.session_id)
+    return list(jobs.values())
+
+
+class EvaluationSpool:
+    """
+    Registro durable de trabajos en JSONL: un evento ``queued`` (con el
+    trabajo completo) y uno ``done`` (con el resultado) por evaluación,
+    uno ``failed`` (con los intentos) por ronda de reintentos agotada, uno
+    ``dead`` si se abandona y uno ``candidate`` cuando se conoce el
+    candidato de una sesión. Las
+    líneas llegan al sistema operativo al escribirse; el ``fsync`` corre en
+    un hilo, uno por ráfaga, para no bloquear el event loop.
+
+    Cada cola escribe su propio fichero (``evaluations-<pid>-<n>.jsonl``)
+    para no pisarse con las demás; ``claim_orphans`` recoge los de procesos
+    que ya no existen y los de colas ya cerradas de este proceso (jobs en
+    hilos que terminaron).
+    """
+
+    def __init__(self, directory: str = EVALUATION_SPOOL_DIR, dead_letter_path: str = EVALUATION_DEAD_LETTER_PATH):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dead_letter_path = dead_letter_path
+        self.path = os.path.join(directory, f"evaluations-{os.getpid()}-{next(_spool_ids)}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._dirty = False
+        self._sync_task: Optional[asyncio.Task] = None
+        _open_spools.add(self.path)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._dirty = True
+        if self._sync_task is None or self._sync_task.done():
+            try:
+                self._sync_task = asyncio.get_running_loop().create_task(self._sync())
+            except RuntimeError:
+                # Fuera de un event loop (scripts): fsync en el momento
+                self._fsync()
+
+    def _fsync(self) -> None:
+        self._dirty = False
+        os.fsync(self._file.fileno())
+
+    async def _sync(self) -> None:
+        # Un fsync en un hilo por ráfaga de escrituras, fuera del event loop
+        while self._dirty:
+            await asyncio.to_thread(self._fsync)
+
+    async def flush(self) -> None:
+        """Espera a que lo escrito esté en disco."""
+        if self._sync_task is not None:
+            await self._sync_task
+
+    def queued(self, job: EvaluationJob) -> None:
+        self._write({"event": "queued", **asdict(job)})
+
+    def done(self, job: EvaluationJob, result: Dict[str, Any], fallback: bool = False) -> None:
+        self._write({"event": "done", "id": job.id, "session_id": job.session_id,
+                     "question_id": job.question_id, "attempts": job.attempts,
+                     "fallback": fallback, "result": result})
+
+    def failed(self, job: EvaluationJob) -> None:
+        self._write({"event": "failed", "id": job.id, "attempts": job.attempts})
+
+    def dead(self, job: EvaluationJob, reason: str) -> None:
+        """Marca el trabajo como abandonado y lo guarda en el fichero de dead letters."""
+        self._write({"event": "dead", "id": job.id, "attempts": job.attempts,
+                     "recoveries": job.recoveries, "reason": reason})
+
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"job": asdict(job), "reason": reason, "at": time.time()},
+                               ensure_ascii=False, default=str) + "\n")
+
+    def candidate(self, session_id: str, candidate_id: str) -> None:
+        self._write({"event": "candidate", "session_id": session_id, "candidate_id": candidate_id})
+
+    def pending(self) -> List[EvaluationJob]:
+        return _read_pending(self.path)
+
+    def claim_orphans(self) -> List[EvaluationJob]:
+        """
+        Pasa a este spool los trabajos pendientes de procesos que ya no
+        existen (los ficheros de esos procesos se borran) y los devuelve.
+
+        Varios jobs pueden recuperar a la vez (jobs en hilos, varios
+        procesos): cada fichero se reclama primero con un ``os.rename``
+        atómico y solo quien lo renombra lo lee. El fichero reclamado lleva
+        el pid de quien lo reclamó: si ese proceso cae, es huérfano de nuevo.
+        """
+        jobs = []
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith("evaluations-") and name.endswith(".jsonl")):
+                continue
+            pid = name[len("evaluations-"):-len(".jsonl")].split("-")[0]
+            path = os.path.join(self.directory, name)
+            if path in _open_spools or not pid.isdigit():
+                continue
+            if int(pid) != os.getpid() and _pid_alive(int(pid)):
+                continue
+
+            claimed = os.path.join(self.directory, f"evaluations-{os.getpid()}-claimed{next(_spool_ids)}.jsonl")
+            # Registrado antes del rename: otro hilo de este proceso nunca lo ve sin dueño
+            _open_spools.add(claimed)
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                # Lo reclamó otro job
+                _open_spools.discard(claimed)
+                continue
+
+            try:
+                orphans = _read_pending(claimed)
+                for job in orphans:
+                    self.queued(job)
+                os.remove(claimed)
+            finally:
+                _open_spools.discard(claimed)
+            jobs.extend(orphans)
+        return jobs
+
+    def close(self) -> None:
+        if self._dirty:
+            self._fsync()
+        self._file.close()
+        _open_spools.discard(self.path)
+
+
+class EvaluationQueue:
+    def __init__(
+        self,
+        evaluate_fn: EvaluateFn = webhook_evaluate,
+        fallback_fn: Optional[FallbackFn] = fallback_evaluate,
+        spool: Optional[EvaluationSpool] = None,
+        maxsize: int = EVALUATION_QUEUE_SIZE,
+        workers: int = EVALUATION_WORKERS,
+        max_retries: int = EVALUATION_MAX_RETRIES,
+        backoff: float = EVALUATION_RETRY_BACKOFF,
+        max_recoveries: int = EVALUATION_MAX_RECOVERIES,
+    ):
+        self.evaluate_fn = evaluate_fn
+        self.fallback_fn = fallback_fn
+        self.spool = spool or EvaluationSpool()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_recoveries = max_recoveries
+        self._maxsize = maxsize
+        self._n_workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._recovery: Optional[asyncio.Task] = None
+        self._callbacks: Dict[str, ResultCallback] = {}
+        self._in_flight: Dict[Optional[str], Set[str]] = {}
+        self._idle: Dict[Optional[str], asyncio.Event] = {}
+        self.completed = 0
+        self.fallbacks = 0
+        self.persisted = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dead_letters = 0
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self._n_workers)]
+        return self._queue
+
+    def submit(self, job: EvaluationJob, on_result: Optional[ResultCallback] = None) -> bool:
+        """
+        Encola una evaluación sin esperar; el trabajo queda en el spool antes
+        de encolarse.
+
+        Returns:
+            False si la cola está llena: el llamador debe evaluar en línea
+            (backpressure en lugar de crecer sin límite)
+        """
+        queue = self._ensure_started()
+        if queue.full():
+            self.rejected += 1
+            logger.warning(f"⚠️ Evaluation queue full ({queue.qsize()}), evaluating inline")
+            return False
+
+        self.spool.queued(job)
+        queue.put_nowait(job)
+        if on_result is not None:
+            self._callbacks[job.id] = on_result
+        self._track(job)
+        return True
+
+    def _track(self, job: EvaluationJob) -> None:
+        self._in_flight.setdefault(job.session_id, set()).add(job.id)
+        self._idle.setdefault(job.session_id, asyncio.Event()).clear()
+
+    async def _evaluate(self, job: EvaluationJob) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """(resultado, True si es del evaluador local); (None, False) si no hay ninguno."""
+        question = {"id": job.question_id, "question": job.question}
+        for attempt in range(self.max_retries + 1):
+            job.attempts += 1
+            try:
+                return await self.evaluate_fn(job.response, job.topic, question), False
+            except Exception as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+                    continue
+                logger.error(f"❌ Evaluation {job.id} failed after {job.attempts} attempts: {e}")
+                # Un trabajo que ya tiene puntaje local no lo repite: sigue pendiente del webhook
+                if self.fallback_fn is None or job.fallback:
+                    return None, False
+                result = self.fallback_fn(job.response, job.topic, question, e)
+                return result, result is not None
+        return None, False
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            result = None
+            try:
+                result, fallback = await self._evaluate(job)
+                if result is not None:
+                    # Con el evaluador local queda marcado para reevaluarlo al recuperar
+                    self.spool.done(job, result, fallback=fallback)
+                    self.completed += 1
+                    self.fallbacks += fallback
+                    if job.id not in self._callbacks:
+                        # Recuperado del spool: no hay sesión que lo guarde al cerrar
+                        self._persist(job, result)
+                else:
+                    # Sigue pendiente: se reintenta en la próxima recuperación
+                    self.spool.failed(job)
+                    self.failed += 1
+            except Exception as e:
+                logger.error(f"❌ Evaluation worker error on {job.id}: {e}")
+            finally:
+                callback = self._callbacks.pop(job.id, None)
+                if callback is not None:
+                    try:
+                        callback(job, result)
+                    except Exception as e:
+                        logger.error(f"❌ Evaluation callback error on {job.id}: {e}")
+                self._finish(job)
+                self._queue.task_done()
+
+    def _persist(self, job: EvaluationJob, result: Dict[str, Any]) -> None:
+        """Guarda una evaluación recuperada con el write-behind (misma fila que complete_evaluation)."""
+        # Import diferido: complete_evaluation usa esta cola
+        from tools.complete_evaluation import evaluation_record
+
+        if not job.candidate_id:
+            logger.warning(f"⚠️ Recovered evaluation {job.id} has no candidate; result kept in the spool")
+            return
+        record = AnswerRecord(job.question_id, job.topic, job.question or "", job.response)
+        record.apply_evaluation(result)
+        get_write_behind().add_evaluation(evaluation_record(record, job.candidate_id))
+        self.persisted += 1
+
+    def link_candidate(self, session_id: Optional[str], candidate_id: str) -> None:
+        """
+        Anota en el spool el candidato de una sesión, para guardar las
+        evaluaciones de la sesión que se recuperen después.
+        """
+        if session_id is not None:
+            self.spool.candidate(session_id, candidate_id)
+
+    def _finish(self, job: EvaluationJob) -> None:
+        in_flight = self._in_flight.get(job.session_id)
+        if in_flight is not None:
+            in_flight.discard(job.id)
+            if not in_flight:
+                del self._in_flight[job.session_id]
+                self._idle.pop(job.session_id).set()
+
+    def pending(self, session_id: Optional[str] = None) -> int:
+        return len(self._in_flight.get(session_id, ()))
+
+    async def drain(self, session_id: Optional[str] = None, timeout: float = EVALUATION_DRAIN_TIMEOUT) -> bool:
+        """
+        Espera las evaluaciones en curso de una sesión.
+
+        Returns:
+            True si terminaron todas antes del timeout
+        """
+        idle = self._idle.get(session_id)
+        if idle is None:
+            return True
+        try:
+            await asyncio.wait_for(idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def recover(self) -> int:
+        """
+        Vuelve a encolar los trabajos pendientes: los fallidos de este
+        proceso y los huérfanos de procesos caídos. Los resultados ya
+        no tienen sesión a la que avisar: se guardan con el write-behind
+        si el spool tiene el candidato de la sesión.
+
+        Cada recuperación cuenta: pasadas ``max_recoveries`` sin resultado,
+        el trabajo va al dead letter en lugar de reintentarse para siempre.
+        """
+        queue = self._ensure_started()
+        in_queue = {job_id for jobs in self._in_flight.values() for job_id in jobs}
+        jobs = [job for job in self.spool.pending() if job.id not in in_queue]
+        jobs += self.spool.claim_orphans()
+
+        recovered = 0
+        for job in jobs:
+            if queue.full():
+                break
+            job.recoveries += 1
+            if job.recoveries > self.max_recoveries:
+                reason = f"no result after {job.attempts} attempts in {job.recoveries - 1} recoveries"
+                self.spool.dead(job, reason)
+                self.dead_letters += 1
+                logger.error(f"❌ Evaluation {job.id} moved to dead letters: {reason}")
+                continue
+            # Vuelve a escribirse para que el contador sobreviva a otra caída
+            self.spool.queued(job)
+            queue.put_nowait(job)
+            self._track(job)
+            recovered += 1
+        if recovered:
+            logger.info(f"♻️ Recovered {recovered} pending evaluations from the spool")
+        return recovered
+
+    def start_recovery(self) -> asyncio.Task:
+        """``recover()`` en segundo plano (al empezar un job); sus errores quedan en el log."""
+        async def _recover():
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"❌ Evaluation recovery failed: {e!r}")
+
+        self._recovery = asyncio.create_task(_recover())
+        return self._recovery
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "fallbacks": self.fallbacks,
+            "persisted": self.persisted,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "dead_letters": self.dead_letters,
+        }
+
+    async def aclose(self) -> None:
+        tasks = self._workers + ([self._recovery] if self._recovery is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._recovery = None
+        self._workers = []
+        self._queue = None
+        await self.spool.flush()
+        self.spool.close()
+
+
+_queue: JobLocal[EvaluationQueue] = JobLocal(EvaluationQueue)
+
+
+def get_evaluation_queue() -> EvaluationQueue:
+    """Cola de evaluaciones del proceso (del job, con jobs en hilos), creada la primera vez."""
+    return _queue.get()
+
+
+def peek_evaluation_queue() -> Optional[EvaluationQueue]:
+    """La cola si ya se creó (para cerrarla al terminar un job sin crearla)."""
+    return _queue.peek()
+
+
+def set_evaluation_queue(queue: Optional[EvaluationQueue]) -> None:
+    """Reemplaza la cola del proceso (benchmarks)."""
+    _queue.set(queue)
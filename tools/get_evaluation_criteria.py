@@ -1,76 +1,211 @@
 # tools/get_evaluation_criteria.py
-from typing import Dict, Any, List
+import hashlib
+import json
+import threading
+from typing import Dict, Any, List, Optional
 from livekit.agents import function_tool
-from supabase import create_client, Client
 import os
-from dotenv import load_dotenv
 
-# Cargar archivo .env
-load_dotenv()
+from agent.metrics import timed_tool
+from helpers.tokens import count_tokens
+from tools.repository import get_repository
+from tools.ttl_cache import AsyncTTLCache
 
-# Leer variables
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-# Crear cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+# Caché del banco de preguntas por worker (segundos)
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "300"))
+QUESTION_CACHE_MAX_AGE = float(os.getenv("QUESTION_CACHE_MAX_AGE", "3600"))
 
-print("Supabase client initialized for get_evaluation_criteria tool.")
+# Formato del resultado para el LLM: "compact" (por defecto) o "full"
+QUESTION_PAYLOAD_MODE = os.getenv("QUESTION_PAYLOAD_MODE", "compact")
+# Preguntas por topic en modo compacto, repartidas por dificultad (0 = todas)
+QUESTIONS_PER_TOPIC = int(os.getenv("QUESTIONS_PER_TOPIC", "0"))
+# Modelo con el que se cuentan los tokens del resultado
+PROMPT_TOKEN_MODEL = "gpt-4o-mini"
 
 
-@function_tool
-async def get_evaluation_criteria() -> Dict[str, Any]:
+class NoQuestionsFound(Exception):
+    """No hay preguntas activas en la base de datos."""
+
+
+def _topic_of(question: Dict[str, Any]) -> str:
+    return question.get("tech", {}).get("name", "Unknown") if question.get("tech") else "Unknown"
+
+
+def _bank_version(count: Optional[int], updated_at: Optional[str]) -> str:
     """
-    Obtiene las preguntas de evaluación activas desde la base de datos con sus topics.
-    
+    Versión (etag) del banco de preguntas: hash del número de preguntas y
+    del ``updated_at`` más reciente (lo mantiene un trigger de la tabla).
+    Añadir o editar una pregunta mueve ``updated_at``; borrarla, el número.
+    """
+    return hashlib.sha1(json.dumps([count, updated_at], default=str).encode("utf-8")).hexdigest()
+
+
+def _version_from_rows(rows: List[Dict[str, Any]]) -> str:
+    """La misma versión que ``fetch_question_bank_version``, desde las filas ya cargadas."""
+    updated = [row["updated_at"] for row in rows if row.get("updated_at") is not None]
+    return _bank_version(len(rows), max(updated, default=None))
+
+
+def build_question_bank(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Agrupa las filas de tech_questions por topic, ya ordenadas por dificultad.
+
+    Args:
+        rows: Filas de tech_questions con la relación tech(name)
+
     Returns:
-        Dict con las preguntas organizadas por área (topic) y ordenadas por dificultad
+        Dict con las preguntas organizadas por área (topic) y su resumen
     """
-    try:
-        # Obtener preguntas con JOIN a la tabla tech para obtener el nombre del topic
-        response = supabase.table("tech_questions") \
-            .select("id, question, difficulty, tech, tech!inner(name)") \
-            .order("difficulty", desc=False) \
-            .execute()
-        
-        if not response.data:
-            return {
-                "success": False,
-                "error": "no_questions_found",
-                "message": "No se encontraron preguntas activas en la base de datos"
-            }
-        
-        # Organizar preguntas por área (topic)
-        questions_by_topic = {}
-        
-        for question in response.data:
-            # Obtener el nombre del topic desde la relación
-            topic = question.get("tech", {}).get("name", "Unknown") if question.get("tech") else "Unknown"
-            
-            # Crear la lista para el topic si no existe
-            if topic not in questions_by_topic:
-                questions_by_topic[topic] = []
-            
-            questions_by_topic[topic].append({
-                "id": question.get("id"),
-                "question": question.get("question"),
-                "difficulty": question.get("difficulty"),
-                "tech_id": question.get("tech"),  # ID numérico del tech
-                "topic": topic
-            })
-        
-        # Contar total de preguntas
-        total_questions = len(response.data)
+    # Organizar preguntas por área (topic)
+    questions_by_topic = {}
+    
+    for question in rows:
+        # Obtener el nombre del topic desde la relación
+        topic = _topic_of(question)
         
-        # Crear resumen por topic
-        topics_summary = {topic: len(questions) for topic, questions in questions_by_topic.items()}
+        # Crear la lista para el topic si no existe
+        if topic not in questions_by_topic:
+            questions_by_topic[topic] = []
         
+        questions_by_topic[topic].append({
+            "id": question.get("id"),
+            "question": question.get("question"),
+            "difficulty": question.get("difficulty"),
+            "tech_id": question.get("tech"),  # ID numérico del tech
+            "topic": topic
+        })
+    
+    # Contar total de preguntas
+    total_questions = len(rows)
+    
+    # Crear resumen por topic
+    topics_summary = {topic: len(questions) for topic, questions in questions_by_topic.items()}
+    
+    return {
+        "success": True,
+        "questions": questions_by_topic,
+        "total_questions": total_questions,
+        "topics_summary": topics_summary,
+        "message": f"Se cargaron {total_questions} preguntas activas exitosamente. Topics: {', '.join([f'{t} ({c})' for t, c in topics_summary.items()])}"
+    }
+
+
+def select_by_difficulty(questions: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Elige hasta ``limit`` preguntas repartidas entre los niveles de
+    dificultad (una de cada nivel por vuelta, de menor a mayor).
+    """
+    if limit <= 0 or len(questions) <= limit:
+        return questions
+
+    tiers: Dict[Any, List[Dict[str, Any]]] = {}
+    for question in questions:
+        tiers.setdefault(question.get("difficulty"), []).append(question)
+
+    ordered_tiers = [tiers[d] for d in sorted(tiers, key=lambda d: (d is None, d))]
+    selected = []
+    while len(selected) < limit:
+        for tier in ordered_tiers:
+            if tier and len(selected) < limit:
+                selected.append(tier.pop(0))
+
+    order = {id(question): i for i, question in enumerate(questions)}
+    return sorted(selected, key=lambda q: order[id(q)])
+
+
+def compact_question_bank(bank: Dict[str, Any], per_topic: int = 0) -> Dict[str, Any]:
+    """
+    Versión compacta del banco para el LLM: cada topic aparece una sola vez
+    y cada pregunta es ``[id, difficulty, question]``; sin ``tech_id``,
+    ``topic`` repetido ni mensaje con el resumen.
+    """
+    topics = {
+        topic: [
+            [question["id"], question["difficulty"], question["question"]]
+            for question in select_by_difficulty(list(questions), per_topic)
+        ]
+        for topic, questions in bank["questions"].items()
+    }
+
+    return {
+        "success": True,
+        "fields": ["id", "difficulty", "question"],
+        "topics": topics,
+        "total_questions": sum(len(questions) for questions in topics.values()),
+    }
+
+
+def encode_question_bank(bank: Dict[str, Any], mode: str = QUESTION_PAYLOAD_MODE, per_topic: int = QUESTIONS_PER_TOPIC) -> Dict[str, Any]:
+    """Resultado de la tool en el formato pedido, con su tamaño en tokens."""
+    payload = compact_question_bank(bank, per_topic) if mode == "compact" else dict(bank)
+    payload["tokens"] = count_tokens(json.dumps(payload, ensure_ascii=False), PROMPT_TOKEN_MODEL)
+    return payload
+
+
+async def _load_question_bank():
+    # Preguntas con JOIN a la tabla tech para obtener el nombre del topic
+    rows = await get_repository().fetch_questions()
+
+    if not rows:
+        raise NoQuestionsFound()
+
+    return build_question_bank(rows), _version_from_rows(rows)
+
+
+async def _probe_question_bank_version() -> str:
+    # Una fila y un contador, no el banco entero
+    version = await get_repository().fetch_question_bank_version()
+    return _bank_version(version["count"], version["updated_at"])
+
+
+# Una sola caché por proceso worker: un round trip en frío, no uno por entrevista
+question_bank_cache = AsyncTTLCache(
+    loader=_load_question_bank,
+    ttl=QUESTION_CACHE_TTL,
+    version_probe=_probe_question_bank_version,
+    max_age=QUESTION_CACHE_MAX_AGE,
+)
+
+
+# Último banco codificado: se recalcula solo cuando la caché carga otro banco.
+# Compartido por los jobs en hilos del proceso, como la caché
+_last_encoded: Dict[str, Any] = {"bank": None, "payload": None}
+_last_encoded_lock = threading.Lock()
+
+
+def _encoded_for(bank: Dict[str, Any]) -> Dict[str, Any]:
+    with _last_encoded_lock:
+        if _last_encoded["bank"] is not bank:
+            _last_encoded["payload"] = encode_question_bank(bank)
+            _last_encoded["bank"] = bank
+        return _last_encoded["payload"]
+
+
+def invalidate_question_bank() -> None:
+    """Invalida el banco de preguntas cacheado (p. ej. tras editar preguntas)."""
+    question_bank_cache.invalidate()
+
+
+def question_bank_cache_stats() -> Dict[str, Any]:
+    """Contadores de hit/miss de la caché del banco de preguntas."""
+    return question_bank_cache.stats()
+
+
+async def load_evaluation_criteria() -> Dict[str, Any]:
+    """
+    Resultado de ``get_evaluation_criteria`` (desde la caché del worker).
+    También lo usa el entrypoint para precargar el banco de preguntas.
+    """
+    try:
+        bank = await question_bank_cache.get()
+        return _encoded_for(bank)
+
+    except NoQuestionsFound:
         return {
-            "success": True,
-            "questions": questions_by_topic,
-            "total_questions": total_questions,
-            "topics_summary": topics_summary,
-            "message": f"Se cargaron {total_questions} preguntas activas exitosamente. Topics: {', '.join([f'{t} ({c})' for t, c in topics_summary.items()])}"
+            "success": False,
+            "error": "no_questions_found",
+            "message": "No se encontraron preguntas activas en la base de datos"
         }
             
     except Exception as e:
@@ -79,4 +214,16 @@ async def get_evaluation_criteria() -> Dict[str, Any]:
             "success": False,
             "error": str(e),
             "message": f"Error al obtener preguntas: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+@function_tool
+@timed_tool("get_evaluation_criteria")
+async def get_evaluation_criteria() -> Dict[str, Any]:
+    """
+    Obtiene las preguntas de evaluación activas desde la base de datos con sus topics.
+    
+    Returns:
+        Dict con las preguntas organizadas por área (topic) y ordenadas por dificultad
+    """
+    return await load_evaluation_criteria()
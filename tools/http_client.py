@@ -0,0 +1,77 @@
+# tools/http_client.py
+"""
+Cliente HTTP asíncrono compartido por las tools de un job.
+
+Todas las llamadas salientes (webhook de evaluación, etc.) reutilizan un único
+``httpx.AsyncClient`` por job (``JobLocal``: el pool está atado al event loop
+del job, ver ``tools/job_local.py``), con keep-alive y HTTP/2 cuando el
+paquete ``h2`` está disponible. Así nunca se bloquea el event loop y no se
+paga un handshake TLS por cada respuesta del candidato. Al terminar el job
+lo cierra ``agent.worker.close_job_resources``.
+"""
+import os
+
+import httpx
+
+from tools.job_local import JobLocal
+
+try:
+    import h2  # noqa: F401  # Solo comprobamos si HTTP/2 está disponible
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Timeouts configurables (segundos)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+# Límites del pool de conexiones
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+def build_timeout(
+    connect: float = HTTP_CONNECT_TIMEOUT,
+    read: float = HTTP_READ_TIMEOUT,
+) -> httpx.Timeout:
+    """Construye el timeout de httpx separando conexión y lectura."""
+    return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=build_timeout(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+_client: JobLocal[httpx.AsyncClient] = JobLocal(_new_client)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente HTTP del job, creándolo la primera vez.
+
+    Returns:
+        httpx.AsyncClient con pool keep-alive y HTTP/2 si está disponible
+    """
+    client = _client.get()
+    if client.is_closed:
+        client = _new_client()
+        _client.set(client)
+    return client
+
+
+async def close_http_client() -> None:
+    """Cierra el cliente del job (``close_job_resources`` al terminar el job)."""
+    client = _client.peek()
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    _client.set(None)
@@ -0,0 +1,143 @@
+# tools/interview_flow.py
+"""
+Tools del flujo de la entrevista sobre ``InterviewState`` (userdata de la
+sesión): el servidor decide qué pregunta sigue y guarda cada respuesta con
+su evaluación, así el LLM no necesita recordar la entrevista completa.
+"""
+from typing import Any, Dict, Optional
+
+from livekit.agents import RunContext, function_tool
+
+from agent.interview_state import InterviewState
+from agent.metrics import timed_tool
+from tools.evaluation_question import evaluate_answer
+from tools.evaluation_queue import EVALUATION_MODE, EvaluationJob, get_evaluation_queue
+from tools.get_evaluation_criteria import load_evaluation_criteria
+
+
+async def ensure_loaded(state: InterviewState) -> Dict[str, Any]:
+    """Carga el banco de preguntas en el estado si la precarga no llegó a tiempo."""
+    if state.loaded:
+        return {"success": True}
+
+    criteria = await load_evaluation_criteria()
+    if criteria.get("success"):
+        state.load(criteria)
+    return criteria
+
+
+def queue_evaluation(state: InterviewState, response: str, question: Dict[str, Any]) -> bool:
+    """
+    Registra la respuesta como pendiente y encola su evaluación; el puntaje
+    se adjunta al registro cuando llega. False si la cola está llena.
+    """
+    job = EvaluationJob(
+        response=response,
+        topic=question["topic"],
+        session_id=state.session_id,
+        question_id=question["id"],
+        question=question["question"],
+        candidate_id=state.candidate_id,
+    )
+    record = state.record(response)
+
+    def on_result(job: EvaluationJob, evaluation: Optional[Dict[str, Any]]) -> None:
+        if evaluation is None:
+            record.status = "failed"
+        else:
+            record.apply_evaluation(evaluation)
+
+    if get_evaluation_queue().submit(job, on_result):
+        return True
+
+    state.answers.remove(record)
+    return False
+
+
+@function_tool
+@timed_tool("next_question")
+async def next_question(context: RunContext[InterviewState]) -> Dict[str, Any]:
+    """
+    Devuelve la siguiente pregunta de la entrevista (topic, texto y posición).
+    Úsala para la primera pregunta; después record_answer ya devuelve la siguiente.
+    Si la pregunta en curso aún no tiene respuesta, la devuelve de nuevo.
+
+    Returns:
+        Dict con la pregunta a hacer, o done=True si no quedan preguntas
+    """
+    state = context.userdata
+
+    loaded = await ensure_loaded(state)
+    if not loaded.get("success"):
+        return {
+            "success": False,
+            "error": loaded.get("error"),
+            "message": loaded.get("message", "No se pudo cargar el banco de preguntas")
+        }
+
+    # Llamada repetida sin respuesta en medio: no saltar la pregunta en curso
+    pending = state.awaiting_answer()
+    if pending is not None:
+        previous_topic = state.answers[-1].topic if state.answers else None
+        return {"success": True, "repeated": True, **state.question_payload(pending, previous_topic)}
+
+    previous_topic = state.current_topic if state.current_question() else None
+    return {"success": True, **state.question_payload(state.advance(), previous_topic)}
+
+
+@function_tool
+@timed_tool("record_answer")
+async def record_answer(context: RunContext[InterviewState], response: str) -> Dict[str, Any]:
+    """
+    Evalúa y registra la respuesta del candidato a la pregunta actual, y
+    devuelve el feedback junto con la siguiente pregunta. Si la evaluación va
+    en segundo plano (queued=True) no hay feedback: solo un acuse breve.
+
+    Args:
+        response: La respuesta COMPLETA del candidato, sin resumir
+
+    Returns:
+        Dict con el feedback para el candidato (o queued=True) y la siguiente pregunta (next)
+    """
+    state = context.userdata
+    question = state.awaiting_answer()
+
+    if question is None:
+        # Sin pregunta en curso, o ya respondida: no registrar ni avanzar otra vez
+        answered = state.current_question() is not None
+        return {
+            "success": False,
+            "error": "already_answered" if answered else "no_current_question",
+            "message": "La pregunta en curso ya tiene respuesta: llama a next_question"
+            if answered else "No hay una pregunta en curso: llama primero a next_question"
+        }
+
+    if EVALUATION_MODE == "background" and queue_evaluation(state, response, question):
+        following = state.advance()
+        return {
+            "success": True,
+            "queued": True,
+            "next": state.question_payload(following, question["topic"]),
+            "message": "Respuesta registrada; la evaluación llega en segundo plano"
+        }
+
+    try:
+        evaluation = await evaluate_answer(response, question["topic"], question)
+        evaluated = True
+    except Exception as e:
+        # La respuesta se registra igual, sin puntaje, para no perderla
+        evaluation = {"success": False, "error": str(e)}
+        evaluated = False
+
+    record = state.record(response, evaluation)
+    if not evaluated:
+        record.status = "failed"
+    following = state.advance()
+
+    return {
+        "success": evaluated,
+        "feedback": record.feedback,
+        "score": record.score,
+        "next": state.question_payload(following, record.topic),
+        "message": record.feedback or evaluation.get("error", "Respuesta registrada")
+    }
@@ -0,0 +1,40 @@
+# tools/job_local.py
+"""
+Instancias "del proceso" que en realidad son de cada job.
+
+Con ``WORKER_EXECUTOR=thread`` (ver ``agent/worker.py``) varias entrevistas
+comparten el proceso, cada una con su event loop en su propio hilo (el
+prewarm corre en ese mismo hilo). Los clientes asíncronos (httpx,
+Supabase, colas con tareas de asyncio) quedan atados al loop en el que se
+usan por primera vez, así que no se pueden compartir entre jobs: cada hilo
+de job tiene su instancia. Con procesos de job (un job por proceso) es
+exactamente lo mismo que un singleton de proceso.
+"""
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class JobLocal(Generic[T]):
+    """
+    Args:
+        factory: Crea la instancia la primera vez que se pide en el hilo
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._local = threading.local()
+
+    def get(self) -> T:
+        value = getattr(self._local, "value", None)
+        if value is None:
+            value = self._local.value = self._factory()
+        return value
+
+    def peek(self) -> Optional[T]:
+        """La instancia del hilo si ya existe (sin crearla)."""
+        return getattr(self._local, "value", None)
+
+    def set(self, value: Optional[T]) -> None:
+        self._local.value = value
@@ -0,0 +1,105 @@
+# tools/local_evaluator.py
+"""
+Evaluador local de respuestas, usado como respaldo cuando el webhook de
+evaluación no responde o su circuit breaker está abierto.
+
+Puntúa por cobertura de palabras clave:
+- de la rúbrica de la pregunta si existe (``EVALUATION_RUBRICS_PATH``,
+  JSON con ``{"<id o texto de la pregunta>": {"keywords": [...],
+  "expected": "respuesta esperada"}}``);
+- si no, de las palabras de contenido de la pregunta más las del topic.
+
+Es deliberadamente simple: da un puntaje y un feedback razonables al
+instante para no bloquear la entrevista, y el resultado lleva
+``source="local"`` para poder reevaluarlo después.
+"""
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Set
+
+EVALUATION_RUBRICS_PATH = os.getenv("EVALUATION_RUBRICS_PATH", "")
+
+# Palabras clave genéricas por área, para preguntas sin rúbrica
+TOPIC_KEYWORDS = {
+    "HTML": ["etiqueta", "elemento", "atributo", "semantico", "accesibilidad", "navegador", "estructura", "seo", "contenido"],
+    "CSS": ["selector", "propiedad", "estilo", "caja", "margin", "padding", "flexbox", "grid", "especificidad", "cascada", "responsive"],
+    "JavaScript": ["funcion", "variable", "scope", "objeto", "promesa", "async", "await", "evento", "closure", "callback", "asincron"],
+    "Tools": ["git", "branch", "commit", "merge", "bundler", "webpack", "vite", "npm", "consola", "debug", "devtools"],
+}
+
+STOPWORDS = {
+    "para", "como", "cual", "cuales", "que", "por", "con", "una", "uno", "unos", "unas", "los", "las", "del",
+    "entre", "sirve", "hace", "haces", "funciona", "funcionan", "diferencia", "diferencias", "importante",
+    "este", "esta", "esto", "ese", "esa", "eso", "son", "es", "en", "el", "la", "de", "y", "o", "un",
+    "cuando", "donde", "porque", "sus", "mas", "muy", "tambien", "puede", "pueden", "usar", "usa",
+}
+
+# Palabras clave que bastan para el puntaje máximo de cobertura
+KEYWORDS_FOR_FULL_SCORE = 4
+# Respuestas más cortas que esto se penalizan
+MIN_ANSWER_WORDS = 8
+
+FallbackEvaluator = Callable[[str, str, Optional[Dict[str, Any]]], Dict[str, Any]]
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin tildes, para comparar palabras habladas y escritas."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def content_words(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", normalize(text))
+    return [w for w in words if len(w) > 2 and w not in STOPWORDS]
+
+
+def load_rubrics(path: str = EVALUATION_RUBRICS_PATH) -> Dict[str, Dict[str, Any]]:
+    """Rúbricas por id o texto normalizado de la pregunta (vacío si no hay fichero)."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {normalize(str(key)).strip(): rubric for key, rubric in data.items()}
+
+
+class KeywordEvaluator:
+    def __init__(self, rubrics: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.rubrics = load_rubrics() if rubrics is None else rubrics
+
+    def keywords_for(self, topic: str, question: Optional[Dict[str, Any]]) -> Set[str]:
+        question = question or {}
+        for key in (question.get("id"), question.get("question")):
+            rubric = self.rubrics.get(normalize(str(key)).strip()) if key is not None else None
+            if rubric:
+                keywords = {normalize(k) for k in rubric.get("keywords", [])}
+                return keywords | set(content_words(rubric.get("expected", "")))
+
+        return set(content_words(question.get("question") or "")) | set(TOPIC_KEYWORDS.get(topic, []))
+
+    def __call__(self, response: str, topic: str, question: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        keywords = self.keywords_for(topic, question)
+        words = content_words(response)
+        # Coincidencia por prefijo: "asincrono" cuenta para "asincron", "etiquetas" para "etiqueta"
+        matched = sorted(k for k in keywords if any(w.startswith(k) or (k.startswith(w) and len(w) > 4) for w in words))
+
+        needed = max(1, min(KEYWORDS_FOR_FULL_SCORE, len(keywords)))
+        coverage = min(1.0, len(matched) / needed)
+        length_factor = min(1.0, len(response.split()) / MIN_ANSWER_WORDS)
+        score = round(100 * coverage * (0.5 + 0.5 * length_factor))
+
+        if score >= 70:
+            message = "Buena respuesta, cubres los conceptos principales."
+        elif score >= 40:
+            message = "Respuesta correcta en parte; podrías desarrollar más los conceptos clave."
+        else:
+            message = "La respuesta se queda corta; intenta explicar con más detalle los conceptos principales."
+
+        return {
+            "success": True,
+            "score": score,
+            "message": message,
+            "source": "local",
+            "matched_keywords": matched,
+        }
@@ -1,22 +1,35 @@
 # tools/register_candidate.py
+import asyncio
+import logging
 from typing import Dict, Any
 from livekit.agents import function_tool
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
 
-# Cargar archivo .env
-load_dotenv()
+from tools.repository import get_repository
+from tools.write_behind import WRITE_BEHIND_PRECHECK_TIMEOUT, get_write_behind
 
-# Leer variables
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+logger = logging.getLogger("sofia-agent")
 
-# Crear cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
-print("Supabase client initialized for register_candidate tool.")
 
+async def email_taken(email: str) -> bool:
+    """
+    Comprobación rápida de email duplicado antes de encolar el alta (una
+    lectura por email, como mucho ``WRITE_BEHIND_PRECHECK_TIMEOUT``). Si la
+    BD no responde a tiempo, el alta se encola sin comprobar y un duplicado
+    acabaría en las dead letters del write-behind.
+    """
+    if get_write_behind().email_registered(email):
+        return True
+    try:
+        found = await asyncio.wait_for(
+            get_repository().find_candidate_by_email(email), timeout=WRITE_BEHIND_PRECHECK_TIMEOUT
+        )
+        return found is not None
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Duplicate email check timed out, registering without it")
+        return False
+    except Exception as e:
+        logger.warning(f"⚠️ Duplicate email check failed, registering anyway: {e}")
+        return False
 
 
 @function_tool
@@ -25,7 +38,9 @@ async def register_candidate(
     candidate_email: str,
 ) -> Dict[str, Any]:
     """
-    Registra un nuevo candidato al inicio de la entrevista.
+    Registra un nuevo candidato al inicio de la entrevista. Solo se consulta
+    si el email ya existe; la escritura en la base de datos se hace en
+    segundo plano (write-behind): el candidate_id se genera aquí.
     
     Args:
         candidate_name: Nombre completo del candidato
@@ -35,6 +50,13 @@ async def register_candidate(
         Dict con el resultado de la operación incluyendo candidate_id
     """
     try:
+        if await email_taken(candidate_email):
+            return {
+                "success": False,
+                "error": "duplicate_email",
+                "message": f"El email {candidate_email} ya está registrado"
+            }
+
         candidate_data = {
             "name": candidate_name,
             "email": candidate_email,
@@ -42,39 +64,21 @@ async def register_candidate(
             "approved": False
         }
         
-        response = supabase.table("candidates").insert(candidate_data).execute()
-        
-        print("Supabase insert response:", response)
+        candidate_id = get_write_behind().register_candidate(candidate_data)
 
-        if response.data and len(response.data) > 0:
-            candidate = response.data[0]
-            return {
-                "success": True,
-                "candidate_id": candidate["id"],
-                "name": candidate["name"],
-                "email": candidate["email"],
-                "status": candidate["status"],
-                "message": f"Candidato {candidate_name} registrado exitosamente"
-            }
-        else:
-            return {
-                "success": False,
-                "error": "No se pudo crear el candidato",
-                "message": "Error al insertar en la base de datos"
-            }
+        return {
+            "success": True,
+            "candidate_id": candidate_id,
+            "name": candidate_name,
+            "email": candidate_email,
+            "status": candidate_data["status"],
+            "message": f"Candidato {candidate_name} registrado exitosamente"
+        }
             
     except Exception as e:
         error_message = str(e)
-        
-        if "duplicate key value violates unique constraint" in error_message:
-            return {
-                "success": False,
-                "error": "duplicate_email",
-                "message": f"El email {candidate_email} ya está registrado"
-            }
-        
         return {
             "success": False,
             "error": error_message,
             "message": f"Error al registrar candidato: {error_message}"
-        }
\ No newline at end of file
+        }
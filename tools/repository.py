@@ -0,0 +1,233 @@
+# tools/repository.py
+"""
+Capa de acceso a datos asíncrona compartida por todas las tools.
+
+Usa un único cliente PostgREST asíncrono (pool httpx) por proceso (por job
+con jobs en hilos), creado de forma perezosa en el primer uso. La URL es configurable, así que se puede
+probar contra un stub HTTP local que imite PostgREST.
+"""
+import os
+from typing import Any, Dict, List, Optional, TypedDict
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.types import CountMethod
+
+from tools.http_client import HTTP2_AVAILABLE
+from tools.job_local import JobLocal
+
+
+class TechRef(TypedDict, total=False):
+    name: str
+
+
+class QuestionRow(TypedDict, total=False):
+    id: Any
+    question: str
+    difficulty: Any
+    tech: TechRef
+    updated_at: str
+
+
+class QuestionBankVersion(TypedDict):
+    count: Optional[int]
+    updated_at: Optional[str]
+
+
+class CandidateRecord(TypedDict, total=False):
+    id: str
+    name: str
+    email: str
+    status: str
+    approved: bool
+    overall_notes: str
+
+
+class EvaluationRecord(TypedDict, total=False):
+    id: str
+    candidate_id: str
+    question_id: Any
+    topic: str
+    score: float
+    notes: str
+
+
+QUESTIONS_TABLE = "tech_questions"
+CANDIDATES_TABLE = "candidates"
+EVALUATIONS_TABLE = "evaluations"
+
+
+def _default_key() -> Optional[str]:
+    # SUPABASE_KEY (service key) tiene prioridad; SUPABASE_ANON_KEY como respaldo
+    return os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+
+
+class SupabaseRepository:
+    """
+    Repositorio de preguntas, candidatos y evaluaciones sobre PostgREST.
+
+    Args:
+        url: URL del proyecto Supabase (por defecto SUPABASE_URL)
+        key: API key (por defecto SUPABASE_KEY o SUPABASE_ANON_KEY)
+        rest_url: URL completa de PostgREST; por defecto ``{url}/rest/v1``
+        timeout: Timeout de las peticiones en segundos
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        rest_url: Optional[str] = None,
+        timeout: float = 10.0,
+    ):
+        self._url = url
+        self._key = key
+        self._rest_url = rest_url
+        self._timeout = timeout
+        self._client: Optional[AsyncPostgrestClient] = None
+
+    @property
+    def client(self) -> AsyncPostgrestClient:
+        """Cliente PostgREST, creado en el primer uso."""
+        if self._client is None:
+            url = self._url or os.getenv("SUPABASE_URL")
+            key = self._key or _default_key()
+            rest_url = self._rest_url or f"{url.rstrip('/')}/rest/v1"
+
+            headers = {
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            }
+            self._client = AsyncPostgrestClient(
+                rest_url,
+                headers=headers,
+                http_client=httpx.AsyncClient(
+                    base_url=rest_url,
+                    headers=headers,
+                    timeout=self._timeout,
+                    http2=HTTP2_AVAILABLE,
+                    follow_redirects=True,
+                ),
+            )
+
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    # ==========================
+    # PREGUNTAS
+    # ==========================
+
+    async def fetch_questions(self) -> List[QuestionRow]:
+        """Preguntas activas con el nombre de su tech, ordenadas por dificultad."""
+        response = await self.client.from_(QUESTIONS_TABLE) \
+            .select("id, question, difficulty, updated_at, tech, tech!inner(name)") \
+            .order("difficulty", desc=False) \
+            .execute()
+        return response.data or []
+
+    async def fetch_question_bank_version(self) -> QuestionBankVersion:
+        """
+        Versión del banco para revalidar la caché sin traer las preguntas:
+        cuántas hay (``count=exact``, con el mismo JOIN que
+        ``fetch_questions``) y el ``updated_at`` más reciente, en una fila.
+        """
+        response = await self.client.from_(QUESTIONS_TABLE) \
+            .select("updated_at, tech!inner(id)", count=CountMethod.exact) \
+            .order("updated_at", desc=True, nullsfirst=False) \
+            .limit(1) \
+            .execute()
+        latest = response.data[0].get("updated_at") if response.data else None
+        return {"count": response.count, "updated_at": latest}
+
+    # ==========================
+    # CANDIDATOS
+    # ==========================
+
+    async def insert_candidate(self, candidate: CandidateRecord) -> Optional[CandidateRecord]:
+        response = await self.client.from_(CANDIDATES_TABLE).insert(candidate).execute()
+        return response.data[0] if response.data else None
+
+    async def upsert_candidates(self, candidates: List[CandidateRecord]) -> List[CandidateRecord]:
+        """
+        Inserta candidatos con id generado en el cliente, en una sola petición.
+        Reintentar es seguro: el mismo id actualiza la misma fila.
+        """
+        if not candidates:
+            return []
+
+        response = await self.client.from_(CANDIDATES_TABLE) \
+            .upsert(candidates, on_conflict="id") \
+            .execute()
+        return response.data or []
+
+    async def find_candidate_by_email(self, email: str) -> Optional[CandidateRecord]:
+        """Consulta ligera (solo el id) para detectar emails duplicados antes de encolar."""
+        response = await self.client.from_(CANDIDATES_TABLE) \
+            .select("id") \
+            .eq("email", email) \
+            .limit(1) \
+            .execute()
+        return response.data[0] if response.data else None
+
+    async def candidate_exists(self, candidate_id: str) -> bool:
+        response = await self.client.from_(CANDIDATES_TABLE) \
+            .select("id") \
+            .eq("id", candidate_id) \
+            .limit(1) \
+            .execute()
+        return bool(response.data)
+
+    async def update_candidate(
+        self, candidate_id: str, changes: Dict[str, Any]
+    ) -> Optional[CandidateRecord]:
+        response = await self.client.from_(CANDIDATES_TABLE) \
+            .update(changes) \
+            .eq("id", candidate_id) \
+            .execute()
+        return response.data[0] if response.data else None
+
+    # ==========================
+    # EVALUACIONES
+    # ==========================
+
+    async def insert_evaluations(self, records: List[EvaluationRecord]) -> List[EvaluationRecord]:
+        """Inserta todas las evaluaciones en una sola petición (bulk insert)."""
+        if not records:
+            return []
+
+        response = await self.client.from_(EVALUATIONS_TABLE).insert(records).execute()
+        return response.data or []
+
+    async def upsert_evaluations(self, records: List[EvaluationRecord]) -> List[EvaluationRecord]:
+        """Como ``insert_evaluations`` pero idempotente por id (generado en el cliente)."""
+        if not records:
+            return []
+
+        response = await self.client.from_(EVALUATIONS_TABLE) \
+            .upsert(records, on_conflict="id") \
+            .execute()
+        return response.data or []
+
+
+_repository: JobLocal[SupabaseRepository] = JobLocal(SupabaseRepository)
+
+
+def get_repository() -> SupabaseRepository:
+    """Repositorio compartido del proceso (del job, con jobs en hilos; inicialización perezosa)."""
+    return _repository.get()
+
+
+def peek_repository() -> Optional[SupabaseRepository]:
+    """El repositorio si ya se creó (para cerrarlo al terminar un job sin crearlo)."""
+    return _repository.peek()
+
+
+def set_repository(repository: Optional[SupabaseRepository]) -> None:
+    """Reemplaza el repositorio compartido (p. ej. apuntando a un stub local)."""
+    _repository.set(repository)
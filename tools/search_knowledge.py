@@ -0,0 +1,343 @@
+# tools/search_knowledge.py
+"""
+Búsqueda en la documentación indexada en Qdrant (colección ``sofia_ai``,
+ver helpers/crawler.py) para fundamentar repreguntas y feedback.
+
+- Embedding de la consulta + búsqueda vectorial filtrada por ``topic``; si
+  el topic no está en el índice (los de la entrevista, p. ej. "React", no
+  coinciden con los indexados, p. ej. "TanStack"), se repite sin filtro
+  pero solo con fragmentos de score ``KNOWLEDGE_FALLBACK_MIN_SCORE`` o más:
+  si nada llega, la tool responde sin resultados
+- Top-k pequeño: solo unos pocos fragmentos cortos para el LLM
+- Cachés LRU de embeddings de consultas y de resultados
+- Presupuesto de latencia duro: si se supera, la tool responde sin
+  resultados en lugar de frenar el turno de voz
+
+openai y qdrant_client se importan al crear el searcher, no al importar
+el módulo: el worker no los paga hasta la primera búsqueda.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Sequence
+
+from livekit.agents import function_tool
+
+from agent.metrics import timed_tool
+from helpers.tokens import EMBEDDING_MODEL
+from tools.job_local import JobLocal
+
+if TYPE_CHECKING:
+    from qdrant_client import AsyncQdrantClient
+
+    from helpers.indexer import EmbedFn
+
+logger = logging.getLogger("sofia-agent")
+
+KNOWLEDGE_COLLECTION = os.getenv("KNOWLEDGE_COLLECTION", "sofia_ai")
+KNOWLEDGE_TOP_K = int(os.getenv("KNOWLEDGE_TOP_K", "3"))
+KNOWLEDGE_BUDGET_MS = float(os.getenv("KNOWLEDGE_BUDGET_MS", "800"))
+KNOWLEDGE_CACHE_SIZE = int(os.getenv("KNOWLEDGE_CACHE_SIZE", "256"))
+# Score mínimo (similitud coseno) de la búsqueda sin filtro de topic
+KNOWLEDGE_FALLBACK_MIN_SCORE = float(os.getenv("KNOWLEDGE_FALLBACK_MIN_SCORE", "0.5"))
+
+# Caracteres máximos por fragmento devuelto al LLM
+KNOWLEDGE_SNIPPET_CHARS = 600
+
+
+class LRUCache:
+    """Caché LRU mínima en memoria."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class KnowledgeSearcher:
+    """
+    Args:
+        qdrant: Cliente Qdrant asíncrono (sirve ``AsyncQdrantClient(":memory:")``)
+        embed_fn: Función de embedding por lotes (``helpers.indexer.EmbedFn``)
+        collection: Colección con payload ``content``, ``url`` y ``topic``
+        top_k: Fragmentos devueltos por búsqueda
+        budget_ms: Latencia máxima por llamada (embedding + búsqueda)
+        cache_size: Entradas de cada caché LRU
+        fallback_min_score: Score mínimo de la búsqueda sin filtro de topic
+        clients: Otros clientes asíncronos que se cierran con el searcher
+            (el ``AsyncOpenAI`` del embedder)
+    """
+
+    def __init__(
+        self,
+        qdrant: "AsyncQdrantClient",
+        embed_fn: "EmbedFn",
+        collection: str = KNOWLEDGE_COLLECTION,
+        top_k: int = KNOWLEDGE_TOP_K,
+        budget_ms: float = KNOWLEDGE_BUDGET_MS,
+        cache_size: int = KNOWLEDGE_CACHE_SIZE,
+        fallback_min_score: float = KNOWLEDGE_FALLBACK_MIN_SCORE,
+        clients: Sequence[Any] = (),
+    ):
+        self.qdrant = qdrant
+        self.clients = list(clients)
+        self.embed_fn = embed_fn
+        self.collection = collection
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.fallback_min_score = fallback_min_score
+
+        self._embeddings = LRUCache(cache_size)
+        self._results = LRUCache(cache_size)
+        self._pending_embeddings: Dict[str, asyncio.Future] = {}
+
+        self._calls = 0
+        self._result_hits = 0
+        self._embedding_hits = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._unfiltered = 0
+
+    async def aclose(self) -> None:
+        await self.qdrant.close()
+        for client in self.clients:
+            await client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self._calls,
+            "result_hits": self._result_hits,
+            "embedding_hits": self._embedding_hits,
+            "timeouts": self._timeouts,
+            "errors": self._errors,
+            "unfiltered": self._unfiltered,
+            "cached_queries": len(self._results),
+        }
+
+    async def _embed(self, key: str, query: str) -> List[float]:
+        vector = self._embeddings.get(key)
+        if vector is not None:
+            self._embedding_hits += 1
+            return vector
+
+        # Si se agota el presupuesto, el embedding termina en segundo plano
+        # y queda en caché para la siguiente consulta igual
+        future = self._pending_embeddings.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.embed_fn([query]))
+            self._pending_embeddings[key] = future
+
+            def store(done: asyncio.Future):
+                self._pending_embeddings.pop(key, None)
+                if not done.cancelled() and done.exception() is None:
+                    self._embeddings.put(key, done.result()[0])
+
+            future.add_done_callback(store)
+
+        return (await asyncio.shield(future))[0]
+
+    async def _query(
+        self, vector: List[float], topic: Optional[str], score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        from qdrant_client.http import models as qmodels
+
+        query_filter = None
+        if topic:
+            query_filter = qmodels.Filter(
+                must=[qmodels.FieldCondition(key="topic", match=qmodels.MatchValue(value=topic))]
+            )
+
+        response = await self.qdrant.query_points(
+            collection_name=self.collection,
+            query=vector,
+            query_filter=query_filter,
+            limit=self.top_k,
+            score_threshold=score_threshold,
+            with_payload=True,
+        )
+
+        return [
+            {
+                "content": (point.payload or {}).get("content", "")[:KNOWLEDGE_SNIPPET_CHARS],
+                "url": (point.payload or {}).get("url"),
+                "heading_path": (point.payload or {}).get("heading_path", []),
+                "score": round(point.score, 4),
+            }
+            for point in response.points
+        ]
+
+    async def search(self, query: str, topic: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Busca los fragmentos más relevantes para ``query`` dentro de ``topic``.
+
+        Returns:
+            Dict con ``results`` y ``timing`` (ms de embedding, búsqueda y total)
+        """
+        self._calls += 1
+        start = time.perf_counter()
+        key = normalize_query(query)
+        timing = {"embed_ms": 0.0, "search_ms": 0.0, "total_ms": 0.0, "cached": False}
+
+        def elapsed_ms(since: float) -> float:
+            return round((time.perf_counter() - since) * 1000, 1)
+
+        cached = self._results.get((key, topic))
+        if cached is not None:
+            self._result_hits += 1
+            timing.update(total_ms=elapsed_ms(start), cached=True)
+            return {
+                "success": True,
+                "results": cached,
+                "timing": timing,
+                "message": f"{len(cached)} fragmentos encontrados (caché)"
+            }
+
+        async def run() -> List[Dict[str, Any]]:
+            embed_start = time.perf_counter()
+            vector = await self._embed(key, query)
+            timing["embed_ms"] = elapsed_ms(embed_start)
+
+            search_start = time.perf_counter()
+            results = await self._query(vector, topic)
+            if topic and not results:
+                # Topic sin documentación indexada: algo cercano, nunca cualquier cosa
+                self._unfiltered += 1
+                results = await self._query(vector, None, self.fallback_min_score)
+            timing["search_ms"] = elapsed_ms(search_start)
+            return results
+
+        try:
+            results = await asyncio.wait_for(run(), timeout=self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            timing["total_ms"] = elapsed_ms(start)
+            return {
+                "success": False,
+                "error": "timeout",
+                "results": [],
+                "timing": timing,
+                "message": f"La búsqueda superó el presupuesto de {self.budget_ms:.0f} ms; continúa sin documentación"
+            }
+        except Exception as e:
+            self._errors += 1
+            timing["total_ms"] = elapsed_ms(start)
+            logger.error(f"❌ Error en search_knowledge: {e!r}")
+            return {
+                "success": False,
+                "error": str(e),
+                "results": [],
+                "timing": timing,
+                "message": f"Error al buscar en la documentación: {str(e)}"
+            }
+
+        self._results.put((key, topic), results)
+        timing["total_ms"] = elapsed_ms(start)
+        return {
+            "success": True,
+            "results": results,
+            "timing": timing,
+            "message": f"{len(results)} fragmentos encontrados"
+        }
+
+
+def _build_searcher() -> KnowledgeSearcher:
+    qdrant_url = os.getenv("QDRANT_URL")
+    if not qdrant_url:
+        raise RuntimeError("QDRANT_URL no está configurada")
+
+    from openai import AsyncOpenAI
+    from qdrant_client import AsyncQdrantClient
+
+    from helpers.indexer import openai_embedder
+
+    qdrant = AsyncQdrantClient(
+        url=qdrant_url,
+        api_key=os.getenv("QDRANT_API_KEY"),
+        port=443,
+        timeout=5,
+    )
+    openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return KnowledgeSearcher(qdrant, openai_embedder(openai_client, EMBEDDING_MODEL), clients=[openai_client])
+
+
+# Clientes asíncronos (Qdrant, OpenAI): uno por job con jobs en hilos
+_searcher: JobLocal[KnowledgeSearcher] = JobLocal(_build_searcher)
+
+
+def get_knowledge_searcher() -> KnowledgeSearcher:
+    """Searcher del job, creado la primera vez que se usa."""
+    return _searcher.get()
+
+
+def set_knowledge_searcher(searcher: Optional[KnowledgeSearcher]) -> None:
+    """Reemplaza el searcher del job (pruebas, benchmarks, Qdrant en memoria)."""
+    _searcher.set(searcher)
+
+
+def peek_knowledge_searcher() -> Optional[KnowledgeSearcher]:
+    """El searcher si ya se creó (para cerrarlo al terminar un job sin crearlo)."""
+    return _searcher.peek()
+
+
+@function_tool
+@timed_tool("search_knowledge")
+async def search_knowledge(query: str, topic: str) -> Dict[str, Any]:
+    """
+    Busca en la documentación técnica indexada fragmentos relevantes para
+    fundamentar una repregunta o el feedback al candidato.
+
+    Args:
+        query: Lo que quieres verificar o ampliar (ej: "diferencia entre useMemo y useCallback")
+        topic: Tema de la documentación indexada (ej: "TanStack")
+
+    Returns:
+        Dict con los fragmentos encontrados (contenido, url, score) y el tiempo de la búsqueda
+    """
+    try:
+        searcher = get_knowledge_searcher()
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "not_configured",
+            "results": [],
+            "message": f"Búsqueda en documentación no disponible: {str(e)}"
+        }
+
+    return await searcher.search(query, topic)
+
+
+if __name__ == "__main__":
+    # Ejemplo de uso
+    import sys
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    async def test():
+        result = await search_knowledge(
+            sys.argv[1] if len(sys.argv) > 1 else "cómo invalidar una query",
+            sys.argv[2] if len(sys.argv) > 2 else "TanStack",
+        )
+        print(result)
+
+    asyncio.run(test())
@@ -1,19 +1,20 @@
+# tools/supabase_services.py
+from functools import lru_cache
+import os
+
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from supabase import create_client, Client
-from dotenv import load_dotenv
-import os
 
-# Cargar archivo .env
-load_dotenv()
+app = FastAPI()
 
-# Leer variables
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-app = FastAPI()
+@lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    """Cliente Supabase, creado en la primera petición y no al importar."""
+    load_dotenv()
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
 
-# Crear cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
 @app.get("/")
 def read_root():
@@ -22,5 +23,5 @@ def read_root():
 @app.get("/users")
 def get_users():
     """Ejemplo: obtener datos de la tabla users'"""
-    data = supabase.table("users").select("*").execute()
+    data = get_supabase().table("users").select("*").execute()
     return data.data
@@ -0,0 +1,127 @@
+# tools/ttl_cache.py
+"""
+Caché asíncrona en memoria con TTL, revalidación por versión e invalidación
+explícita. Las peticiones concurrentes con la caché vacía o vencida se
+agrupan en una única carga. El valor se comparte entre los jobs del proceso
+aunque corran en hilos con su propio event loop.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+# loader() -> (valor, versión); version_probe() -> versión actual en origen
+Loader = Callable[[], Awaitable[Tuple[Any, Hashable]]]
+VersionProbe = Callable[[], Awaitable[Hashable]]
+
+
+class AsyncTTLCache:
+    """
+    Guarda un único valor costoso de construir (p. ej. el banco de preguntas).
+
+    - Mientras el valor está dentro del TTL se sirve directamente (hit).
+    - Al vencer el TTL, si hay ``version_probe`` se consulta la versión en
+      origen (consulta barata): si no cambió, se renueva el TTL sin recargar.
+    - Pasado ``max_age`` se recarga siempre, aunque la versión coincida.
+    - ``invalidate()`` fuerza la recarga en la siguiente petición.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        ttl: float,
+        version_probe: Optional[VersionProbe] = None,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self._version_probe = version_probe
+        self._clock = clock
+        self.ttl = ttl
+        self.max_age = max_age
+
+        self._value: Any = None
+        self._version: Hashable = None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def version(self) -> Hashable:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Marca el valor como vencido; la próxima lectura recarga desde origen."""
+        self._loaded = False
+        self._value = None
+        self._version = None
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cached": self._loaded,
+            "version": self._version,
+        }
+
+    async def get(self) -> Any:
+        """Devuelve el valor cacheado, recargándolo o revalidándolo si hace falta."""
+        if self._loaded and self._clock() < self._expires_at:
+            self.hits += 1
+            return self._value
+
+        # Con jobs en hilos la caché la comparten varios event loops: solo se
+        # agrupa con una carga del mismo loop (una tarea no se espera desde otro)
+        inflight = self._inflight
+        if inflight is not None and not inflight.done() and inflight.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        inflight = self._inflight = asyncio.create_task(self._refresh())
+        try:
+            return await asyncio.shield(inflight)
+        finally:
+            if self._inflight is inflight and inflight.done():
+                self._inflight = None
+
+    async def _refresh(self) -> Any:
+        now = self._clock()
+
+        try:
+            if self._can_revalidate(now):
+                version = await self._version_probe()
+                if version == self._version:
+                    self.revalidations += 1
+                    self._expires_at = now + self.ttl
+                    return self._value
+
+            self.misses += 1
+            value, version = await self._loader()
+        except Exception:
+            self.errors += 1
+            raise
+
+        self._value = value
+        self._version = version
+        self._loaded = True
+        self._loaded_at = now
+        self._expires_at = now + self.ttl
+        return value
+
+    def _can_revalidate(self, now: float) -> bool:
+        if not self._loaded or self._version_probe is None:
+            return False
+        if self.max_age is not None and now - self._loaded_at >= self.max_age:
+            return False
+        return True
@@ -1,18 +1,36 @@
 # tools/candidate_tools.py
+import asyncio
+import logging
 from typing import Dict, Any
 from livekit.agents import function_tool
-from supabase import Client
-import os
-from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv()
+from tools.repository import get_repository
+from tools.write_behind import WRITE_BEHIND_PRECHECK_TIMEOUT, get_write_behind, is_permanent
 
-# Cliente Supabase global
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+logger = logging.getLogger("sofia-agent")
+
+
+async def candidate_known(candidate_id: str) -> bool:
+    """
+    Comprobación rápida de que el candidato existe antes de encolar la
+    actualización: registrado en este job (quizá aún sin escribir) o
+    presente en la BD. Si la BD no responde en
+    ``WRITE_BEHIND_PRECHECK_TIMEOUT``, se encola sin comprobar.
+    """
+    if get_write_behind().is_registered(candidate_id):
+        return True
+    try:
+        return await asyncio.wait_for(
+            get_repository().candidate_exists(candidate_id), timeout=WRITE_BEHIND_PRECHECK_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Candidate check timed out, updating without it")
+        return True
+    except Exception as e:
+        if is_permanent(e):
+            return False  # p. ej. un id que no es un UUID
+        logger.warning(f"⚠️ Candidate check failed, updating anyway: {e}")
+        return True
 
 
 @function_tool
@@ -23,6 +41,8 @@ async def update_candidate_status(
 ) -> Dict[str, Any]:
     """
     Actualiza el estado de aprobación del candidato después de la entrevista.
+    Solo se comprueba que el candidato existe; la escritura se hace en
+    segundo plano (write-behind).
     
     Args:
         candidate_id: UUID del candidato
@@ -33,6 +53,13 @@ async def update_candidate_status(
         Dict con el resultado de la actualización
     """
     try:
+        if not await candidate_known(candidate_id):
+            return {
+                "success": False,
+                "error": "candidate_not_found",
+                "message": f"No se encontró el candidato con ID: {candidate_id}"
+            }
+
         # Determinar el nuevo status basado en aprobación
         new_status = "approved" if approved else "rejected"
         
@@ -45,28 +72,20 @@ async def update_candidate_status(
         if final_notes:
             update_data["overall_notes"] = final_notes
         
-        # Actualizar en Supabase
-        response = supabase.table("candidates").update(update_data).eq("id", candidate_id).execute()
+        # Encolar la actualización; se escribe en Supabase en el próximo flush
+        get_write_behind().update_candidate(candidate_id, update_data)
         
-        if response.data and len(response.data) > 0:
-            candidate = response.data[0]
-            return {
-                "success": True,
-                "candidate_id": candidate["id"],
-                "approved": candidate["approved"],
-                "status": candidate["status"],
-                "message": f"Candidato actualizado: {'APROBADO' if approved else 'NO APROBADO'}"
-            }
-        else:
-            return {
-                "success": False,
-                "error": "candidate_not_found",
-                "message": f"No se encontró el candidato con ID: {candidate_id}"
-            }
+        return {
+            "success": True,
+            "candidate_id": candidate_id,
+            "approved": approved,
+            "status": new_status,
+            "message": f"Candidato actualizado: {'APROBADO' if approved else 'NO APROBADO'}"
+        }
             
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
             "message": f"Error al actualizar candidato: {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,377 @@
+# tools/write_behind.py
+"""
+Persistencia write-behind de candidatos y evaluaciones (una por proceso).
+
+Las tools no esperan a Supabase: registran el cambio aquí, responden al
+agente al instante y un flush periódico lo escribe en lote.
+
+- Los cambios se agrupan por candidato (y las evaluaciones por candidato +
+  pregunta): varias escrituras de la misma fila entre dos flush son una sola.
+- Cada ``WRITE_BEHIND_FLUSH_INTERVAL`` segundos, al juntar
+  ``WRITE_BEHIND_MAX_BATCH`` cambios o al cerrar la sesión, los candidatos
+  nuevos y las evaluaciones se escriben con upserts en lote y las
+  actualizaciones con un PATCH por candidato.
+- Los ids se generan en el cliente (claves de idempotencia): reintentar un
+  lote nunca duplica filas. Los errores transitorios se reintentan con
+  backoff; las filas que la BD rechaza (p. ej. email duplicado) o que
+  agotan los reintentos van a ``WRITE_BEHIND_DEAD_LETTER_PATH``.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+
+from tools.job_local import JobLocal
+from tools.repository import CandidateRecord, EvaluationRecord, SupabaseRepository, get_repository
+
+logger = logging.getLogger("sofia-agent")
+
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "2"))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+WRITE_BEHIND_RETRY_BACKOFF = float(os.getenv("WRITE_BEHIND_RETRY_BACKOFF", "1"))
+WRITE_BEHIND_DEAD_LETTER_PATH = os.getenv("WRITE_BEHIND_DEAD_LETTER_PATH", "spool/persistence_dead_letters.jsonl")
+# Espera máxima (s) de las comprobaciones previas de las tools de candidatos; pasado, se encola sin comprobar
+WRITE_BEHIND_PRECHECK_TIMEOUT = float(os.getenv("WRITE_BEHIND_PRECHECK_TIMEOUT", "0.3"))
+
+
+def stable_evaluation_id(candidate_id: Any, question_id: Any) -> str:
+    """
+    Id estable de la evaluación de (candidato, pregunta): cualquier job que
+    la escriba (también al recuperar evaluaciones del spool) reemplaza la
+    misma fila con el upsert.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"sofia-evaluation:{candidate_id}:{question_id}"))
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    True si reintentar no sirve: la BD rechazó los datos (códigos SQLSTATE
+    de integridad / datos / esquema, o errores PGRST de la petición).
+    """
+    if not isinstance(error, APIError) or not error.code:
+        return False
+    code = str(error.code)
+    return code[:2] in ("22", "23", "42") or code.startswith("PGRST1") or code.startswith("PGRST2")
+
+
+@dataclass
+class PendingCandidate:
+    fields: Dict[str, Any]
+    insert: bool  # True: fila nueva (upsert); False: cambios a una fila existente (PATCH)
+    attempts: int = 0
+
+
+@dataclass
+class PendingEvaluation:
+    record: EvaluationRecord
+    attempts: int = 0
+
+
+class WriteBehindStore:
+    def __init__(
+        self,
+        repository: Optional[SupabaseRepository] = None,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_batch: int = WRITE_BEHIND_MAX_BATCH,
+        max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+        backoff: float = WRITE_BEHIND_RETRY_BACKOFF,
+        dead_letter_path: str = WRITE_BEHIND_DEAD_LETTER_PATH,
+    ):
+        self._repository = repository
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dead_letter_path = dead_letter_path
+        self._candidates: Dict[str, PendingCandidate] = {}
+        self._evaluations: Dict[Tuple[str, Any], PendingEvaluation] = {}
+        self._evaluation_ids: Dict[Tuple[str, Any], str] = {}
+        # Candidatos registrados en este job (id -> email), escritos o no todavía
+        self._registered: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._retry_at = 0.0
+        self.writes = 0
+        self.coalesced = 0
+        self.requests = 0
+        self.failures = 0
+        self.dead_letters = 0
+
+    @property
+    def repository(self) -> SupabaseRepository:
+        return self._repository or get_repository()
+
+    # ==========================
+    # ESCRITURAS (sin esperar a la BD)
+    # ==========================
+
+    def register_candidate(self, candidate: CandidateRecord) -> str:
+        """Encola un candidato nuevo y devuelve su id (generado aquí)."""
+        candidate_id = candidate.get("id") or str(uuid.uuid4())
+        self._merge_candidate(candidate_id, {**candidate, "id": candidate_id}, insert=True)
+        self._registered[candidate_id] = candidate.get("email")
+        return candidate_id
+
+    def is_registered(self, candidate_id: str) -> bool:
+        """True si el candidato se registró en este job (aunque no esté aún en la BD)."""
+        return candidate_id in self._registered
+
+    def email_registered(self, email: str) -> bool:
+        """True si un candidato con ese email se registró en este job."""
+        return email in self._registered.values()
+
+    def update_candidate(self, candidate_id: str, changes: Dict[str, Any]) -> None:
+        """Encola cambios de un candidato; se juntan con los pendientes."""
+        self._merge_candidate(candidate_id, dict(changes), insert=False)
+
+    def add_evaluation(self, record: EvaluationRecord) -> str:
+        """
+        Encola la evaluación de una pregunta. La misma (candidato, pregunta)
+        reutiliza su id, así una evaluación corregida reemplaza a la anterior.
+        """
+        key = (record.get("candidate_id"), record.get("question_id"))
+        evaluation_id = self._evaluation_ids.setdefault(key, record.get("id") or stable_evaluation_id(*key))
+        if key in self._evaluations:
+            self.coalesced += 1
+        self._evaluations[key] = PendingEvaluation({**record, "id": evaluation_id})
+        self._written()
+        return evaluation_id
+
+    def add_evaluations(self, records: List[EvaluationRecord]) -> List[str]:
+        """
+        Encola las evaluaciones de una entrevista completa y adelanta el
+        flush: salen juntas en un solo upsert.
+        """
+        ids = [self.add_evaluation(record) for record in records]
+        if ids:
+            self._wake.set()
+        return ids
+
+    def _merge_candidate(self, candidate_id: str, fields: Dict[str, Any], insert: bool) -> None:
+        pending = self._candidates.get(candidate_id)
+        if pending is None:
+            self._candidates[candidate_id] = PendingCandidate(fields, insert)
+        else:
+            pending.fields.update(fields)
+            pending.insert = pending.insert or insert
+            self.coalesced += 1
+        self._written()
+
+    def _written(self) -> None:
+        self.writes += 1
+        self._ensure_started()
+        if self.pending() >= self.max_batch:
+            self._wake.set()
+
+    def pending(self) -> int:
+        return len(self._candidates) + len(self._evaluations)
+
+    # ==========================
+    # FLUSH
+    # ==========================
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if self.pending() and time.monotonic() >= self._retry_at:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"❌ Write-behind flush error: {e}")
+
+    async def flush(self) -> None:
+        """Escribe todo lo pendiente; lo que falla vuelve a la cola."""
+        async with self._lock:
+            candidates, self._candidates = self._candidates, {}
+            evaluations, self._evaluations = self._evaluations, {}
+            retry = False
+
+            inserts = {cid: p for cid, p in candidates.items() if p.insert}
+            updates = {cid: p for cid, p in candidates.items() if not p.insert}
+
+            retry |= await self._write_candidates(inserts)
+            retry |= await self._write_updates(updates)
+
+            # Las evaluaciones de un candidato cuya fila aún no existe esperan al siguiente flush
+            blocked = {cid for cid, p in self._candidates.items() if p.insert}
+            ready = {k: e for k, e in evaluations.items() if k[0] not in blocked}
+            for key, evaluation in evaluations.items():
+                if key not in ready:
+                    self._evaluations.setdefault(key, evaluation)
+            retry |= await self._write_evaluations(ready)
+
+            if retry:
+                attempts = max([p.attempts for p in self._candidates.values()] +
+                               [e.attempts for e in self._evaluations.values()] + [1])
+                self._retry_at = time.monotonic() + self.backoff * 2 ** (attempts - 1)
+            else:
+                self._retry_at = 0.0
+
+    def _requeue_candidate(self, candidate_id: str, failed: PendingCandidate, error: Exception) -> bool:
+        """Devuelve un candidato fallido a la cola (los cambios más nuevos ganan)."""
+        failed.attempts += 1
+        if is_permanent(error) or failed.attempts > self.max_retries:
+            self._dead_letter("candidate", failed.fields, error)
+            return False
+
+        newer = self._candidates.get(candidate_id)
+        if newer is not None:
+            failed.fields.update(newer.fields)
+            failed.insert = failed.insert or newer.insert
+        self._candidates[candidate_id] = failed
+        return True
+
+    def _requeue_evaluation(self, key: Tuple[str, Any], failed: PendingEvaluation, error: Exception) -> bool:
+        failed.attempts += 1
+        if is_permanent(error) or failed.attempts > self.max_retries:
+            self._dead_letter("evaluation", failed.record, error)
+            return False
+
+        self._evaluations.setdefault(key, failed)
+        return True
+
+    async def _write_candidates(self, inserts: Dict[str, PendingCandidate]) -> bool:
+        """Upserts en lote; en PostgREST todas las filas de un lote llevan las mismas columnas."""
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for candidate_id, pending in inserts.items():
+            groups.setdefault(tuple(sorted(pending.fields)), []).append(candidate_id)
+
+        retry = False
+        for ids in groups.values():
+            for start in range(0, len(ids), self.max_batch):
+                batch = ids[start:start + self.max_batch]
+                error = await self._request(self.repository.upsert_candidates([inserts[cid].fields for cid in batch]))
+                if error is None:
+                    continue
+
+                # Lote rechazado por una fila: reintentarlas de una en una para aislarla
+                isolate = is_permanent(error) and len(batch) > 1
+                for cid in batch:
+                    row_error = error
+                    if isolate:
+                        row_error = await self._request(self.repository.upsert_candidates([inserts[cid].fields]))
+                        if row_error is None:
+                            continue
+                    retry |= self._requeue_candidate(cid, inserts[cid], row_error)
+        return retry
+
+    async def _write_updates(self, updates: Dict[str, PendingCandidate]) -> bool:
+        async def update(candidate_id: str, pending: PendingCandidate) -> bool:
+            error = await self._request(self.repository.update_candidate(candidate_id, pending.fields))
+            return error is not None and self._requeue_candidate(candidate_id, pending, error)
+
+        results = await asyncio.gather(*(update(cid, p) for cid, p in updates.items()))
+        return any(results)
+
+    async def _write_evaluations(self, evaluations: Dict[Tuple[str, Any], PendingEvaluation]) -> bool:
+        keys = list(evaluations)
+        retry = False
+        for start in range(0, len(keys), self.max_batch):
+            batch = keys[start:start + self.max_batch]
+            error = await self._request(self.repository.upsert_evaluations([evaluations[k].record for k in batch]))
+            if error is None:
+                continue
+
+            isolate = is_permanent(error) and len(batch) > 1
+            for key in batch:
+                row_error = error
+                if isolate:
+                    row_error = await self._request(self.repository.upsert_evaluations([evaluations[key].record]))
+                    if row_error is None:
+                        continue
+                retry |= self._requeue_evaluation(key, evaluations[key], row_error)
+        return retry
+
+    async def _request(self, call) -> Optional[Exception]:
+        """Ejecuta una petición a la BD y devuelve el error (None si salió bien)."""
+        self.requests += 1
+        try:
+            await call
+            return None
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ Write-behind request failed: {e!r}")
+            return e
+
+    def _dead_letter(self, kind: str, record: Dict[str, Any], error: Exception) -> None:
+        self.dead_letters += 1
+        logger.error(f"❌ Write-behind dropped {kind} {record.get('id')}: {error!r}")
+
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": kind, "record": record, "error": repr(error), "at": time.time()},
+                               ensure_ascii=False, default=str) + "\n")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "pending": self.pending(),
+            "requests": self.requests,
+            "failures": self.failures,
+            "dead_letters": self.dead_letters,
+        }
+
+    async def drain(self, timeout: float = 10.0) -> bool:
+        """
+        Escribe lo pendiente ya (al cerrar una sesión), reintentando hasta
+        ``timeout`` segundos.
+
+        Returns:
+            True si no quedó nada pendiente
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            await asyncio.sleep(max(0.0, min(self._retry_at - time.monotonic(), deadline - time.monotonic())))
+            await self.flush()
+        return not self.pending()
+
+    async def aclose(self, timeout: float = 10.0) -> None:
+        """Detiene el flush periódico y escribe lo pendiente."""
+        if self._task is not None:
+            # Sin cancelar: un flush en curso termina (si no, su lote se perdería)
+            self._closing = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._closing = False
+        await self.drain(timeout)
+
+
+_store: JobLocal[WriteBehindStore] = JobLocal(WriteBehindStore)
+
+
+def get_write_behind() -> WriteBehindStore:
+    """Store write-behind del proceso (del job, con jobs en hilos), creado la primera vez."""
+    return _store.get()
+
+
+def peek_write_behind() -> Optional[WriteBehindStore]:
+    """El store si ya se creó (para vaciarlo al terminar un job sin crearlo)."""
+    return _store.peek()
+
+
+def set_write_behind(store: Optional[WriteBehindStore]) -> None:
+    """Reemplaza el store del proceso (benchmarks)."""
+    _store.set(store)